@@ -1,21 +1,46 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
+import hashlib
+import io
+import json
+import mimetypes
+import os
 
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 
-from app.adapters.google_auth import get_credentials
+from app.adapters.google_auth import get_credentials, scopes_for
 
-SCOPES = [
-    "https://www.googleapis.com/auth/drive",
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/gmail.readonly",
-]
+SCOPES = scopes_for("drive")
+
+# resumable upload chunk; Drive wants multiples of 256 KB
+_UPLOAD_CHUNK = 8 * 1024 * 1024
+
+_service_factory: Callable[[], object] | None = None
+
+
+def set_service_factory(factory: Callable[[], object] | None) -> None:
+    """Route every Drive call through `factory` (e.g. DriveReplay); None restores the real API."""
+    global _service_factory
+    _service_factory = factory
+
+
+def _get_service():
+    if _service_factory is not None:
+        return _service_factory()
+    creds = get_credentials(SCOPES)
+    return build("drive", "v3", credentials=creds)
+
+
+def _quote(value: str) -> str:
+    # Drive query string literal
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
 
 
 def _find_folder_id(service, name: str, parent_id: Optional[str]) -> Optional[str]:
-    q = ["mimeType = 'application/vnd.google-apps.folder'", f"name = '{name}'", "trashed = false"]
+    q = ["mimeType = 'application/vnd.google-apps.folder'", f"name = {_quote(name)}", "trashed = false"]
     if parent_id:
         q.append(f"'{parent_id}' in parents")
     else:
@@ -36,17 +61,18 @@ def _create_folder(service, name: str, parent_id: Optional[str]) -> str:
     return resp["id"]
 
 
-def _find_file_id(service, name: str, parent_id: Optional[str]) -> Optional[str]:
-    q = [f"name = '{name}'", "trashed = false"]
+def _find_file(service, name: str, parent_id: Optional[str]) -> Optional[dict]:
+    # id and md5Checksum of the file called `name`, in the same single list call
+    q = [f"name = {_quote(name)}", "trashed = false"]
     if parent_id:
         q.append(f"'{parent_id}' in parents")
     else:
         q.append("'root' in parents")
-    resp = service.files().list(q=" and ".join(q), fields="files(id, name)").execute()
+    resp = service.files().list(q=" and ".join(q), fields="files(id, name, md5Checksum)").execute()
     files = resp.get("files", [])
     if not files:
         return None
-    return files[0]["id"]
+    return files[0]
 
 
 def _ensure_folder_path(service, path: str) -> str:
@@ -60,22 +86,200 @@ def _ensure_folder_path(service, path: str) -> str:
     return parent_id or "root"
 
 
-def save_to_drive(local_path: Path, drive_folder: str) -> None:
-    creds = get_credentials(SCOPES)
-    service = build("drive", "v3", credentials=creds)
+def _status(exc: HttpError) -> int | None:
+    return getattr(exc, "status_code", None) or getattr(exc.resp, "status", None)
 
-    folder_id = _ensure_folder_path(service, drive_folder)
 
-    existing_id = _find_file_id(service, local_path.name, folder_id)
-    if existing_id:
-        return
+def _session_offset(request, size: int) -> int | None:
+    """Ask Drive how much of a stored upload session it holds: PUT `Content-Range: bytes */size`.
+
+    Returns the next byte to send, or None when the upload already completed.
+    An expired session raises HttpError (404/410).
+    """
+    headers = {"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+    resp, content = request.http.request(request.resumable_uri, "PUT", headers=headers)
+    if resp.status in (200, 201):
+        return None
+    if resp.status != 308:
+        raise HttpError(resp, content, uri=request.resumable_uri)
+    # "Range: bytes=0-N" lists what was received; no header means nothing yet
+    received = resp.get("range")
+    return int(received.rsplit("-", 1)[1]) + 1 if received else 0
+
+
+def _md5(path: Path) -> str:
+    digest = hashlib.md5()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class _JsonState:
+    """Small JSON dict on disk, rewritten atomically on every change (no path: memory only)."""
+
+    def __init__(self, path: Path | None):
+        self.path = path
+        self.data: dict[str, object] = {}
+        if path is not None and path.exists():
+            try:
+                self.data = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.data = {}
+
+    def get(self, key: str):
+        return self.data.get(key)
+
+    def put(self, key: str, value) -> None:
+        self.data[key] = value
+        self._save()
+
+    def drop(self, key: str) -> None:
+        if self.data.pop(key, None) is not None:
+            self._save()
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.data, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+
+class FolderCache(_JsonState):
+    """Drive folder path -> folder ID, persisted as JSON so a run resolves nothing.
+
+    An entry is trusted until Drive answers 404 for it; see save_to_drive.
+    """
+
+
+class UploadSessions(_JsonState):
+    """Resumable upload sessions still in flight, keyed by "<folder id>/<name>".
+
+    Each entry keeps the session URI with the MD5 and target file it was opened
+    for, so a later run continues the upload only for the same bytes.
+    """
+
+
+def _upload(
+    service,
+    local_path: Path,
+    folder_id: str,
+    md5: str,
+    file_id: str | None = None,
+    sessions: UploadSessions | None = None,
+    data: bytes | None = None,
+) -> None:
+    """Chunked resumable upload: a new file, or a new revision of `file_id`."""
+    from googleapiclient.http import MediaFileUpload, MediaIoBaseUpload
+
+    if data is None:
+        media = MediaFileUpload(str(local_path), chunksize=_UPLOAD_CHUNK, resumable=True)
+    else:
+        mimetype = mimetypes.guess_type(local_path.name)[0] or "application/octet-stream"
+        media = MediaIoBaseUpload(io.BytesIO(data), mimetype, chunksize=_UPLOAD_CHUNK, resumable=True)
+    if file_id:
+        request = service.files().update(fileId=file_id, media_body=media, fields="id")
+    else:
+        body = {"name": local_path.name, "parents": [folder_id]}
+        request = service.files().create(body=body, media_body=media, fields="id")
+
+    sessions = sessions or UploadSessions(None)
+    key = f"{folder_id}/{local_path.name}"
+    saved = sessions.get(key)
+    if saved and saved.get("md5") == md5 and saved.get("file_id") == file_id:
+        request.resumable_uri = saved["uri"]
+        try:
+            offset = _session_offset(request, media.size())
+        except HttpError as exc:
+            if _status(exc) not in (404, 410):
+                raise
+            # the stored session expired: start a fresh one
+            sessions.drop(key)
+            saved = None
+            request.resumable_uri = None
+        else:
+            if offset is None:
+                sessions.drop(key)
+                return
+            request.resumable_progress = offset
+    else:
+        saved = None
+
+    response = None
+    while response is None:
+        try:
+            _, response = request.next_chunk(num_retries=3)
+        except HttpError as exc:
+            if saved is None or _status(exc) not in (404, 410):
+                raise
+            # the stored session expired: start a fresh one
+            sessions.drop(key)
+            saved = None
+            # with no session URI the next chunk starts a new upload
+            request.resumable_uri = None
+            request.resumable_progress = 0
+            continue
+        if saved is None and request.resumable_uri:
+            saved = {"uri": request.resumable_uri, "md5": md5, "file_id": file_id}
+            sessions.put(key, saved)
+    sessions.drop(key)
+
+
+def save_to_drive(
+    local_path: Path,
+    drive_folder: str,
+    cache_path: Path | None = None,
+    sessions_path: Path | None = None,
+    data: bytes | None = None,
+) -> None:
+    """Archive `local_path` into `drive_folder`, comparing content rather than names.
+
+    A file of the same name whose md5Checksum matches is left alone; different
+    content is uploaded as a new revision of that file. Uploads are resumable
+    and chunked, and with `sessions_path` an interrupted upload continues from
+    the last byte Drive acknowledged on the next run.
+
+    With `cache_path` the folder ID comes from the local cache and is trusted:
+    an archived file costs one files.list, a new one that plus the upload. The
+    path is resolved again only when Drive answers 404 for the cached folder.
+
+    With `data` (UNZIP_MODE=memory) those bytes are uploaded and `local_path`
+    only names the Drive file; nothing is read from disk.
+    """
+    service = _get_service()
+    cache = FolderCache(cache_path)
+    sessions = UploadSessions(sessions_path)
+    md5 = _md5(local_path) if data is None else hashlib.md5(data).hexdigest()
+
+    folder_id = cache.get(drive_folder)
+    if folder_id is not None:
+        try:
+            _sync_file(service, local_path, folder_id, md5, _find_file(service, local_path.name, folder_id), sessions, data)
+            return
+        except HttpError as exc:
+            if _status(exc) != 404:
+                raise
+        # the cached folder was deleted
+        cache.drop(drive_folder)
+
+    folder_id = _ensure_folder_path(service, drive_folder)
+    cache.put(drive_folder, folder_id)
+    _sync_file(service, local_path, folder_id, md5, _find_file(service, local_path.name, folder_id), sessions, data)
 
-    media_body = {
-        "name": local_path.name,
-        "parents": [folder_id],
-    }
-    # simple upload
-    from googleapiclient.http import MediaFileUpload
 
-    media = MediaFileUpload(str(local_path), resumable=False)
-    service.files().create(body=media_body, media_body=media, fields="id").execute()
+def _sync_file(
+    service,
+    local_path: Path,
+    folder_id: str,
+    md5: str,
+    existing: dict | None,
+    sessions: UploadSessions,
+    data: bytes | None = None,
+) -> None:
+    if existing is None:
+        _upload(service, local_path, folder_id, md5, sessions=sessions, data=data)
+    # Google-native files have no md5Checksum; those are never overwritten
+    elif existing.get("md5Checksum", md5) != md5:
+        _upload(service, local_path, folder_id, md5, file_id=existing["id"], sessions=sessions, data=data)
@@ -1,49 +1,274 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
 import base64
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
 
 from googleapiclient.discovery import build
+from googleapiclient.errors import HttpError
 from google.oauth2.credentials import Credentials
 
-from app.adapters.google_auth import get_credentials
+from app.adapters.google_auth import get_credentials, scopes_for
 
 
-SCOPES = [
-    "https://www.googleapis.com/auth/gmail.readonly",
-    "https://www.googleapis.com/auth/drive",
-    "https://www.googleapis.com/auth/spreadsheets",
-]
+SCOPES = scopes_for("gmail")
+
+# partial response: just what _iter_attachments needs instead of the whole MIME tree
+_MESSAGE_FIELDS = (
+    "id,historyId,internalDate,"
+    "payload(filename,body/attachmentId,parts(filename,body/attachmentId,parts(filename,body/attachmentId)))"
+)
+_GMAIL_API = "https://gmail.googleapis.com/gmail/v1"
+# response bytes read per step while streaming an attachment body
+_DOWNLOAD_CHUNK = 256 * 1024
+_DATA_FIELD = re.compile(rb'"data"\s*:\s*"')
 
 
 @dataclass
 class Attachment:
+    """A downloaded attachment: on disk (see GmailClient.download_attachment) or in `data`."""
+
     name: str
-    data: bytes
+    path: Path | None
+    sha256: str
+    size: int
+    message_id: str | None = None
+    received_at: int | None = None  # internalDate, epoch ms
+    data: bytes | None = None  # body kept in memory (UNZIP_MODE=memory); path is None then
+
+
+@dataclass
+class GmailCursor:
+    """Where the last successful run left Gmail: mailbox historyId and handled message IDs.
+
+    `advance()`/`mark_processed()` only stage changes; `save()` persists them, and
+    the pipeline calls it at the end of a run so a failed run retries the message.
+    Every handled ID is kept: backlog runs list the whole query and rely on them
+    to skip mail handled long ago.
+    """
+
+    path: Path
+    history_id: str | None = None
+    processed: list[str] = field(default_factory=list)
+    pending_history_id: str | None = None
+    _seen: set[str] = field(default_factory=set, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._seen = set(self.processed)
+
+    def __contains__(self, message_id: object) -> bool:
+        return message_id in self._seen
+
+    @classmethod
+    def load(cls, path: Path) -> "GmailCursor":
+        if not path.exists():
+            return cls(path)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cls(path)
+        return cls(path, data.get("history_id"), list(data.get("processed", [])))
+
+    def advance(self, history_id: str | None) -> None:
+        if history_id and (self.pending_history_id is None or int(history_id) > int(self.pending_history_id)):
+            self.pending_history_id = history_id
+
+    def mark_processed(self, message_id: str | None) -> None:
+        if message_id and message_id not in self._seen:
+            self._seen.add(message_id)
+            self.processed.append(message_id)
+
+    def save(self) -> None:
+        if self.pending_history_id:
+            self.history_id = self.pending_history_id
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(
+            json.dumps({"history_id": self.history_id, "processed": self.processed}, indent=2),
+            encoding="utf-8",
+        )
+        os.replace(tmp, self.path)
+
+
+_service_factory: Callable[[], object] | None = None
+
+
+def set_service_factory(factory: Callable[[], object] | None) -> None:
+    """Route every Gmail call through `factory` (e.g. GmailReplay); None restores the real API."""
+    global _service_factory
+    _service_factory = factory
 
 
 class GmailClient:
-    def __init__(self, creds: Credentials):
-        self.service = build("gmail", "v1", credentials=creds)
+    def __init__(self, creds: Credentials | None = None, service=None):
+        self.creds = creds
+        self.service = service or build("gmail", "v1", credentials=creds)
 
-    def list_messages(self, query: str) -> Iterable[dict]:
-        resp = self.service.users().messages().list(userId="me", q=query, maxResults=10).execute()
+    def list_messages(self, query: str, max_results: int = 10) -> Iterable[dict]:
+        resp = self.service.users().messages().list(userId="me", q=query, maxResults=max_results).execute()
         return resp.get("messages", [])
 
-    def get_message(self, msg_id: str) -> dict:
-        return self.service.users().messages().get(userId="me", id=msg_id, format="full").execute()
+    def list_all_messages(self, query: str) -> list[dict]:
+        messages: list[dict] = []
+        page_token = None
+        while True:
+            resp = (
+                self.service.users()
+                .messages()
+                .list(userId="me", q=query, maxResults=500, pageToken=page_token)
+                .execute()
+            )
+            messages += resp.get("messages", [])
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                return messages
 
-    def get_attachment(self, msg_id: str, attachment_id: str) -> bytes:
-        resp = (
+    def get_message(self, msg_id: str) -> dict:
+        return (
             self.service.users()
             .messages()
-            .attachments()
-            .get(userId="me", messageId=msg_id, id=attachment_id)
+            .get(userId="me", id=msg_id, format="full", fields=_MESSAGE_FIELDS)
             .execute()
         )
-        data = resp.get("data", "")
-        return base64.urlsafe_b64decode(data.encode("utf-8"))
+
+    def get_profile_history_id(self) -> str | None:
+        return self.service.users().getProfile(userId="me").execute().get("historyId")
+
+    def list_added_since(self, start_history_id: str) -> tuple[set[str], str | None] | None:
+        """IDs of messages added since `start_history_id` and the mailbox's current historyId.
+
+        Returns None when Gmail no longer has history that far back (HTTP 404).
+        """
+        added: set[str] = set()
+        latest = None
+        page_token = None
+        while True:
+            try:
+                resp = (
+                    self.service.users()
+                    .history()
+                    .list(
+                        userId="me",
+                        startHistoryId=start_history_id,
+                        historyTypes="messageAdded",
+                        pageToken=page_token,
+                    )
+                    .execute()
+                )
+            except HttpError as exc:
+                if getattr(exc, "status_code", None) == 404 or getattr(exc.resp, "status", None) == 404:
+                    return None
+                raise
+            latest = resp.get("historyId", latest)
+            for record in resp.get("history", []):
+                for item in record.get("messagesAdded", []):
+                    added.add(item["message"]["id"])
+            page_token = resp.get("nextPageToken")
+            if not page_token:
+                return added, latest
+
+    def download_attachment(self, msg_id: str, attachment_id: str, directory: Path) -> tuple[Path, str, int]:
+        """Stream an attachment into a temp file in `directory`; returns (path, sha256, size).
+
+        The discovery client would hold the whole base64 response and then the
+        decoded bytes, so the REST endpoint is read in chunks and decoded as it
+        arrives: memory stays flat however large the export grows.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".download-", suffix=".part")
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                digest, size = decode_data_field(self._attachment_chunks(msg_id, attachment_id), out)
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return tmp_path, digest, size
+
+    def read_attachment(self, msg_id: str, attachment_id: str) -> tuple[bytes, str, int]:
+        """Like download_attachment, but decoded into memory; returns (bytes, sha256, size)."""
+        out = io.BytesIO()
+        digest, size = decode_data_field(self._attachment_chunks(msg_id, attachment_id), out)
+        return out.getvalue(), digest, size
+
+    def _attachment_chunks(self, msg_id: str, attachment_id: str) -> Iterator[bytes]:
+        # replay/record backends (app.adapters.google_replay) serve the raw response themselves
+        serve = getattr(self.service, "attachment_chunks", None)
+        if serve is not None:
+            return serve(msg_id, attachment_id)
+        return stream_attachment(self.creds, msg_id, attachment_id)
+
+
+def _get_client() -> GmailClient:
+    if _service_factory is not None:
+        return GmailClient(service=_service_factory())
+    return GmailClient(get_credentials(SCOPES))
+
+
+def stream_attachment(creds: Credentials, msg_id: str, attachment_id: str) -> Iterator[bytes]:
+    """Raw attachments.get response body (JSON with base64url data), in chunks."""
+    from google.auth.transport.requests import AuthorizedSession
+
+    url = f"{_GMAIL_API}/users/me/messages/{msg_id}/attachments/{attachment_id}"
+    with AuthorizedSession(creds) as session:
+        resp = session.get(url, params={"fields": "data"}, stream=True, timeout=60)
+        resp.raise_for_status()
+        yield from resp.iter_content(_DOWNLOAD_CHUNK)
+
+
+def decode_data_field(chunks: Iterable[bytes], out) -> tuple[str, int]:
+    """Decode the base64url `"data"` string of a streamed JSON response into `out`.
+
+    Only a few bytes of base64 are carried between chunks, so memory does not
+    depend on the attachment size. Returns (sha256 hex of the decoded bytes, size).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    it: Iterator[bytes] = iter(chunks)
+    head = b""
+    for chunk in it:
+        head += chunk
+        match = _DATA_FIELD.search(head)
+        if match:
+            pending = head[match.end():]
+            break
+        # keep enough of the tail to match a "data" key split across chunks
+        head = head[-32:]
+    else:
+        raise RuntimeError("attachment response has no data field")
+
+    carry = b""
+    while True:
+        end = pending.find(b'"')
+        text = carry + (pending if end < 0 else pending[:end])
+        if end >= 0:
+            # Gmail may drop the padding; the closing quote ends the last quantum
+            text += b"=" * (-len(text) % 4)
+            cut = len(text)
+        else:
+            cut = len(text) - len(text) % 4
+        if cut:
+            data = base64.urlsafe_b64decode(text[:cut])
+            digest.update(data)
+            out.write(data)
+            size += len(data)
+        if end >= 0:
+            # read the closing "}" too, so the stream finishes (connection reuse, recorders)
+            for _ in it:
+                pass
+            return digest.hexdigest(), size
+        carry = text[cut:]
+        pending = next(it, None)
+        if pending is None:
+            raise RuntimeError("attachment response ended inside the data field")
 
 
 def _iter_attachments(payload: dict) -> Iterable[tuple[str, str]]:
@@ -64,20 +289,119 @@ def _iter_attachments(payload: dict) -> Iterable[tuple[str, str]]:
                 yield n_filename, n_attach
 
 
-def find_latest_attachment(query: str) -> Attachment | None:
-    creds = get_credentials(SCOPES)
-    client = GmailClient(creds)
+def _new_message_ids(client: GmailClient, query: str, cursor: GmailCursor, backlog: bool = False) -> list[str]:
+    """Unprocessed messages matching `query`, newest first; one history call when nothing changed.
+
+    `backlog` pages through every match instead of the newest 10 and ignores
+    history: a latest-mode run moves the history cursor past older messages it
+    never handled, so only the cursor's processed IDs decide what is left.
+    """
+    if backlog:
+        cursor.advance(client.get_profile_history_id())
+        return [m["id"] for m in client.list_all_messages(query) if m["id"] not in cursor]
+
+    if cursor.history_id:
+        changes = client.list_added_since(cursor.history_id)
+        if changes is not None:
+            added, latest = changes
+            cursor.advance(latest)
+            if not added:
+                return []
+            return [
+                m["id"] for m in client.list_messages(query) if m["id"] in added and m["id"] not in cursor
+            ]
+    # first run or expired history: fall back to the query, remembering where the mailbox is
+    cursor.advance(client.get_profile_history_id())
+    return [m["id"] for m in client.list_messages(query) if m["id"] not in cursor]
 
-    messages = list(client.list_messages(query))
-    if not messages:
-        return None
 
-    # Gmail list returns most recent first by default
-    msg = client.get_message(messages[0]["id"])
-    payload = msg.get("payload", {})
+def find_latest_attachment(
+    query: str,
+    cursor: GmailCursor | None = None,
+    download_dir: Path | None = None,
+    in_memory: bool = False,
+) -> Attachment | None:
+    """Newest export attachment; with a cursor, only from messages not handled before.
 
-    for filename, attachment_id in _iter_attachments(payload):
-        data = client.get_attachment(msg["id"], attachment_id)
-        return Attachment(name=filename, data=data)
+    The body is streamed to a temp file in `download_dir` (system temp by default);
+    the caller moves or deletes it. With `in_memory` it is decoded into
+    `Attachment.data` instead and nothing is written.
+    """
+    client = _get_client()
+
+    if cursor is None:
+        # Gmail list returns most recent first by default
+        message_ids = [m["id"] for m in list(client.list_messages(query))[:1]]
+    else:
+        message_ids = _new_message_ids(client, query, cursor)
+
+    for msg_id in message_ids:
+        msg = client.get_message(msg_id)
+        for filename, attachment_id in _iter_attachments(msg.get("payload", {})):
+            if in_memory:
+                data, digest, size = client.read_attachment(msg["id"], attachment_id)
+                return Attachment(
+                    name=filename, path=None, sha256=digest, size=size, message_id=msg["id"], data=data
+                )
+            path, digest, size = client.download_attachment(
+                msg["id"], attachment_id, download_dir or Path(tempfile.gettempdir())
+            )
+            return Attachment(name=filename, path=path, sha256=digest, size=size, message_id=msg["id"])
+        if cursor is not None:
+            # no attachment: nothing to retry later
+            cursor.mark_processed(msg_id)
 
     return None
+
+
+_EXPORT_SUFFIXES = (".zip", ".xlsx")
+
+
+def find_unprocessed_attachments(
+    query: str,
+    cursor: GmailCursor,
+    max_workers: int = 4,
+    download_dir: Path | None = None,
+    in_memory: bool = False,
+) -> list[Attachment]:
+    """Every export attachment of every unprocessed message, oldest message first.
+
+    Message metadata is read serially through the discovery client; attachment
+    bodies are streamed to temp files in `download_dir` (or into memory with
+    `in_memory`) on a bounded thread pool (each download opens its own HTTP session).
+    """
+    client = _get_client()
+
+    jobs: list[tuple[int, str, str, str]] = []
+    for msg_id in _new_message_ids(client, query, cursor, backlog=True):
+        msg = client.get_message(msg_id)
+        received = int(msg.get("internalDate", 0))
+        found = [
+            (received, msg_id, filename, attachment_id)
+            for filename, attachment_id in _iter_attachments(msg.get("payload", {}))
+            if filename.lower().endswith(_EXPORT_SUFFIXES)
+        ]
+        if not found:
+            cursor.mark_processed(msg_id)
+        jobs += found
+    jobs.sort(key=lambda job: job[0])
+    if not jobs:
+        return []
+
+    directory = download_dir or Path(tempfile.gettempdir())
+
+    def download(job: tuple[int, str, str, str]) -> Attachment:
+        received, msg_id, filename, attachment_id = job
+        if in_memory:
+            data, digest, size = client.read_attachment(msg_id, attachment_id)
+            return Attachment(
+                name=filename, path=None, sha256=digest, size=size, message_id=msg_id, received_at=received,
+                data=data,
+            )
+        path, digest, size = client.download_attachment(msg_id, attachment_id, directory)
+        return Attachment(
+            name=filename, path=path, sha256=digest, size=size, message_id=msg_id, received_at=received
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        return list(pool.map(download, jobs))
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pathlib import Path
 import os
+import sys
+import threading
 
 from google.auth.exceptions import RefreshError
 from google.auth.transport.requests import Request
@@ -9,26 +11,116 @@ from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 
 
-def get_credentials(scopes: list[str]) -> Credentials:
-    token_path = Path(os.environ.get("GOOGLE_TOKEN_PATH", "./data/google_token.json"))
+# 하위 시스템별 OAuth 범위. 토큰은 항상 전체 묶음(ALL_SCOPES)으로 발급받아
+# Gmail/Drive/Sheets/Calendar와 스크립트가 같은 토큰 하나를 공유한다.
+SCOPES_BY_SERVICE: dict[str, list[str]] = {
+    "gmail": ["https://www.googleapis.com/auth/gmail.readonly"],
+    "drive": ["https://www.googleapis.com/auth/drive"],
+    "sheets": ["https://www.googleapis.com/auth/spreadsheets"],
+    "calendar": ["https://www.googleapis.com/auth/calendar"],
+}
+ALL_SCOPES = sorted({scope for scopes in SCOPES_BY_SERVICE.values() for scope in scopes})
+
+
+def scopes_for(*services: str) -> list[str]:
+    """Scopes a caller needs, by SCOPES_BY_SERVICE name (e.g. scopes_for("sheets", "drive"))."""
+    return sorted({scope for name in services for scope in SCOPES_BY_SERVICE[name]})
+
+
+def _bundle(scopes: list[str] | None) -> list[str]:
+    # a .readonly scope is implied by its full counterpart; anything else unknown widens the bundle
+    extra = {
+        scope for scope in scopes or []
+        if scope not in ALL_SCOPES and scope.removesuffix(".readonly") not in ALL_SCOPES
+    }
+    return sorted(set(ALL_SCOPES) | extra)
+
+
+# (token file, scope set) -> credentials already loaded in this process
+_cache: dict[tuple[str, frozenset[str]], Credentials] = {}
+# one refresh/login at a time; the others wait and take the refreshed token
+_lock = threading.Lock()
+
+
+def _token_path() -> Path:
+    return Path(os.environ.get("GOOGLE_TOKEN_PATH", "./data/google_token.json")).resolve()
+
+
+def _interactive() -> bool:
+    # GOOGLE_AUTH_INTERACTIVE=1/0 overrides; by default only a terminal may open the browser login
+    flag = os.environ.get("GOOGLE_AUTH_INTERACTIVE", "").strip()
+    if flag:
+        return flag == "1"
+    return sys.stdin.isatty()
+
+
+def _write_token(token_path: Path, creds: Credentials) -> None:
+    # readers (other threads, a second cron process) never see a half-written token
+    token_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = token_path.with_suffix(token_path.suffix + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(creds.to_json())
+    os.replace(tmp, token_path)
+
+
+def get_credentials(scopes: list[str] | None = None) -> Credentials:
+    """Credentials covering `scopes`, cached per scope set for the life of the process.
+
+    Every caller is served the one superset token (ALL_SCOPES), so tools run
+    back to back never log in again for a different subset; `scopes` only
+    documents what the caller uses. A valid cached token is returned without
+    touching disk. Expired tokens are refreshed by one caller under a lock
+    (single flight); the token file is re-read first in case another process
+    already refreshed it, and written atomically afterwards.
+    """
+    scopes = _bundle(scopes)
+    token_path = _token_path()
+    key = (str(token_path), frozenset(scopes))
+    creds = _cache.get(key)
+    if creds is not None and creds.valid:
+        return creds
+
+    with _lock:
+        creds = _cache.get(key)
+        if creds is not None and creds.valid:
+            # refreshed by the thread that held the lock
+            return creds
+        creds = _load_credentials(token_path, scopes)
+        _cache[key] = creds
+        return creds
+
+
+def _load_credentials(token_path: Path, scopes: list[str]) -> Credentials:
     creds = None
 
     if token_path.exists():
-        creds = Credentials.from_authorized_user_file(str(token_path), scopes)
+        # the scopes recorded in the file, so a token granted for fewer scopes is noticed
+        creds = Credentials.from_authorized_user_file(str(token_path))
 
     needs_login = not creds or not creds.valid or not creds.has_scopes(scopes)
 
-    if creds and creds.expired and creds.refresh_token:
+    if creds and creds.expired and creds.refresh_token and creds.has_scopes(scopes):
         try:
             creds.refresh(Request())
-            token_path.parent.mkdir(parents=True, exist_ok=True)
-            token_path.write_text(creds.to_json(), encoding="utf-8")
+            _write_token(token_path, creds)
             needs_login = False
         except RefreshError:
             creds = None
             needs_login = True
 
     if needs_login:
+        if not _interactive():
+            # cron has no browser: run_local_server would wait forever
+            if creds is not None and not creds.has_scopes(scopes):
+                missing = sorted(set(scopes) - set(creds.scopes or []))
+                reason = f"token lacks scopes {', '.join(missing)}"
+            else:
+                reason = "no usable token"
+            raise RuntimeError(
+                f"Google re-authorization needed ({reason}, {token_path}); "
+                "run `python3 -m app.adapters.google_auth` in a terminal"
+            )
         client_id = os.environ.get("GOOGLE_CLIENT_ID", "").strip()
         client_secret = os.environ.get("GOOGLE_CLIENT_SECRET", "").strip()
         if not client_id or not client_secret:
@@ -45,7 +137,12 @@ def get_credentials(scopes: list[str]) -> Credentials:
         }
         flow = InstalledAppFlow.from_client_config(config, scopes)
         creds = flow.run_local_server(port=0)
-        token_path.parent.mkdir(parents=True, exist_ok=True)
-        token_path.write_text(creds.to_json(), encoding="utf-8")
+        _write_token(token_path, creds)
 
     return creds
+
+
+if __name__ == "__main__":
+    # 터미널에서 전체 범위 토큰을 (재)발급
+    get_credentials()
+    print(f"토큰 저장: {_token_path()}")
@@ -0,0 +1,525 @@
+"""Offline Gmail/Drive backends for the ingest stage: replay fixtures or record them.
+
+GOOGLE_BACKEND=replay serves Gmail from recorded fixtures and keeps Drive in a
+local folder; GOOGLE_BACKEND=record talks to the real Gmail API and saves every
+message and attachment the pipeline reads as fixtures (Drive stays live). Like
+SheetsEmulator, both count calls and bytes and can add a fixed latency per call.
+
+REPLAY_DIR 구조:
+  gmail/messages/<id>.json          messages.get 응답 (_MESSAGE_FIELDS 범위)
+  gmail/attachments/<key>.json      attachments.get 응답 본문 ({"data": base64url}), 청크로 재생
+  drive/files.json                  폴더/파일 메타데이터 (id → name, parents, md5Checksum, ...)
+  drive/blobs/<id>                  업로드된 파일 내용
+
+사용법:
+  GOOGLE_BACKEND=record python -m app.main --backlog   # 실제 메일함의 내보내기 메일을 fixture로 기록
+  GOOGLE_BACKEND=replay python -m app.main             # Gmail/Drive 없이 재생
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from app.config import AppConfig
+
+_CHUNK = 256 * 1024
+
+
+def _http_error(status: int, message: str = "") -> HttpError:
+    # the adapters check HttpError statuses (404 history, missing folders), so raise the real type
+    resp = httplib2.Response({"status": status})
+    resp.reason = message
+    return HttpError(resp, message.encode("utf-8"))
+
+
+def _attachment_key(msg_id: str, attachment_id: str) -> str:
+    # attachment IDs are several hundred characters, too long for a file name
+    return f"{msg_id}_{hashlib.sha1(attachment_id.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _write_json(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+@dataclass
+class ReplayStats:
+    calls: Counter = field(default_factory=Counter)
+    bytes_received: int = 0
+    bytes_sent: int = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.total_calls,
+            "by_method": dict(sorted(self.calls.items())),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+class _Backend:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.stats = ReplayStats()
+        self._lock = threading.RLock()
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.stats = ReplayStats()
+
+    def _call(self, method: str, fn: Callable[[], Any], sent: int = 0) -> Any:
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.stats.calls[method] += 1
+            self.stats.bytes_sent += sent
+            result = fn()
+            self.stats.bytes_received += len(json.dumps(result, ensure_ascii=False, default=str).encode("utf-8"))
+            return result
+
+
+class _Request:
+    def __init__(self, backend: _Backend, method: str, fn: Callable[[], Any]):
+        self._backend = backend
+        self._method = method
+        self._fn = fn
+
+    def execute(self, http=None, num_retries: int = 0):
+        return self._backend._call(self._method, self._fn)
+
+
+# ── Gmail ────────────────────────────────────────────────
+
+
+class GmailReplay(_Backend):
+    """Gmail v1 stand-in over recorded messages.
+
+    Messages are listed newest first by internalDate and the mailbox historyId is
+    the largest recorded one; history.list reports messages recorded with a
+    larger historyId. Fixture files added while running are picked up by the
+    next list/history call, so a simulation can let exports arrive between ticks.
+    """
+
+    def __init__(self, root: Path, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.root = root
+        self.messages: dict[str, dict] = {}
+        self.reload()
+
+    def reload(self) -> None:
+        for path in sorted((self.root / "messages").glob("*.json")):
+            if path.stem not in self.messages:
+                msg = json.loads(path.read_text(encoding="utf-8"))
+                self.messages[msg["id"]] = msg
+
+    def users(self) -> "_GmailUsers":
+        return _GmailUsers(self)
+
+    def visible(self) -> list[dict]:
+        self.reload()
+        return sorted(self.messages.values(), key=lambda m: int(m.get("internalDate", 0)), reverse=True)
+
+    def history_id(self) -> str:
+        return str(max((int(m.get("historyId", 0)) for m in self.visible()), default=1))
+
+    def attachment_chunks(self, msg_id: str, attachment_id: str) -> Iterator[bytes]:
+        path = self.root / "attachments" / f"{_attachment_key(msg_id, attachment_id)}.json"
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.stats.calls["attachments.get"] += 1
+        if not path.exists():
+            raise _http_error(404, f"no recorded attachment for message {msg_id}")
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                with self._lock:
+                    self.stats.bytes_received += len(chunk)
+                yield chunk
+
+
+def write_message_fixture(
+    root: Path,
+    msg_id: str,
+    internal_date: int,
+    history_id: int,
+    attachments: dict[str, bytes],
+) -> None:
+    """Add a message with `attachments` (file name -> bytes) to a gmail/ fixture directory."""
+    import base64
+
+    parts = []
+    for i, (name, data) in enumerate(attachments.items()):
+        attachment_id = f"{msg_id}-att{i}"
+        parts.append({"filename": name, "body": {"attachmentId": attachment_id}})
+        path = root / "attachments" / f"{_attachment_key(msg_id, attachment_id)}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b'{\n  "data": "' + base64.urlsafe_b64encode(data) + b'"\n}\n')
+    message = {
+        "id": msg_id,
+        "historyId": str(history_id),
+        "internalDate": str(internal_date),
+        "payload": {"filename": "", "parts": [{"filename": "", "parts": []}, *parts]},
+    }
+    _write_json(root / "messages" / f"{msg_id}.json", message)
+
+
+class _GmailUsers:
+    def __init__(self, gmail: GmailReplay):
+        self._gmail = gmail
+
+    def messages(self) -> "_GmailMessages":
+        return _GmailMessages(self._gmail)
+
+    def history(self) -> "_GmailHistory":
+        return _GmailHistory(self._gmail)
+
+    def getProfile(self, userId: str = "me", **_: Any) -> _Request:
+        return _Request(self._gmail, "getProfile", lambda: {"historyId": self._gmail.history_id()})
+
+
+class _GmailMessages:
+    def __init__(self, gmail: GmailReplay):
+        self._gmail = gmail
+
+    def list(self, userId: str = "me", q: str | None = None, maxResults: int = 100,
+             pageToken: str | None = None, **_: Any) -> _Request:
+        def run():
+            # recorded messages all matched the recorded query, so `q` is not evaluated
+            start = int(pageToken or 0)
+            msgs = self._gmail.visible()
+            page = msgs[start:start + maxResults]
+            resp: dict = {"messages": [{"id": m["id"], "threadId": m.get("threadId", m["id"])} for m in page]}
+            if start + maxResults < len(msgs):
+                resp["nextPageToken"] = str(start + maxResults)
+            return resp
+
+        return _Request(self._gmail, "messages.list", run)
+
+    def get(self, userId: str = "me", id: str = "", **_: Any) -> _Request:
+        def run():
+            if id not in self._gmail.messages:
+                raise _http_error(404, f"no recorded message {id}")
+            return self._gmail.messages[id]
+
+        return _Request(self._gmail, "messages.get", run)
+
+
+class _GmailHistory:
+    def __init__(self, gmail: GmailReplay):
+        self._gmail = gmail
+
+    def list(self, userId: str = "me", startHistoryId: str = "0", **_: Any) -> _Request:
+        def run():
+            start = int(startHistoryId)
+            added = [m for m in self._gmail.visible() if int(m.get("historyId", 0)) > start]
+            return {
+                "historyId": self._gmail.history_id(),
+                "history": [
+                    {"id": m.get("historyId"), "messagesAdded": [{"message": {"id": m["id"]}}]}
+                    for m in reversed(added)
+                ],
+            }
+
+        return _Request(self._gmail, "history.list", run)
+
+
+class GmailRecorder(_Backend):
+    """Pass-through to the live Gmail service that saves what GmailReplay needs.
+
+    Every call is counted; messages.get responses and attachment bodies are
+    written under `root` as they are read.
+    """
+
+    def __init__(self, root: Path, service, creds):
+        super().__init__()
+        self.root = root
+        self._service = service
+        self._creds = creds
+
+    def users(self) -> "_Recording":
+        return _Recording(self, self._service.users(), "")
+
+    def _save_message(self, msg: dict) -> None:
+        _write_json(self.root / "messages" / f"{msg['id']}.json", msg)
+
+    def attachment_chunks(self, msg_id: str, attachment_id: str) -> Iterator[bytes]:
+        from app.adapters.gmail import stream_attachment
+
+        path = self.root / "attachments" / f"{_attachment_key(msg_id, attachment_id)}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".part")
+        with self._lock:
+            self.stats.calls["attachments.get"] += 1
+        with tmp.open("wb") as f:
+            for chunk in stream_attachment(self._creds, msg_id, attachment_id):
+                f.write(chunk)
+                with self._lock:
+                    self.stats.bytes_received += len(chunk)
+                yield chunk
+        os.replace(tmp, path)
+
+
+class _Recording:
+    """Wraps a discovery resource: sub-resources stay wrapped, requests are counted."""
+
+    def __init__(self, recorder: GmailRecorder, resource, prefix: str):
+        self._recorder = recorder
+        self._resource = resource
+        self._prefix = prefix
+
+    def __getattr__(self, name: str):
+        method = getattr(self._resource, name)
+        qualified = f"{self._prefix}{name}"
+
+        def call(*args, **kwargs):
+            result = method(*args, **kwargs)
+            if hasattr(result, "execute"):
+                return _RecordedRequest(self._recorder, qualified, result)
+            return _Recording(self._recorder, result, f"{qualified}.")
+
+        return call
+
+
+class _RecordedRequest:
+    def __init__(self, recorder: GmailRecorder, method: str, request):
+        self._recorder = recorder
+        self._method = method
+        self._request = request
+
+    def execute(self, *args, **kwargs):
+        result = self._recorder._call(self._method, lambda: self._request.execute(*args, **kwargs))
+        if self._method == "messages.get":
+            self._recorder._save_message(result)
+        return result
+
+
+# ── Drive ────────────────────────────────────────────────
+
+_FOLDER_MIME = "application/vnd.google-apps.folder"
+_Q_NAME = re.compile(r"name = '((?:[^'\\]|\\.)*)'")
+_Q_PARENT = re.compile(r"'([^']*)' in parents")
+_Q_MIME = re.compile(r"mimeType = '([^']*)'")
+
+
+class DriveReplay(_Backend):
+    """Drive v3 stand-in keeping files in a local folder (files.json + blobs/).
+
+    Covers what app.adapters.drive uses: files.list on its own queries,
+    files.get, folder creation and chunked resumable create/update. Upload
+    sessions live in uploads/ so an interrupted upload resumes across processes.
+    """
+
+    def __init__(self, root: Path, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.root = root
+        self._meta_path = root / "files.json"
+        self.entries: dict[str, dict] = {}
+        if self._meta_path.exists():
+            self.entries = json.loads(self._meta_path.read_text(encoding="utf-8"))
+
+    def files(self) -> "_DriveFiles":
+        return _DriveFiles(self)
+
+    def blob(self, file_id: str) -> Path:
+        return self.root / "blobs" / file_id
+
+    def _save(self) -> None:
+        _write_json(self._meta_path, self.entries)
+
+    def _new_id(self) -> str:
+        return uuid.uuid4().hex[:20]
+
+    def _finish_upload(self, part: Path, name: str, parents: list[str], file_id: str | None) -> dict:
+        digest = hashlib.md5()
+        with part.open("rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                digest.update(chunk)
+        with self._lock:
+            if file_id is None:
+                file_id = self._new_id()
+                self.entries[file_id] = {"name": name, "parents": parents, "mimeType": "", "trashed": False}
+            info = self.entries[file_id]
+            info["md5Checksum"] = digest.hexdigest()
+            info["size"] = part.stat().st_size
+            info["revisions"] = info.get("revisions", 0) + 1
+            self.blob(file_id).parent.mkdir(parents=True, exist_ok=True)
+            os.replace(part, self.blob(file_id))
+            self._save()
+        return {"id": file_id}
+
+
+class _DriveFiles:
+    def __init__(self, drive: DriveReplay):
+        self._drive = drive
+
+    def list(self, q: str = "", fields: str | None = None, **_: Any) -> _Request:
+        def run():
+            name = _Q_NAME.search(q)
+            parent = _Q_PARENT.search(q)
+            mime = _Q_MIME.search(q)
+            found = []
+            for file_id, info in self._drive.entries.items():
+                if name and info["name"] != re.sub(r"\\(.)", r"\1", name.group(1)):
+                    continue
+                if parent and parent.group(1) not in info["parents"]:
+                    continue
+                if mime and info["mimeType"] != mime.group(1):
+                    continue
+                if "trashed = false" in q and info.get("trashed"):
+                    continue
+                entry = {"id": file_id, "name": info["name"]}
+                if "md5Checksum" in info:
+                    entry["md5Checksum"] = info["md5Checksum"]
+                found.append(entry)
+            return {"files": found}
+
+        return _Request(self._drive, "files.list", run)
+
+    def get(self, fileId: str, fields: str | None = None, **_: Any) -> _Request:
+        def run():
+            info = self._drive.entries.get(fileId)
+            if info is None:
+                raise _http_error(404, f"File not found: {fileId}")
+            return {"id": fileId, **{k: v for k, v in info.items() if k != "revisions"}}
+
+        return _Request(self._drive, "files.get", run)
+
+    def create(self, body: dict, media_body=None, fields: str | None = None, **_: Any):
+        if media_body is not None:
+            parents = body.get("parents", ["root"])
+            return _UploadRequest(self._drive, "files.create", media_body, body["name"], parents)
+
+        def run():
+            with self._drive._lock:
+                file_id = self._drive._new_id()
+                self._drive.entries[file_id] = {
+                    "name": body["name"],
+                    "parents": body.get("parents", ["root"]),
+                    "mimeType": body.get("mimeType", ""),
+                    "trashed": False,
+                }
+                self._drive._save()
+            return {"id": file_id}
+
+        return _Request(self._drive, "files.create", run)
+
+    def update(self, fileId: str, media_body=None, fields: str | None = None, **_: Any):
+        info = self._drive.entries.get(fileId)
+        if info is None:
+            raise _http_error(404, f"File not found: {fileId}")
+        return _UploadRequest(self._drive, "files.update", media_body, info["name"], info["parents"], fileId)
+
+
+class _UploadStatusHttp:
+    """`request.http` of a replayed upload; only the session status query goes through it."""
+
+    def __init__(self, upload: "_UploadRequest"):
+        self._upload = upload
+
+    def request(self, uri: str, method: str = "GET", body=None, headers: dict | None = None, **_: Any):
+        if method != "PUT" or not (headers or {}).get("Content-Range", "").startswith("bytes */"):
+            raise NotImplementedError(f"replay upload http: {method} {uri}")
+        return self._upload.status()
+
+
+class _UploadRequest:
+    """Resumable media request with the googleapiclient attributes app.adapters.drive touches."""
+
+    def __init__(self, drive: DriveReplay, method: str, media, name: str, parents: list[str],
+                 file_id: str | None = None):
+        self._drive = drive
+        self._method = method
+        self._media = media
+        self._name = name
+        self._parents = parents
+        self._file_id = file_id
+        self.resumable_uri: str | None = None
+        self.resumable_progress = 0
+        self.http = _UploadStatusHttp(self)
+
+    def _part(self) -> Path:
+        return self._drive.root / "uploads" / f"{self.resumable_uri.rsplit('/', 1)[1]}.part"
+
+    def status(self) -> tuple[httplib2.Response, bytes]:
+        """Answer a `Content-Range: bytes */N` query: 308 with the received range."""
+        part = self._part()
+        if not part.exists():
+            raise _http_error(404, "upload session expired")
+        received = self._drive._call(f"{self._method}.status", lambda: part.stat().st_size)
+        resp = httplib2.Response({"status": 308})
+        if received:
+            resp["range"] = f"bytes=0-{received - 1}"
+        return resp, b""
+
+    def next_chunk(self, http=None, num_retries: int = 0):
+        from googleapiclient.http import MediaUploadProgress
+
+        drive = self._drive
+        if self.resumable_uri is None:
+            missing = [p for p in self._parents if p != "root" and p not in drive.entries]
+            if self._file_id is None and missing:
+                raise _http_error(404, f"File not found: {missing[0]}")
+            self.resumable_uri = f"replay://upload/{uuid.uuid4().hex}"
+            drive._call(f"{self._method}.start", lambda: {})
+            self._part().parent.mkdir(parents=True, exist_ok=True)
+            self._part().write_bytes(b"")
+        total = self._media.size()
+        data = self._media.getbytes(self.resumable_progress, self._media.chunksize())
+        with self._part().open("ab") as f:
+            f.write(data)
+        drive._call(f"{self._method}.chunk", lambda: {}, sent=len(data))
+        self.resumable_progress += len(data)
+        if self.resumable_progress < total:
+            return MediaUploadProgress(self.resumable_progress, total), None
+        return None, drive._finish_upload(self._part(), self._name, self._parents, self._file_id)
+
+
+# ── 설정 연결 ─────────────────────────────────────────────
+
+
+def install(cfg: AppConfig) -> list[_Backend]:
+    """Point the Gmail and Drive adapters at the backend GOOGLE_BACKEND selects.
+
+    Returns the installed backends (for their stats); "live" installs nothing.
+    """
+    from app.adapters import drive, gmail
+
+    if cfg.google_backend == "live":
+        gmail.set_service_factory(None)
+        drive.set_service_factory(None)
+        return []
+    if cfg.google_backend == "replay":
+        gmail_backend = GmailReplay(cfg.replay_dir / "gmail", cfg.replay_latency_ms)
+        drive_backend = DriveReplay(cfg.replay_dir / "drive", cfg.replay_latency_ms)
+        gmail.set_service_factory(lambda: gmail_backend)
+        drive.set_service_factory(lambda: drive_backend)
+        return [gmail_backend, drive_backend]
+    if cfg.google_backend == "record":
+        from googleapiclient.discovery import build
+
+        from app.adapters.google_auth import get_credentials
+
+        creds = get_credentials(gmail.SCOPES)
+        recorder = GmailRecorder(cfg.replay_dir / "gmail", build("gmail", "v1", credentials=creds), creds)
+        gmail.set_service_factory(lambda: recorder)
+        drive.set_service_factory(None)
+        return [recorder]
+    raise RuntimeError(f"Unknown GOOGLE_BACKEND: {cfg.google_backend} (live, replay, record)")
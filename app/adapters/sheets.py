@@ -1,17 +1,17 @@
 from __future__ import annotations
 
-from typing import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time, timedelta
+from typing import Any, Callable, Iterable, Sequence, TypeVar
+import os
+import re
+import threading
 
-from googleapiclient.discovery import build
+from app.adapters.google_auth import get_credentials, scopes_for
+from app.utils.dates import parse_date, parse_time
+from app.utils.hash import KeySet, key_part, row_key
 
-from app.adapters.google_auth import get_credentials
-from app.utils.hash import row_key
-
-SCOPES = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive",
-    "https://www.googleapis.com/auth/gmail.readonly",
-]
+SCOPES = scopes_for("sheets")
 
 
 def _col_letter(n: int) -> str:
@@ -23,18 +23,98 @@ def _col_letter(n: int) -> str:
     return result
 
 
-def _get_service():
-    creds = get_credentials(SCOPES)
+_service_factory: Callable[[], object] | None = None
+
+
+def set_service_factory(factory: Callable[[], object] | None) -> None:
+    """Route every Sheets call through `factory` (e.g. SheetsEmulator); None restores the real API."""
+    global _service_factory
+    _service_factory = factory
+
+
+def get_service(scopes: list[str] | None = None):
+    """Sheets service for `scopes` (default SCOPES), or the factory's when one is set."""
+    if _service_factory is not None:
+        return _service_factory()
+    from googleapiclient.discovery import build
+
+    creds = get_credentials(scopes or SCOPES)
     return build("sheets", "v4", credentials=creds)
 
 
-def _get_sheet_id(service, spreadsheet_id: str, sheet_name: str) -> int:
+T = TypeVar("T")
+_local = threading.local()
+
+
+def _thread_service(scopes: list[str] | None = None):
+    # googleapiclient/httplib2 objects are not thread-safe: one service (and connection) per pool
+    # thread, rebuilt when set_service_factory() or the scopes changed since it was made
+    key = (_service_factory, tuple(scopes or ()))
+    cached = getattr(_local, "service", None)
+    if cached is None or cached[0] != key:
+        cached = _local.service = (key, get_service(scopes))
+    return cached[1]
+
+
+def run_concurrent(
+    tasks: Sequence[Callable[[Any], T]],
+    max_workers: int | None = None,
+    return_exceptions: bool = False,
+    scopes: list[str] | None = None,
+) -> list:
+    """Run independent read tasks on a small thread pool; results come back in task order.
+
+    Each task receives its worker thread's own Sheets service. With
+    return_exceptions=True a failing task yields its exception instead of raising.
+    SHEETS_MAX_WORKERS sets the default pool size.
+    """
+    if not tasks:
+        return []
+    workers = max_workers or int(os.environ.get("SHEETS_MAX_WORKERS", "4"))
+    workers = max(1, min(workers, len(tasks)))
+
+    def _run(task: Callable[[Any], T], service=None):
+        try:
+            return task(service or _thread_service(scopes))
+        except Exception as e:
+            if return_exceptions:
+                return e
+            raise
+
+    if workers == 1:
+        # caller's thread: a fresh service, nothing cached past this call
+        service = get_service(scopes)
+        return [_run(task, service) for task in tasks]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sheets") as pool:
+        return list(pool.map(_run, tasks))
+
+
+def _get_sheet_ids(service, spreadsheet_id: str) -> dict[str, int]:
     resp = service.spreadsheets().get(spreadsheetId=spreadsheet_id, fields="sheets(properties(sheetId,title))").execute()
+    return {
+        sheet["properties"]["title"]: int(sheet["properties"]["sheetId"])
+        for sheet in resp.get("sheets", [])
+    }
+
+
+def _get_sheet_grid(service, spreadsheet_id: str) -> dict[str, tuple[int, int]]:
+    # title → (sheetId, rowCount) in one spreadsheets.get
+    resp = service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields="sheets(properties(sheetId,title,gridProperties(rowCount)))",
+    ).execute()
+    grid = {}
     for sheet in resp.get("sheets", []):
-        props = sheet.get("properties", {})
-        if props.get("title") == sheet_name:
-            return int(props.get("sheetId"))
-    raise RuntimeError(f"Sheet not found: {sheet_name}")
+        props = sheet["properties"]
+        grid[props["title"]] = (int(props["sheetId"]), int(props.get("gridProperties", {}).get("rowCount", 0)))
+    return grid
+
+
+def _get_sheet_id(service, spreadsheet_id: str, sheet_name: str) -> int:
+    sheet_id = _get_sheet_ids(service, spreadsheet_id).get(sheet_name)
+    if sheet_id is None:
+        raise RuntimeError(f"Sheet not found: {sheet_name}")
+    return sheet_id
 
 
 def _get_headers(service, spreadsheet_id: str, sheet_name: str, header_row: int) -> list[str]:
@@ -44,15 +124,208 @@ def _get_headers(service, spreadsheet_id: str, sheet_name: str, header_row: int)
     return [v.strip() for v in values[0] if v is not None]
 
 
+class SheetWriteBuffer:
+    """Per-run buffer of Sheets mutations, flushed in as few calls as possible.
+
+    Stages queue structural requests (row inserts), value ranges and formatting
+    (validation) instead of executing them. `commit()` sends them in that order:
+    one batchUpdate, one values.batchUpdate with adjacent ranges merged, and one
+    batchUpdate for formatting. Nothing reaches the sheet if a stage fails first.
+    """
+
+    def __init__(self, spreadsheet_id: str):
+        self.spreadsheet_id = spreadsheet_id
+        self._structure: list[dict] = []
+        self._values: list[_ValueBlock] = []
+        self._formats: list[dict] = []
+        self._sheet_ids: dict[str, int] = {}
+        self._row_counts: dict[str, int] = {}
+        self._on_commit: list[Callable[[], None]] = []
+
+    @property
+    def pending(self) -> bool:
+        return bool(self._structure or self._values or self._formats)
+
+    def sheet_ids(self, service) -> dict[str, int]:
+        if not self._sheet_ids:
+            grid = _get_sheet_grid(service, self.spreadsheet_id)
+            self._sheet_ids = {title: sheet_id for title, (sheet_id, _) in grid.items()}
+            self._row_counts = {title: rows for title, (_, rows) in grid.items()}
+        return self._sheet_ids
+
+    def row_count(self, service, sheet_name: str) -> int:
+        """Grid rows of `sheet_name`, including rows queued by `append_rows`."""
+        self.sheet_id(service, sheet_name)
+        return self._row_counts.get(sheet_name, 0)
+
+    def grow_rows(self, service, sheet_name: str, last_row: int) -> None:
+        """Queue an appendDimension so the grid reaches `last_row` (1-based)."""
+        row_count = self.row_count(service, sheet_name)
+        if last_row <= row_count:
+            return
+        self.add_structure({
+            "appendDimension": {
+                "sheetId": self.sheet_id(service, sheet_name),
+                "dimension": "ROWS",
+                "length": last_row - row_count,
+            }
+        })
+        self._row_counts[sheet_name] = last_row
+
+    def sheet_id(self, service, sheet_name: str) -> int:
+        sheet_id = self.sheet_ids(service).get(sheet_name)
+        if sheet_id is None:
+            raise RuntimeError(f"Sheet not found: {sheet_name}")
+        return sheet_id
+
+    def add_structure(self, request: dict) -> None:
+        self._structure.append(request)
+
+    def add_values(self, sheet_name: str, start_row: int, start_col: int, values: list[list]) -> None:
+        # start_row is 1-based, start_col 0-based
+        if values:
+            self._values.append(_ValueBlock(sheet_name, start_row, start_col, [list(r) for r in values]))
+
+    def add_format(self, request: dict) -> None:
+        self._formats.append(request)
+
+    def on_commit(self, callback: Callable[[], None]) -> None:
+        """Run `callback` once the queued writes have reached the sheet."""
+        self._on_commit.append(callback)
+
+    def commit(self) -> None:
+        if self.pending:
+            self._flush()
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            callback()
+
+    def _flush(self) -> None:
+        service = get_service()
+        if self._structure:
+            service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id, body={"requests": self._structure}
+            ).execute()
+        if self._values:
+            data = [{"range": b.a1(), "values": b.values} for b in _merge_blocks(self._values)]
+            service.spreadsheets().values().batchUpdate(
+                spreadsheetId=self.spreadsheet_id,
+                body={"valueInputOption": "USER_ENTERED", "data": data},
+            ).execute()
+        if self._formats:
+            service.spreadsheets().batchUpdate(
+                spreadsheetId=self.spreadsheet_id, body={"requests": self._formats}
+            ).execute()
+        self._structure, self._values, self._formats = [], [], []
+
+
+class _ValueBlock:
+    __slots__ = ("sheet", "row", "col", "values")
+
+    def __init__(self, sheet: str, row: int, col: int, values: list[list]):
+        self.sheet = sheet
+        self.row = row
+        self.col = col
+        self.values = values
+
+    @property
+    def height(self) -> int:
+        return len(self.values)
+
+    @property
+    def width(self) -> int:
+        return max((len(r) for r in self.values), default=0)
+
+    def overlaps(self, other: "_ValueBlock") -> bool:
+        return (
+            self.sheet == other.sheet
+            and self.row < other.row + other.height and other.row < self.row + self.height
+            and self.col < other.col + other.width and other.col < self.col + self.width
+        )
+
+    def adjacent(self, other: "_ValueBlock") -> bool:
+        if self.sheet != other.sheet:
+            return False
+        if self.col == other.col and self.row + self.height == other.row:
+            return True
+        return self.row == other.row and self.height == other.height and self.col + self.width == other.col
+
+    def absorb(self, other: "_ValueBlock") -> None:
+        if self.col == other.col and self.row + self.height == other.row:
+            self.values.extend(other.values)
+            return
+        # side by side: null cells are skipped by the API, so padding leaves cells untouched
+        width = self.width
+        for mine, theirs in zip(self.values, other.values):
+            mine.extend([None] * (width - len(mine)))
+            mine.extend(theirs)
+
+    def a1(self) -> str:
+        end_col = _col_letter(self.col + max(self.width, 1))
+        sheet = self.sheet.replace("'", "''")
+        return f"'{sheet}'!{_col_letter(self.col + 1)}{self.row}:{end_col}{self.row + self.height - 1}"
+
+
+def _merge_blocks(blocks: list[_ValueBlock]) -> list[_ValueBlock]:
+    merged: list[_ValueBlock] = []
+    for block in blocks:
+        block = _ValueBlock(block.sheet, block.row, block.col, [list(r) for r in block.values])
+        # walk back while nothing later overlaps: merging moves `block` ahead of those writes
+        for prev in reversed(merged):
+            if prev.adjacent(block):
+                prev.absorb(block)
+                break
+            if prev.overlaps(block):
+                merged.append(block)
+                break
+        else:
+            merged.append(block)
+    return merged
+
+
+def _write_values(
+    service,
+    spreadsheet_id: str,
+    sheet_name: str,
+    start_col: str,
+    start_row: int,
+    values: list[list],
+    buffer: SheetWriteBuffer | None,
+) -> None:
+    if buffer is not None:
+        buffer.add_values(sheet_name, start_row, _col_to_index(start_col), values)
+        return
+    end_col = _col_letter(_col_to_index(start_col) + max(len(r) for r in values))
+    end_row = start_row + len(values) - 1
+    rng = f"{sheet_name}!{start_col}{start_row}:{end_col}{end_row}"
+    service.spreadsheets().values().update(
+        spreadsheetId=spreadsheet_id,
+        range=rng,
+        valueInputOption="USER_ENTERED",
+        body={"values": values},
+    ).execute()
+
+
+def _cell(value: Any) -> Any:
+    # typed staged rows: dates and times go out as the text USER_ENTERED parses back
+    if isinstance(value, (date, time)):
+        return key_part(value)
+    return value
+
+
 def insert_rows(
     spreadsheet_id: str,
     sheet_name: str,
     header_row: int,
     insert_row: int,
     rows: Iterable[dict],
+    buffer: SheetWriteBuffer | None = None,
 ) -> None:
-    service = _get_service()
-    sheet_id = _get_sheet_id(service, spreadsheet_id, sheet_name)
+    service = get_service()
+    if buffer is not None:
+        sheet_id = buffer.sheet_id(service, sheet_name)
+    else:
+        sheet_id = _get_sheet_id(service, spreadsheet_id, sheet_name)
 
     rows_list = list(rows)
     if not rows_list:
@@ -65,35 +338,131 @@ def insert_rows(
     # Insert empty rows at insert_row
     start_index = insert_row - 1
     end_index = start_index + len(rows_list)
-    body = {
-        "requests": [
-            {
-                "insertDimension": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "dimension": "ROWS",
-                        "startIndex": start_index,
-                        "endIndex": end_index,
-                    },
-                    "inheritFromBefore": False,
-                }
-            }
-        ]
+    request = {
+        "insertDimension": {
+            "range": {
+                "sheetId": sheet_id,
+                "dimension": "ROWS",
+                "startIndex": start_index,
+                "endIndex": end_index,
+            },
+            "inheritFromBefore": False,
+        }
     }
-    service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute()
+    if buffer is not None:
+        buffer.add_structure(request)
+    else:
+        service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body={"requests": [request]}).execute()
 
     values = []
     for row in rows_list:
-        values.append([row.get(h, "") for h in headers])
+        values.append([_cell(row.get(h, "")) for h in headers])
 
-    last_col = _col_letter(len(headers))
-    write_range = f"{sheet_name}!A{insert_row}:{last_col}{insert_row + len(values) - 1}"
-    service.spreadsheets().values().update(
+    _write_values(service, spreadsheet_id, sheet_name, "A", insert_row, values, buffer)
+
+
+def append_rows(
+    spreadsheet_id: str,
+    sheet_name: str,
+    header_row: int,
+    rows: Iterable[dict],
+    buffer: SheetWriteBuffer | None = None,
+) -> int | None:
+    """Append rows below the ledger table without shifting anything below.
+
+    Returns the first written row (1-based) so later stages can address the
+    appended block. Direct writes are one values.append call. With a buffer the
+    row is found up front from column A, the grid is grown with appendDimension
+    if needed, and the values are queued like any other block.
+    """
+    rows_list = list(rows)
+    if not rows_list:
+        return None
+
+    service = get_service()
+    headers = _get_headers(service, spreadsheet_id, sheet_name, header_row)
+    if not headers:
+        raise RuntimeError("Header row is empty")
+
+    values = [[_cell(row.get(h, "")) for h in headers] for row in rows_list]
+    if buffer is not None:
+        start_row = _last_data_row(service, spreadsheet_id, sheet_name, header_row, buffer) + 1
+        end_row = start_row + len(values) - 1
+        buffer.grow_rows(service, sheet_name, end_row)
+        buffer.add_values(sheet_name, start_row, 0, values)
+        return start_row
+
+    resp = service.spreadsheets().values().append(
         spreadsheetId=spreadsheet_id,
-        range=write_range,
+        range=f"{sheet_name}!A{header_row}",
         valueInputOption="USER_ENTERED",
+        insertDataOption="INSERT_ROWS",
         body={"values": values},
     ).execute()
+    updated = resp.get("updates", {}).get("updatedRange", "")
+    m = re.search(r"![A-Z]+(\d+)", updated)
+    if not m:
+        raise RuntimeError(f"Unexpected append response: {updated!r}")
+    return int(m.group(1))
+
+
+_TAIL_ROWS = 1000
+
+
+def _last_data_row(service, spreadsheet_id: str, sheet_name: str, header_row: int, buffer: SheetWriteBuffer) -> int:
+    # values.get trims trailing empty rows, so the last returned cell of column A is
+    # the last ledger row. Only the grid's tail is read unless it is all blank.
+    row_count = buffer.row_count(service, sheet_name)
+    low = max(header_row, row_count - _TAIL_ROWS + 1)
+    for first in (low, header_row) if low > header_row else (header_row,):
+        resp = service.spreadsheets().values().get(
+            spreadsheetId=spreadsheet_id,
+            range=f"{sheet_name}!A{first}:A{row_count}",
+            valueRenderOption="UNFORMATTED_VALUE",
+        ).execute()
+        values = resp.get("values", [])
+        if values:
+            return first + len(values) - 1
+    return header_row
+
+
+def ensure_sorted_view(
+    spreadsheet_id: str,
+    source_sheet: str,
+    view_sheet: str,
+    header_row: int,
+    last_col: str,
+    buffer: SheetWriteBuffer | None = None,
+) -> bool:
+    """Create a newest-first SORT view of an appended ledger; returns True if created."""
+    service = get_service()
+    if buffer is not None:
+        existing = buffer.sheet_ids(service)
+    else:
+        existing = _get_sheet_ids(service, spreadsheet_id)
+    if view_sheet in existing:
+        return False
+
+    request = {"addSheet": {"properties": {"title": view_sheet}}}
+    src = f"'{source_sheet}'"
+    first = header_row + 1
+    formulas = [
+        [f"={{{src}!A{header_row}:{last_col}{header_row}}}"],
+        [f"=SORT(FILTER({src}!A{first}:{last_col}, {src}!A{first}:A<>\"\"), 1, FALSE, 2, FALSE)"],
+    ]
+    if buffer is not None:
+        # addSheet goes out in the structure batch, before the values that fill it
+        buffer.add_structure(request)
+        buffer.add_values(view_sheet, 1, 0, formulas)
+        return True
+    service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body={"requests": [request]}).execute()
+    service.spreadsheets().values().update(
+        spreadsheetId=spreadsheet_id,
+        range=f"'{view_sheet}'!A1",
+        valueInputOption="USER_ENTERED",
+        body={"values": formulas},
+    ).execute()
+    return True
 
 
 def update_detail_column(
@@ -102,20 +471,14 @@ def update_detail_column(
     detail_col: str,
     insert_row: int,
     updates: list[tuple[dict, str]],
+    buffer: SheetWriteBuffer | None = None,
 ) -> None:
     if not updates:
         return
 
-    service = _get_service()
+    service = None if buffer is not None else get_service()
     values = [[u[1]] for u in updates]
-    end_row = insert_row + len(values) - 1
-    rng = f"{sheet_name}!{detail_col}{insert_row}:{detail_col}{end_row}"
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=rng,
-        valueInputOption="USER_ENTERED",
-        body={"values": values},
-    ).execute()
+    _write_values(service, spreadsheet_id, sheet_name, detail_col, insert_row, values, buffer)
 
 
 def ensure_header(
@@ -124,8 +487,9 @@ def ensure_header(
     header_row: int,
     col_letter: str,
     header_value: str,
+    buffer: SheetWriteBuffer | None = None,
 ) -> None:
-    service = _get_service()
+    service = get_service()
     rng = f"{sheet_name}!{col_letter}{header_row}"
     resp = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=rng).execute()
     current = ""
@@ -134,12 +498,7 @@ def ensure_header(
         current = str(values[0][0]).strip()
     if current == header_value:
         return
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=rng,
-        valueInputOption="USER_ENTERED",
-        body={"values": [[header_value]]},
-    ).execute()
+    _write_values(service, spreadsheet_id, sheet_name, col_letter, header_row, [[header_value]], buffer)
 
 
 def update_auto_category_column(
@@ -148,20 +507,14 @@ def update_auto_category_column(
     auto_col: str,
     insert_row: int,
     updates: list[tuple[dict, str]],
+    buffer: SheetWriteBuffer | None = None,
 ) -> None:
     if not updates:
         return
 
-    service = _get_service()
+    service = None if buffer is not None else get_service()
     values = [[u[1]] for u in updates]
-    end_row = insert_row + len(values) - 1
-    rng = f"{sheet_name}!{auto_col}{insert_row}:{auto_col}{end_row}"
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=rng,
-        valueInputOption="USER_ENTERED",
-        body={"values": values},
-    ).execute()
+    _write_values(service, spreadsheet_id, sheet_name, auto_col, insert_row, values, buffer)
 
 
 def update_category_block(
@@ -171,18 +524,14 @@ def update_category_block(
     end_col: str,
     insert_row: int,
     values: list[list[str]],
+    buffer: SheetWriteBuffer | None = None,
 ) -> None:
     if not values:
         return
-    service = _get_service()
-    end_row = insert_row + len(values) - 1
-    rng = f"{sheet_name}!{start_col}{insert_row}:{end_col}{end_row}"
-    service.spreadsheets().values().update(
-        spreadsheetId=spreadsheet_id,
-        range=rng,
-        valueInputOption="USER_ENTERED",
-        body={"values": values},
-    ).execute()
+    width = _col_to_index(end_col) - _col_to_index(start_col) + 1
+    values = [list(r[:width]) for r in values]
+    service = None if buffer is not None else get_service()
+    _write_values(service, spreadsheet_id, sheet_name, start_col, insert_row, values, buffer)
 
 
 def ensure_checkbox_column(
@@ -191,38 +540,41 @@ def ensure_checkbox_column(
     col_letter: str,
     start_row: int,
     end_row: int,
+    buffer: SheetWriteBuffer | None = None,
 ) -> None:
     if end_row < start_row:
         return
-    service = _get_service()
-    sheet_id = _get_sheet_id(service, spreadsheet_id, sheet_name)
+    service = get_service()
+    if buffer is not None:
+        sheet_id = buffer.sheet_id(service, sheet_name)
+    else:
+        sheet_id = _get_sheet_id(service, spreadsheet_id, sheet_name)
     start_index = start_row - 1
     end_index = end_row
 
-    body = {
-        "requests": [
-            {
-                "repeatCell": {
-                    "range": {
-                        "sheetId": sheet_id,
-                        "startRowIndex": start_index,
-                        "endRowIndex": end_index,
-                        "startColumnIndex": _col_to_index(col_letter),
-                        "endColumnIndex": _col_to_index(col_letter) + 1,
-                    },
-                    "cell": {
-                        "dataValidation": {
-                            "condition": {"type": "BOOLEAN"},
-                            "strict": True,
-                            "showCustomUi": True,
-                        }
-                    },
-                    "fields": "dataValidation",
+    request = {
+        "repeatCell": {
+            "range": {
+                "sheetId": sheet_id,
+                "startRowIndex": start_index,
+                "endRowIndex": end_index,
+                "startColumnIndex": _col_to_index(col_letter),
+                "endColumnIndex": _col_to_index(col_letter) + 1,
+            },
+            "cell": {
+                "dataValidation": {
+                    "condition": {"type": "BOOLEAN"},
+                    "strict": True,
+                    "showCustomUi": True,
                 }
-            }
-        ]
+            },
+            "fields": "dataValidation",
+        }
     }
-    service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute()
+    if buffer is not None:
+        buffer.add_format(request)
+        return
+    service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body={"requests": [request]}).execute()
 
 
 def _col_to_index(letter: str) -> int:
@@ -233,72 +585,212 @@ def _col_to_index(letter: str) -> int:
     return result - 1
 
 
-def fetch_existing_keys(
+def _data_window(
+    service,
     spreadsheet_id: str,
     sheet_name: str,
     header_row: int,
-    key_fields: list[str],
-    max_rows: int = 5000,
-) -> set[str]:
-    service = _get_service()
+    max_rows: int,
+    newest_first: bool,
+) -> tuple[int, int]:
+    """Row span holding the newest `max_rows` entries: top of the sheet, or its tail when appended.
+
+    The tail is taken from the grid's rowCount, so blank grid rows after the
+    data only shrink the window; the newest rows are still inside it.
+    """
+    start_row = header_row + 1
+    if newest_first:
+        return start_row, start_row + max_rows - 1
+    resp = service.spreadsheets().get(
+        spreadsheetId=spreadsheet_id,
+        fields="sheets(properties(title,gridProperties(rowCount)))",
+    ).execute()
+    row_count = start_row + max_rows - 1
+    for sheet in resp.get("sheets", []):
+        props = sheet.get("properties", {})
+        if props.get("title") == sheet_name:
+            row_count = int(props.get("gridProperties", {}).get("rowCount", row_count))
+    return max(start_row, row_count - max_rows + 1), row_count
 
-    headers = _get_headers(service, spreadsheet_id, sheet_name, header_row)
-    if not headers:
-        return set()
 
-    col_count = len(headers)
-    last_col = _col_letter(col_count)
-    start_row = header_row + 1
-    end_row = start_row + max_rows - 1
-    rng = f"{sheet_name}!A{start_row}:{last_col}{end_row}"
-    resp = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=rng).execute()
-    values = resp.get("values", [])
+# ── 타입 컬럼 읽기 ───────────────────────────────────────
+# UNFORMATTED_VALUE + SERIAL_NUMBER: dates are day serials from 1899-12-30,
+# times are day fractions, amounts are plain numbers. Text cells fall back to parsing.
 
-    index = {h: i for i, h in enumerate(headers)}
-    keys = set()
-    for row in values:
-        obj = {}
-        for k in key_fields:
-            idx = index.get(k)
-            obj[k] = row[idx] if idx is not None and idx < len(row) else ""
-        keys.add(row_key(obj, key_fields))
+_SERIAL_EPOCH = date(1899, 12, 30)
 
-    return keys
 
+def _as_date(value: Any) -> date | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return _SERIAL_EPOCH + timedelta(days=int(value))
+    return parse_date(value)
 
-def fetch_max_date(
-    spreadsheet_id: str,
-    sheet_name: str,
-    header_row: int,
-    date_field: str = "날짜",
-    max_rows: int = 5000,
-) -> str | None:
-    service = _get_service()
-    headers = _get_headers(service, spreadsheet_id, sheet_name, header_row)
-    if not headers:
+
+def _as_time(value: Any) -> time | None:
+    if value is None or value == "":
         return None
+    if isinstance(value, (int, float)):
+        seconds = round((value % 1) * 86400) % 86400
+        return time(seconds // 3600, seconds % 3600 // 60, seconds % 60)
+    return parse_time(value)
 
+
+def _as_won(value: Any) -> int | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
     try:
-        date_idx = headers.index(date_field)
+        return int(round(float(str(value).replace(",", "").replace("₩", "").strip())))
     except ValueError:
         return None
 
-    col_count = len(headers)
-    last_col = _col_letter(col_count)
-    start_row = header_row + 1
-    end_row = start_row + max_rows - 1
-    rng = f"{sheet_name}!A{start_row}:{last_col}{end_row}"
-    resp = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=rng).execute()
-    values = resp.get("values", [])
 
-    max_date = None
-    for row in values:
-        if date_idx >= len(row):
-            continue
-        value = row[date_idx]
-        if not value:
-            continue
-        if max_date is None or value > max_date:
-            max_date = value
-
-    return max_date
+def _as_number(value: Any) -> int | float | str | None:
+    # unrounded: key reads must hash 12.5 as "12.5", like the export string does
+    if value is None or value == "":
+        return None
+    return value
+
+
+def _as_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+COLUMN_TYPES: dict[str, Callable[[Any], Any]] = {
+    "date": _as_date,
+    "time": _as_time,
+    "won": _as_won,
+    "number": _as_number,
+    "text": _as_text,
+}
+
+
+def fetch_typed_columns(
+    spreadsheet_id: str,
+    sheet_name: str,
+    header_row: int,
+    columns: dict[str, str],
+    max_rows: int | None = 5000,
+    newest_first: bool = True,
+    service=None,
+) -> dict[str, list]:
+    """Read only the named header columns, column-major and unformatted, as typed lists.
+
+    `columns` maps header name → COLUMN_TYPES key. All lists share one length
+    (missing cells are None); headers absent from the sheet yield all-None lists.
+    max_rows=None reads to the end of the sheet.
+    """
+    service = service or get_service()
+    headers = _get_headers(service, spreadsheet_id, sheet_name, header_row)
+    index = {h: i for i, h in enumerate(headers)}
+    present = [name for name in columns if name in index]
+    if not present:
+        return {name: [] for name in columns}
+
+    if max_rows is None:
+        start_row, end_row = header_row + 1, None
+    else:
+        start_row, end_row = _data_window(service, spreadsheet_id, sheet_name, header_row, max_rows, newest_first)
+    ranges = []
+    for name in present:
+        col = _col_letter(index[name] + 1)
+        ranges.append(f"{sheet_name}!{col}{start_row}:{col}{end_row if end_row is not None else ''}")
+    resp = service.spreadsheets().values().batchGet(
+        spreadsheetId=spreadsheet_id,
+        ranges=ranges,
+        majorDimension="COLUMNS",
+        valueRenderOption="UNFORMATTED_VALUE",
+        dateTimeRenderOption="SERIAL_NUMBER",
+    ).execute()
+
+    raw: dict[str, list] = {}
+    for name, value_range in zip(present, resp.get("valueRanges", [])):
+        values = value_range.get("values") or [[]]
+        convert = COLUMN_TYPES[columns[name]]
+        raw[name] = [convert(v) for v in values[0]]
+    length = max((len(v) for v in raw.values()), default=0)
+    return {
+        name: raw.get(name, []) + [None] * (length - len(raw.get(name, [])))
+        for name in columns
+    }
+
+
+def fetch_typed_rows(
+    spreadsheet_id: str,
+    sheet_name: str,
+    header_row: int,
+    columns: dict[str, str],
+    max_rows: int | None = 5000,
+    newest_first: bool = True,
+    service=None,
+) -> list[dict]:
+    """fetch_typed_columns zipped back into row dicts, skipping fully empty rows.
+
+    Missing text cells are "" (as in a formatted read); missing typed cells stay None.
+    """
+    cols = fetch_typed_columns(
+        spreadsheet_id,
+        sheet_name,
+        header_row,
+        columns,
+        max_rows=max_rows,
+        newest_first=newest_first,
+        service=service,
+    )
+    names = list(columns)
+    for name, kind in columns.items():
+        if kind == "text":
+            cols[name] = ["" if v is None else v for v in cols[name]]
+    return [
+        dict(zip(names, values))
+        for values in zip(*(cols[name] for name in names))
+        if not all(v is None or v == "" for v in values)
+    ]
+
+
+# 금액 stays unrounded here; "won" rounding is for display and report reads only
+_KEY_TYPES = {"날짜": "date", "시간": "time", "금액": "number"}
+
+
+def fetch_key_rows(
+    spreadsheet_id: str,
+    sheet_name: str,
+    header_row: int,
+    key_fields: list[str],
+    max_rows: int | None = 5000,
+    newest_first: bool = True,
+    service=None,
+) -> list[dict]:
+    """Typed key-field dicts for the ledger window, skipping fully empty rows."""
+    return fetch_typed_rows(
+        spreadsheet_id,
+        sheet_name,
+        header_row,
+        {k: _KEY_TYPES.get(k, "text") for k in key_fields},
+        max_rows=max_rows,
+        newest_first=newest_first,
+        service=service,
+    )
+
+
+def fetch_existing_keys(
+    spreadsheet_id: str,
+    sheet_name: str,
+    header_row: int,
+    key_fields: list[str],
+    max_rows: int | None = 5000,
+    newest_first: bool = True,
+    service=None,
+) -> KeySet:
+    rows = fetch_key_rows(
+        spreadsheet_id, sheet_name, header_row, key_fields,
+        max_rows=max_rows, newest_first=newest_first, service=service,
+    )
+    return KeySet(row_key(r, key_fields) for r in rows)
@@ -0,0 +1,578 @@
+"""In-process Google Sheets v4 stand-in for offline benchmarks.
+
+`SheetsEmulator` mimics the subset of the googleapiclient resource chain the
+pipeline uses (``service.spreadsheets().values().get(...).execute()`` etc.)
+over in-memory grids, and counts calls, cells and request/response bytes so
+that round-trips can be measured without a network.
+
+사용법:
+  emu = SheetsEmulator(latency_ms=150)
+  sid = emu.add_spreadsheet({"가계부 내역": [["날짜", "시간", ...]]})
+  sheets.set_service_factory(lambda: emu)
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, time
+from typing import Any, Callable
+import json
+import re
+import threading
+import time as time_mod
+
+_EPOCH = date(1899, 12, 30)
+_A1_RE = re.compile(r"^([A-Za-z]*)(\d*)(?::([A-Za-z]*)(\d*))?$")
+_NUMBER_RE = re.compile(r"^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$")
+_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_TIME_RE = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?$")
+
+# Requests that only touch presentation; accepted and recorded without grid effect.
+_FORMAT_REQUESTS = {
+    "updateDimensionProperties",
+    "updateSheetProperties",
+    "addConditionalFormatRule",
+    "setDataValidation",
+    "setBasicFilter",
+    "clearBasicFilter",
+    "autoResizeDimensions",
+}
+
+
+class EmulatorError(Exception):
+    """Raised where the real API would answer with an HTTP error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+@dataclass
+class EmulatorStats:
+    calls: Counter = field(default_factory=Counter)
+    cells_read: int = 0
+    cells_written: int = 0
+    cells_shifted: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def summary(self) -> dict:
+        return {
+            "calls": self.total_calls,
+            "by_method": dict(sorted(self.calls.items())),
+            "cells_read": self.cells_read,
+            "cells_written": self.cells_written,
+            "cells_shifted": self.cells_shifted,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+@dataclass
+class _Sheet:
+    sheet_id: int
+    title: str
+    index: int
+    row_count: int = 1000
+    column_count: int = 26
+    rows: list[list[Any]] = field(default_factory=list)
+    merges: list[dict] = field(default_factory=list)
+    formats: list[dict] = field(default_factory=list)
+
+    def properties(self) -> dict:
+        return {
+            "sheetId": self.sheet_id,
+            "title": self.title,
+            "index": self.index,
+            "gridProperties": {
+                "rowCount": max(self.row_count, len(self.rows)),
+                "columnCount": max(self.column_count, max((len(r) for r in self.rows), default=0)),
+            },
+        }
+
+
+@dataclass
+class _Spreadsheet:
+    spreadsheet_id: str
+    title: str
+    sheets: list[_Sheet] = field(default_factory=list)
+
+    def by_title(self, title: str) -> _Sheet:
+        for sheet in self.sheets:
+            if sheet.title == title:
+                return sheet
+        raise EmulatorError(400, f"Unable to parse range: {title}")
+
+    def by_id(self, sheet_id: int) -> _Sheet:
+        for sheet in self.sheets:
+            if sheet.sheet_id == sheet_id:
+                return sheet
+        raise EmulatorError(400, f"No grid with id: {sheet_id}")
+
+
+# ── 값 변환 ───────────────────────────────────────────────
+
+
+def _col_to_index(letters: str) -> int:
+    result = 0
+    for ch in letters.upper():
+        result = result * 26 + (ord(ch) - 64)
+    return result - 1
+
+
+def _col_letter(n: int) -> str:
+    # 1-based
+    result = ""
+    while n > 0:
+        n, rem = divmod(n - 1, 26)
+        result = chr(65 + rem) + result
+    return result
+
+
+def _parse_user_entered(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    text = value.strip()
+    if not text or text.startswith("="):
+        return value
+    plain = text.replace(",", "").replace("₩", "")
+    if _NUMBER_RE.match(plain):
+        num = float(plain)
+        return int(num) if num.is_integer() and "." not in plain and "e" not in plain.lower() else num
+    if _DATE_RE.match(text):
+        try:
+            return date.fromisoformat(text)
+        except ValueError:
+            return value
+    if _TIME_RE.match(text):
+        try:
+            return time.fromisoformat(text if text.count(":") == 2 else text + ":00")
+        except ValueError:
+            return value
+    if text.upper() in ("TRUE", "FALSE"):
+        return text.upper() == "TRUE"
+    return value
+
+
+def _render(value: Any, render: str, dt_render: str) -> Any:
+    if value is None:
+        return ""
+    if render == "FORMATTED_VALUE" or (dt_render == "FORMATTED_STRING" and isinstance(value, (date, time))):
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, datetime):
+            return value.strftime("%Y-%m-%d %H:%M:%S")
+        if isinstance(value, date):
+            return value.isoformat()
+        if isinstance(value, time):
+            return value.strftime("%H:%M:%S")
+        if isinstance(value, float) and value.is_integer():
+            return str(int(value))
+        return str(value)
+    if isinstance(value, datetime):
+        delta = value - datetime.combine(_EPOCH, time())
+        return delta.days + delta.seconds / 86400
+    if isinstance(value, date):
+        return (value - _EPOCH).days
+    if isinstance(value, time):
+        return (value.hour * 3600 + value.minute * 60 + value.second) / 86400
+    return value
+
+
+def _nbytes(obj: Any) -> int:
+    return len(json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+# ── 요청 객체 ─────────────────────────────────────────────
+
+
+class _Request:
+    def __init__(self, emulator: "SheetsEmulator", method: str, fn: Callable[[], Any], payload: Any):
+        self._emulator = emulator
+        self._method = method
+        self._fn = fn
+        self._payload = payload
+
+    def execute(self, http=None, num_retries: int = 0):
+        return self._emulator._call(self._method, self._fn, self._payload)
+
+
+class _ValuesResource:
+    def __init__(self, emulator: "SheetsEmulator"):
+        self._emu = emulator
+
+    def get(self, spreadsheetId: str, range: str, majorDimension: str = "ROWS",
+            valueRenderOption: str = "FORMATTED_VALUE",
+            dateTimeRenderOption: str = "SERIAL_NUMBER", **_: Any) -> _Request:
+        payload = {"range": range}
+        return _Request(self._emu, "values.get", lambda: self._emu._read(
+            spreadsheetId, range, majorDimension, valueRenderOption, dateTimeRenderOption), payload)
+
+    def batchGet(self, spreadsheetId: str, ranges: list[str], majorDimension: str = "ROWS",
+                 valueRenderOption: str = "FORMATTED_VALUE",
+                 dateTimeRenderOption: str = "SERIAL_NUMBER", **_: Any) -> _Request:
+        if isinstance(ranges, str):
+            ranges = [ranges]
+
+        def run():
+            return {
+                "spreadsheetId": spreadsheetId,
+                "valueRanges": [
+                    self._emu._read(spreadsheetId, rng, majorDimension, valueRenderOption, dateTimeRenderOption)
+                    for rng in ranges
+                ],
+            }
+
+        return _Request(self._emu, "values.batchGet", run, {"ranges": ranges})
+
+    def update(self, spreadsheetId: str, range: str, body: dict,
+               valueInputOption: str = "RAW", **_: Any) -> _Request:
+        return _Request(self._emu, "values.update", lambda: self._emu._write(
+            spreadsheetId, range, body.get("values", []), valueInputOption,
+            body.get("majorDimension", "ROWS")), body)
+
+    def batchUpdate(self, spreadsheetId: str, body: dict, **_: Any) -> _Request:
+        def run():
+            option = body.get("valueInputOption", "RAW")
+            responses = [
+                self._emu._write(spreadsheetId, vr["range"], vr.get("values", []), option,
+                                 vr.get("majorDimension", "ROWS"))
+                for vr in body.get("data", [])
+            ]
+            return {
+                "spreadsheetId": spreadsheetId,
+                "totalUpdatedCells": sum(r["updatedCells"] for r in responses),
+                "responses": responses,
+            }
+
+        return _Request(self._emu, "values.batchUpdate", run, body)
+
+    def append(self, spreadsheetId: str, range: str, body: dict,
+               valueInputOption: str = "RAW", insertDataOption: str = "OVERWRITE", **_: Any) -> _Request:
+        return _Request(self._emu, "values.append", lambda: self._emu._append(
+            spreadsheetId, range, body.get("values", []), valueInputOption, insertDataOption), body)
+
+    def clear(self, spreadsheetId: str, range: str, body: dict | None = None, **_: Any) -> _Request:
+        return _Request(self._emu, "values.clear", lambda: self._emu._clear(spreadsheetId, range), {"range": range})
+
+
+class _SpreadsheetsResource:
+    def __init__(self, emulator: "SheetsEmulator"):
+        self._emu = emulator
+
+    def values(self) -> _ValuesResource:
+        return _ValuesResource(self._emu)
+
+    def get(self, spreadsheetId: str, fields: str | None = None, **_: Any) -> _Request:
+        def run():
+            book = self._emu._book(spreadsheetId)
+            return {
+                "spreadsheetId": spreadsheetId,
+                "properties": {"title": book.title},
+                "sheets": [
+                    {"properties": s.properties(), "merges": list(s.merges)}
+                    for s in sorted(book.sheets, key=lambda s: s.index)
+                ],
+            }
+
+        return _Request(self._emu, "get", run, {"fields": fields})
+
+    def create(self, body: dict, **_: Any) -> _Request:
+        def run():
+            title = body.get("properties", {}).get("title", "Untitled spreadsheet")
+            sheet_titles = [s.get("properties", {}).get("title") for s in body.get("sheets", [])]
+            sid = self._emu.add_spreadsheet({t: [] for t in sheet_titles if t} or {"Sheet1": []}, title=title)
+            return {
+                "spreadsheetId": sid,
+                "spreadsheetUrl": f"https://docs.google.com/spreadsheets/d/{sid}",
+                "properties": {"title": title},
+            }
+
+        return _Request(self._emu, "create", run, body)
+
+    def batchUpdate(self, spreadsheetId: str, body: dict, **_: Any) -> _Request:
+        return _Request(self._emu, "batchUpdate", lambda: self._emu._batch_update(
+            spreadsheetId, body.get("requests", [])), body)
+
+
+# ── 에뮬레이터 ────────────────────────────────────────────
+
+
+class SheetsEmulator:
+    """Stateful fake of ``build("sheets", "v4")`` backed by in-memory grids."""
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.stats = EmulatorStats()
+        self._books: dict[str, _Spreadsheet] = {}
+        self._next_sheet_id = 0
+        self._lock = threading.RLock()
+
+    # -- 설정/조회 헬퍼 (API 호출로 집계되지 않음) --
+
+    def add_spreadsheet(self, sheets: dict[str, list[list[Any]]], spreadsheet_id: str | None = None,
+                        title: str = "Emulated spreadsheet") -> str:
+        with self._lock:
+            sid = spreadsheet_id or f"emu-{len(self._books) + 1}"
+            book = _Spreadsheet(spreadsheet_id=sid, title=title)
+            for idx, (name, rows) in enumerate(sheets.items()):
+                book.sheets.append(_Sheet(
+                    sheet_id=self._new_sheet_id(), title=name, index=idx,
+                    rows=[[_parse_user_entered(v) for v in row] for row in rows],
+                ))
+            self._books[sid] = book
+            return sid
+
+    def add_sheet(self, spreadsheet_id: str, title: str, rows: list[list[Any]] | None = None) -> int:
+        """Add a tab to an existing spreadsheet (appended last); returns its sheetId."""
+        with self._lock:
+            book = self._book(spreadsheet_id)
+            if any(s.title == title for s in book.sheets):
+                raise EmulatorError(400, f"A sheet with the name \"{title}\" already exists.")
+            sheet = _Sheet(
+                sheet_id=self._new_sheet_id(), title=title, index=len(book.sheets),
+                rows=[[_parse_user_entered(v) for v in row] for row in rows or []],
+            )
+            book.sheets.append(sheet)
+            return sheet.sheet_id
+
+    def grid(self, spreadsheet_id: str, title: str) -> list[list[Any]]:
+        """Raw stored cells of a sheet (typed, unrendered)."""
+        return self._book(spreadsheet_id).by_title(title).rows
+
+    def reset_stats(self) -> None:
+        self.stats = EmulatorStats()
+
+    def spreadsheets(self) -> _SpreadsheetsResource:
+        return _SpreadsheetsResource(self)
+
+    # -- 내부 구현 --
+
+    def _new_sheet_id(self) -> int:
+        sheet_id = self._next_sheet_id
+        self._next_sheet_id += 1
+        return sheet_id
+
+    def _book(self, spreadsheet_id: str) -> _Spreadsheet:
+        book = self._books.get(spreadsheet_id)
+        if book is None:
+            raise EmulatorError(404, f"Requested entity was not found: {spreadsheet_id}")
+        return book
+
+    def _call(self, method: str, fn: Callable[[], Any], payload: Any) -> Any:
+        if self.latency_ms:
+            time_mod.sleep(self.latency_ms / 1000)
+        with self._lock:
+            self.stats.calls[method] += 1
+            self.stats.bytes_sent += _nbytes(payload)
+            result = fn()
+            self.stats.bytes_received += _nbytes(result)
+            return result
+
+    def _resolve(self, spreadsheet_id: str, rng: str) -> tuple[_Sheet, int, int, int | None, int | None]:
+        """Parse an A1 range into (sheet, row0, col0, row_end, col_end); ends are exclusive or None."""
+        book = self._book(spreadsheet_id)
+        if "!" in rng:
+            title, a1 = rng.rsplit("!", 1)
+        else:
+            title, a1 = rng, ""
+        title = title.strip()
+        if len(title) >= 2 and title[0] == "'" and title[-1] == "'":
+            title = title[1:-1].replace("''", "'")
+        sheet = book.by_title(title)
+        if not a1:
+            return sheet, 0, 0, None, None
+
+        m = _A1_RE.match(a1.strip())
+        if not m:
+            raise EmulatorError(400, f"Unable to parse range: {rng}")
+        c1, r1, c2, r2 = m.groups()
+        row0 = int(r1) - 1 if r1 else 0
+        col0 = _col_to_index(c1) if c1 else 0
+        if m.group(0).find(":") < 0:
+            # single cell (A1) or bare row/column
+            row_end = row0 + 1 if r1 else None
+            col_end = col0 + 1 if c1 else None
+            return sheet, row0, col0, row_end, col_end
+        row_end = int(r2) if r2 else None
+        col_end = _col_to_index(c2) + 1 if c2 else None
+        return sheet, row0, col0, row_end, col_end
+
+    def _read(self, spreadsheet_id: str, rng: str, major: str, render: str, dt_render: str) -> dict:
+        sheet, row0, col0, row_end, col_end = self._resolve(spreadsheet_id, rng)
+        stop_row = len(sheet.rows) if row_end is None else min(row_end, len(sheet.rows))
+        out: list[list[Any]] = []
+        for r in range(row0, stop_row):
+            src = sheet.rows[r]
+            stop_col = len(src) if col_end is None else min(col_end, len(src))
+            cells = [_render(src[c], render, dt_render) for c in range(col0, stop_col)]
+            while cells and cells[-1] == "":
+                cells.pop()
+            out.append(cells)
+        while out and not out[-1]:
+            out.pop()
+        self.stats.cells_read += sum(len(r) for r in out)
+
+        if major == "COLUMNS":
+            width = max((len(r) for r in out), default=0)
+            cols = []
+            for c in range(width):
+                col = [r[c] if c < len(r) else "" for r in out]
+                while col and col[-1] == "":
+                    col.pop()
+                cols.append(col)
+            out = cols
+
+        resp: dict[str, Any] = {"range": rng, "majorDimension": major}
+        if out:
+            resp["values"] = out
+        return resp
+
+    def _write(self, spreadsheet_id: str, rng: str, values: list[list[Any]], option: str,
+               major: str = "ROWS") -> dict:
+        sheet, row0, col0, _, _ = self._resolve(spreadsheet_id, rng)
+        if major == "COLUMNS":
+            width = max((len(c) for c in values), default=0)
+            values = [[col[i] if i < len(col) else None for col in values] for i in range(width)]
+        written = 0
+        for dr, row in enumerate(values):
+            r = row0 + dr
+            while len(sheet.rows) <= r:
+                sheet.rows.append([])
+            target = sheet.rows[r]
+            for dc, value in enumerate(row):
+                if value is None:
+                    # null values are skipped by the API
+                    continue
+                c = col0 + dc
+                while len(target) <= c:
+                    target.append(None)
+                target[c] = _parse_user_entered(value) if option == "USER_ENTERED" else value
+                written += 1
+        self.stats.cells_written += written
+        end_col = col0 + max((len(r) for r in values), default=1)
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "updatedRange": f"'{sheet.title}'!{_col_letter(col0 + 1)}{row0 + 1}:"
+                            f"{_col_letter(end_col)}{row0 + max(len(values), 1)}",
+            "updatedRows": len(values),
+            "updatedCells": written,
+        }
+
+    def _append(self, spreadsheet_id: str, rng: str, values: list[list[Any]], option: str,
+                insert_option: str) -> dict:
+        sheet, row0, col0, _, _ = self._resolve(spreadsheet_id, rng)
+        # table = contiguous data starting at the range anchor; append after its last non-empty row
+        last = row0 - 1
+        for r in range(row0, len(sheet.rows)):
+            if any(v not in (None, "") for v in sheet.rows[r]):
+                last = r
+        start = last + 1
+        if insert_option == "INSERT_ROWS" and start < len(sheet.rows):
+            self._insert_rows(sheet, start, len(values))
+        title = f"'{sheet.title}'!{_col_letter(col0 + 1)}{start + 1}"
+        updates = self._write(spreadsheet_id, title, values, option)
+        return {"spreadsheetId": spreadsheet_id, "tableRange": rng, "updates": updates}
+
+    def _clear(self, spreadsheet_id: str, rng: str) -> dict:
+        sheet, row0, col0, row_end, col_end = self._resolve(spreadsheet_id, rng)
+        stop_row = len(sheet.rows) if row_end is None else min(row_end, len(sheet.rows))
+        for r in range(row0, stop_row):
+            row = sheet.rows[r]
+            stop_col = len(row) if col_end is None else min(col_end, len(row))
+            for c in range(col0, stop_col):
+                row[c] = None
+        return {"spreadsheetId": spreadsheet_id, "clearedRange": rng}
+
+    def _insert_rows(self, sheet: _Sheet, start: int, count: int) -> None:
+        self.stats.cells_shifted += sum(len(r) for r in sheet.rows[start:])
+        sheet.rows[start:start] = [[] for _ in range(count)]
+        sheet.row_count += count
+
+    def _batch_update(self, spreadsheet_id: str, requests: list[dict]) -> dict:
+        book = self._book(spreadsheet_id)
+        replies: list[dict] = []
+        for req in requests:
+            (kind, spec), = req.items()
+            reply: dict = {}
+            if kind == "insertDimension":
+                r = spec["range"]
+                sheet = book.by_id(r["sheetId"])
+                start, end = r["startIndex"], r["endIndex"]
+                if r["dimension"] == "ROWS":
+                    while len(sheet.rows) < start:
+                        sheet.rows.append([])
+                    self._insert_rows(sheet, start, end - start)
+                else:
+                    for row in sheet.rows:
+                        self.stats.cells_shifted += max(0, len(row) - start)
+                        if len(row) > start:
+                            row[start:start] = [None] * (end - start)
+                    sheet.column_count += end - start
+            elif kind == "deleteDimension":
+                r = spec["range"]
+                sheet = book.by_id(r["sheetId"])
+                start, end = r["startIndex"], r["endIndex"]
+                if r["dimension"] == "ROWS":
+                    self.stats.cells_shifted += sum(len(x) for x in sheet.rows[end:])
+                    del sheet.rows[start:end]
+                    sheet.row_count = max(0, sheet.row_count - (end - start))
+                else:
+                    for row in sheet.rows:
+                        del row[start:end]
+            elif kind == "appendDimension":
+                sheet = book.by_id(spec["sheetId"])
+                if spec["dimension"] == "ROWS":
+                    sheet.row_count = max(sheet.row_count, len(sheet.rows)) + spec["length"]
+                else:
+                    sheet.column_count += spec["length"]
+            elif kind == "repeatCell":
+                r = spec["range"]
+                sheet = book.by_id(r.get("sheetId", 0))
+                rows = r.get("endRowIndex", sheet.row_count) - r.get("startRowIndex", 0)
+                cols = r.get("endColumnIndex", sheet.column_count) - r.get("startColumnIndex", 0)
+                sheet.formats.append({"range": r, "fields": spec.get("fields", "")})
+                self.stats.cells_written += max(0, rows) * max(0, cols)
+            elif kind == "mergeCells":
+                sheet = book.by_id(spec["range"].get("sheetId", 0))
+                sheet.merges.append(spec["range"])
+            elif kind == "unmergeCells":
+                sheet = book.by_id(spec["range"].get("sheetId", 0))
+                sheet.merges = [m for m in sheet.merges if m != spec["range"]]
+            elif kind == "addSheet":
+                props = spec.get("properties", {})
+                title = props.get("title") or f"Sheet{len(book.sheets) + 1}"
+                if any(s.title == title for s in book.sheets):
+                    raise EmulatorError(400, f"A sheet with the name \"{title}\" already exists.")
+                grid = props.get("gridProperties", {})
+                index = props.get("index", len(book.sheets))
+                for s in book.sheets:
+                    if s.index >= index:
+                        s.index += 1
+                sheet = _Sheet(
+                    sheet_id=props.get("sheetId", self._new_sheet_id()),
+                    title=title,
+                    index=index,
+                    row_count=grid.get("rowCount", 1000),
+                    column_count=grid.get("columnCount", 26),
+                )
+                book.sheets.append(sheet)
+                reply = {"addSheet": {"properties": sheet.properties()}}
+            elif kind == "deleteSheet":
+                sheet = book.by_id(spec["sheetId"])
+                if len(book.sheets) == 1:
+                    raise EmulatorError(400, "You can't remove all the sheets in a document.")
+                book.sheets.remove(sheet)
+                for s in book.sheets:
+                    if s.index > sheet.index:
+                        s.index -= 1
+            elif kind in _FORMAT_REQUESTS:
+                pass
+            else:
+                raise EmulatorError(400, f"Unsupported request in emulator: {kind}")
+            replies.append(reply)
+        return {"spreadsheetId": spreadsheet_id, "replies": replies}
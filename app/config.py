@@ -9,13 +9,26 @@ class AppConfig:
     inbox_dir: Path
     unzip_dir: Path
     staging_dir: Path
+    manifest_path: Path
+    unzip_mode: str
+    unzip_artifacts: bool
     gmail_query: str
+    gmail_cursor_path: Path
+    gmail_max_workers: int
+    ingest_backlog: bool
     drive_folder: str
+    drive_folder_cache_path: Path
+    drive_upload_sessions_path: Path
+    google_backend: str
+    replay_dir: Path
+    replay_latency_ms: float
     spreadsheet_id: str
     sheet_ledger: str
     sheet_budget_raw: str
+    sheet_ledger_view: str
     ledger_header_row: int
     ledger_insert_row: int
+    ledger_insert_mode: str
     ledger_detail_col: str
     ledger_auto_col: str
     ledger_category_col: str
@@ -24,6 +37,17 @@ class AppConfig:
     ledger_confidence_col: str
     ledger_reclass_col: str
     log_path: str
+    sheets_max_workers: int
+    normalize_workers: int
+    staging_csv: bool
+    key_index_path: Path
+    key_index_reconcile_days: int
+    dedup_bloom: bool
+    dedup_bloom_fp_rate: float
+    dedup_overlap_days: int
+    dedup_fuzzy: bool
+    dedup_fuzzy_threshold: float
+    dedup_fuzzy_minutes: int
 
 
 def load_config() -> AppConfig:
@@ -33,13 +57,30 @@ def load_config() -> AppConfig:
         inbox_dir=base / "inbox",
         unzip_dir=base / "unzipped",
         staging_dir=base / "staging",
+        manifest_path=Path(os.environ.get("EXPORT_MANIFEST_PATH", str(base / "export_manifest.json"))).resolve(),
+        unzip_mode=os.environ.get("UNZIP_MODE", "disk").strip().lower(),
+        unzip_artifacts=os.environ.get("UNZIP_ARTIFACTS", "0").strip() == "1",
         gmail_query=os.environ.get("GMAIL_QUERY", "from:banksalad has:attachment"),
+        gmail_cursor_path=Path(os.environ.get("GMAIL_CURSOR_PATH", str(base / "gmail_cursor.json"))).resolve(),
+        gmail_max_workers=int(os.environ.get("GMAIL_MAX_WORKERS", "4")),
+        ingest_backlog=os.environ.get("INGEST_BACKLOG", "0").strip() == "1",
         drive_folder=os.environ.get("DRIVE_FOLDER", "재정/뱅크샐러드/INBOX"),
+        drive_folder_cache_path=Path(
+            os.environ.get("DRIVE_FOLDER_CACHE_PATH", str(base / "drive_folders.json"))
+        ).resolve(),
+        drive_upload_sessions_path=Path(
+            os.environ.get("DRIVE_UPLOAD_SESSIONS_PATH", str(base / "drive_uploads.json"))
+        ).resolve(),
+        google_backend=os.environ.get("GOOGLE_BACKEND", "live").strip().lower(),
+        replay_dir=Path(os.environ.get("REPLAY_DIR", str(base / "replay"))).resolve(),
+        replay_latency_ms=float(os.environ.get("REPLAY_LATENCY_MS", "0")),
         spreadsheet_id=os.environ.get("SPREADSHEET_ID", ""),
         sheet_ledger=os.environ.get("SHEET_LEDGER", "가계부 내역"),
         sheet_budget_raw=os.environ.get("SHEET_BUDGET_RAW", "예산_원본"),
+        sheet_ledger_view=os.environ.get("SHEET_LEDGER_VIEW", "가계부 내역 (최신순)"),
         ledger_header_row=int(os.environ.get("LEDGER_HEADER_ROW", "1")),
         ledger_insert_row=int(os.environ.get("LEDGER_INSERT_ROW", "2")),
+        ledger_insert_mode=os.environ.get("LEDGER_INSERT_MODE", "insert").strip().lower(),
         ledger_detail_col=os.environ.get("LEDGER_DETAIL_COL", "K"),
         ledger_auto_col=os.environ.get("LEDGER_AUTO_COL", "L"),
         ledger_category_col=os.environ.get("LEDGER_CATEGORY_COL", "M"),
@@ -48,4 +89,15 @@ def load_config() -> AppConfig:
         ledger_confidence_col=os.environ.get("LEDGER_CONFIDENCE_COL", "P"),
         ledger_reclass_col=os.environ.get("LEDGER_RECLASS_COL", "Q"),
         log_path=os.environ.get("APP_LOG_PATH", "./data/logs/pipeline.log"),
+        sheets_max_workers=int(os.environ.get("SHEETS_MAX_WORKERS", "4")),
+        normalize_workers=int(os.environ.get("NORMALIZE_WORKERS", "0")) or (os.cpu_count() or 1),
+        staging_csv=os.environ.get("STAGING_CSV", "0").strip() == "1",
+        key_index_path=Path(os.environ.get("KEY_INDEX_PATH", str(base / "ledger_keys.sqlite3"))).resolve(),
+        key_index_reconcile_days=int(os.environ.get("KEY_INDEX_RECONCILE_DAYS", "7")),
+        dedup_bloom=os.environ.get("DEDUP_BLOOM", "0").strip() == "1",
+        dedup_bloom_fp_rate=float(os.environ.get("DEDUP_BLOOM_FP_RATE", "0.001")),
+        dedup_overlap_days=int(os.environ.get("DEDUP_OVERLAP_DAYS", "3")),
+        dedup_fuzzy=os.environ.get("DEDUP_FUZZY", "1").strip() == "1",
+        dedup_fuzzy_threshold=float(os.environ.get("DEDUP_FUZZY_THRESHOLD", "0.85")),
+        dedup_fuzzy_minutes=int(os.environ.get("DEDUP_FUZZY_MINUTES", "60")),
     )
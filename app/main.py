@@ -1,16 +1,108 @@
-from app.config import load_config
-from app.pipeline.ingest import ingest_latest_export
+from pathlib import Path
+import argparse
+from app.config import AppConfig, load_config
+from app.pipeline.ingest import DriveArchiver, IngestedExport, ingest_backlog, ingest_latest_export
 from app.pipeline.unzip import unzip_latest
-from app.pipeline.normalize import normalize_latest
+from app.pipeline.normalize import normalize_batch, normalize_export, normalize_latest
 from app.pipeline.dedup import filter_new_rows
 from app.pipeline.apply_sheet import apply_to_ledger
 from app.pipeline.categorize import auto_categorize
 from app.pipeline.budget import refresh_budget_views
+from app.pipeline.manifest import ExportManifest
+from app.adapters.gmail import GmailCursor
+from app.adapters.sheets import SheetWriteBuffer
 from datetime import datetime
+from app.utils.dates import row_datetime
 from app.utils.logging import log
 
 
-def run_pipeline() -> int:
+def _export_source(cfg: AppConfig, manifest: ExportManifest, export: IngestedExport) -> tuple[Path, bytes | None]:
+    """What normalize reads: the unzip directory, or the export's bytes with UNZIP_MODE=memory."""
+    if export.path is not None and (cfg.unzip_mode != "memory" or cfg.unzip_artifacts):
+        unzip_path = manifest.artifact(export.digest, "unzip")
+        if unzip_path is None:
+            unzip_path = unzip_latest(cfg, export.path, export.digest)
+            manifest.mark(export.digest, "unzip", path=str(unzip_path))
+        log(f"unzip ok: {unzip_path}")
+        if cfg.unzip_mode != "memory":
+            return unzip_path, None
+    return export.path or Path(export.name), export.data
+
+
+def _apply_new_rows(cfg: AppConfig, normalized_path: Path) -> int:
+    new_rows = filter_new_rows(cfg, normalized_path)
+    log(f"dedup new rows: {len(new_rows)}")
+    if new_rows:
+        new_rows.sort(key=lambda row: row_datetime(row) or datetime.min, reverse=True)
+        buffer = SheetWriteBuffer(cfg.spreadsheet_id)
+        start_row = apply_to_ledger(cfg, new_rows, buffer)
+        auto_categorize(cfg, new_rows, buffer, start_row=start_row)
+        buffer.commit()
+        log("applied to ledger")
+        log("auto categorize done")
+        refresh_budget_views(cfg)
+        log("budget refresh done")
+    return len(new_rows)
+
+
+def _run_latest(
+    cfg: AppConfig,
+    manifest: ExportManifest,
+    cursor: GmailCursor,
+    archiver: DriveArchiver,
+) -> None:
+    export = ingest_latest_export(cfg, manifest, cursor, archiver)
+    if not export:
+        log("no new export attachment")
+        return
+
+    digest = export.digest
+    if manifest.done(digest, "apply"):
+        log(f"export unchanged, already applied: {digest[:16]}")
+        cursor.mark_processed(export.message_id)
+        return
+
+    log(f"ingest ok: {export.path or export.name + ' (memory)'} ({digest[:16]})")
+    normalized_path = manifest.artifact(digest, "normalize")
+    if normalized_path is None:
+        source, data = _export_source(cfg, manifest, export)
+        if data is None and source.is_dir():
+            normalized_path = normalize_latest(cfg, source)
+        else:
+            normalized_path = normalize_export(cfg, source, data)
+        manifest.mark(digest, "normalize", path=str(normalized_path))
+    log(f"normalize ok: {normalized_path}")
+    # applied rows are in the key index, so a rerun after a crash here finds nothing new
+    manifest.mark(digest, "apply", rows=_apply_new_rows(cfg, normalized_path))
+    cursor.mark_processed(export.message_id)
+
+
+def _run_backlog(
+    cfg: AppConfig,
+    manifest: ExportManifest,
+    cursor: GmailCursor,
+    archiver: DriveArchiver,
+) -> None:
+    exports = ingest_backlog(cfg, manifest, cursor, archiver)
+    if not exports:
+        log("no new export attachment")
+        return
+
+    pending = [e for e in exports if not manifest.done(e.digest, "apply")]
+    log(f"backlog: {len(exports)} exports, {len(pending)} not applied yet")
+    if pending:
+        normalized_path = normalize_batch(cfg, [_export_source(cfg, manifest, e) for e in pending])
+        log(f"normalize ok: {normalized_path}")
+        applied = _apply_new_rows(cfg, normalized_path)
+        log(f"backlog applied: {applied} rows from {len(pending)} exports")
+        # the batch's row count is not per export, so it is only logged
+        for e in pending:
+            manifest.mark(e.digest, "apply", batch=normalized_path.name)
+    for e in exports:
+        cursor.mark_processed(e.message_id)
+
+
+def run_pipeline(backlog: bool | None = None) -> int:
     cfg = load_config()
 
     cfg.data_dir.mkdir(parents=True, exist_ok=True)
@@ -22,37 +114,54 @@ def run_pipeline() -> int:
         raise RuntimeError("Missing SPREADSHEET_ID environment variable")
 
     log("start pipeline")
-    export_path = ingest_latest_export(cfg)
-    if not export_path:
-        log("no new export attachment")
-        return 0
-
-    log(f"ingest ok: {export_path}")
-    unzip_path = unzip_latest(cfg, export_path)
-    log(f"unzip ok: {unzip_path}")
-    normalized_path = normalize_latest(cfg, unzip_path)
-    log(f"normalize ok: {normalized_path}")
-    new_rows = filter_new_rows(cfg, normalized_path)
-    log(f"dedup new rows: {len(new_rows)}")
-    if new_rows:
-        def _parse_dt(row: dict) -> datetime:
-            date_str = row.get("날짜", "")
-            time_str = row.get("시간", "00:00:00")
-            try:
-                return datetime.fromisoformat(f"{date_str} {time_str}")
-            except Exception:
-                return datetime.min
-
-        new_rows.sort(key=_parse_dt, reverse=True)
-        apply_to_ledger(cfg, new_rows)
-        log("applied to ledger")
-        auto_categorize(cfg, new_rows)
-        log("auto categorize done")
-        refresh_budget_views(cfg)
-        log("budget refresh done")
+    backends = []
+    if cfg.google_backend != "live":
+        from app.adapters.google_replay import install
 
+        backends = install(cfg)
+        log(f"google backend: {cfg.google_backend} ({cfg.replay_dir})")
+    manifest = ExportManifest(cfg.manifest_path)
+    cursor = GmailCursor.load(cfg.gmail_cursor_path)
+    # Drive uploads run alongside the rest of the pipeline
+    archiver = DriveArchiver(cfg, manifest)
+    try:
+        if cfg.ingest_backlog if backlog is None else backlog:
+            _run_backlog(cfg, manifest, cursor, archiver)
+        else:
+            _run_latest(cfg, manifest, cursor, archiver)
+    finally:
+        failures = archiver.join()
+        for backend in backends:
+            log(f"{type(backend).__name__}: {backend.stats.summary()}")
+    if failures:
+        # cursor not saved: the next run fetches the message again and retries the upload
+        raise RuntimeError(f"Drive archive failed for {len(failures)} export(s)")
+    log("drive archive done")
+    # the Gmail cursor only moves once the run got this far
+    cursor.save()
     return 0
 
 
+def apply_staged(normalized_path: Path) -> int:
+    """Dedup and apply an existing normalize output (e.g. `normalize bulk`) without Gmail; returns rows applied."""
+    cfg = load_config()
+    if not cfg.spreadsheet_id:
+        raise RuntimeError("Missing SPREADSHEET_ID environment variable")
+    cfg.staging_dir.mkdir(parents=True, exist_ok=True)
+    log(f"apply staged: {normalized_path}")
+    return _apply_new_rows(cfg, normalized_path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="뱅크샐러드 → 가계부 파이프라인")
+    parser.add_argument("--backlog", action="store_true", help="처리하지 않은 모든 내보내기 메일을 한 번에 반영")
+    parser.add_argument("--staged", type=Path, default=None, help="정규화 결과(.stage/.csv)를 중복 제거 후 가계부에 반영")
+    args = parser.parse_args()
+    if args.staged is not None:
+        print(f"applied: {apply_staged(args.staged)} rows")
+        return 0
+    return run_pipeline(backlog=args.backlog or None)
+
+
 if __name__ == "__main__":
-    raise SystemExit(run_pipeline())
+    raise SystemExit(main())
@@ -1,14 +1,53 @@
 from app.config import AppConfig
-from app.adapters.sheets import insert_rows
+from app.adapters.sheets import (
+    SheetWriteBuffer,
+    append_rows,
+    ensure_sorted_view,
+    insert_rows,
+)
+from app.pipeline.dedup import record_applied_rows
 
 
-def apply_to_ledger(cfg: AppConfig, rows: list[dict]) -> None:
+def apply_to_ledger(cfg: AppConfig, rows: list[dict], buffer: SheetWriteBuffer | None = None) -> int | None:
+    """Write new rows to the ledger and return the first sheet row they occupy.
+
+    LEDGER_INSERT_MODE=insert (default) inserts at LEDGER_INSERT_ROW so the sheet
+    stays newest-first. LEDGER_INSERT_MODE=append adds them below the table without
+    shifting rows and keeps a newest-first SORT view in SHEET_LEDGER_VIEW.
+
+    The rows' keys go into the local dedup index once they are on the sheet:
+    right away for direct writes, on `buffer.commit()` for buffered ones.
+    """
     if not rows:
-        return
-    insert_rows(
-        spreadsheet_id=cfg.spreadsheet_id,
-        sheet_name=cfg.sheet_ledger,
-        header_row=cfg.ledger_header_row,
-        insert_row=cfg.ledger_insert_row,
-        rows=rows,
-    )
+        return None
+    if cfg.ledger_insert_mode == "append":
+        start_row = append_rows(
+            spreadsheet_id=cfg.spreadsheet_id,
+            sheet_name=cfg.sheet_ledger,
+            header_row=cfg.ledger_header_row,
+            rows=rows,
+            buffer=buffer,
+        )
+        ensure_sorted_view(
+            spreadsheet_id=cfg.spreadsheet_id,
+            source_sheet=cfg.sheet_ledger,
+            view_sheet=cfg.sheet_ledger_view,
+            header_row=cfg.ledger_header_row,
+            last_col=cfg.ledger_reclass_col,
+            buffer=buffer,
+        )
+    else:
+        insert_rows(
+            spreadsheet_id=cfg.spreadsheet_id,
+            sheet_name=cfg.sheet_ledger,
+            header_row=cfg.ledger_header_row,
+            insert_row=cfg.ledger_insert_row,
+            rows=rows,
+            buffer=buffer,
+        )
+        start_row = cfg.ledger_insert_row
+    if buffer is not None:
+        buffer.on_commit(lambda: record_applied_rows(cfg, rows))
+    else:
+        record_applied_rows(cfg, rows)
+    return start_row
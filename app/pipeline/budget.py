@@ -500,15 +500,10 @@ def _build_layout(cfg: BudgetConfig) -> dict:
 
 def deploy(cfg: BudgetConfig, spreadsheet_id: str, force: bool = False) -> None:
     """config 기반으로 Google Sheets 예산안 시트 생성 (비주얼 레이아웃)"""
-    from googleapiclient.discovery import build
-    from app.adapters.google_auth import get_credentials
+    from app.adapters.google_auth import scopes_for
+    from app.adapters.sheets import get_service
 
-    SCOPES = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive",
-    ]
-    creds = get_credentials(SCOPES)
-    service = build("sheets", "v4", credentials=creds)
+    service = get_service(scopes_for("sheets", "drive"))
 
     sheet_title = f"{cfg.period} 예산안"
 
@@ -1061,9 +1056,48 @@ def preview(cfg: BudgetConfig) -> str:
 # ── pipeline 통합용 (기존 인터페이스 유지) ────────────────
 
 
-def refresh_budget_views(cfg: AppConfig) -> None:
-    """기존 파이프라인 호환용. 추후 자동 갱신 로직 추가."""
-    return
+def refresh_budget_views(cfg: AppConfig) -> dict[str, int]:
+    """예산 기간의 항목별 실적(상세 기준 지출 합계)을 집계하고 초과 항목을 로그로 남긴다.
+
+    시트의 실적 열은 SUMIFS 수식이 스스로 갱신하므로 여기서는 쓰지 않는다.
+    가계부 내역은 날짜/금액/상세 3개 열만 타입 값으로 읽어 문자열 파싱 없이 합산한다.
+    """
+    from datetime import date
+
+    from app.adapters.sheets import fetch_typed_columns
+    from app.utils.logging import log
+
+    config_path = cfg.data_dir / "budget_config.yaml"
+    if not config_path.exists():
+        return {}
+    budget_cfg = load_budget_config(config_path)
+    if not budget_cfg.period_start or not budget_cfg.period_end:
+        return {}
+    ps_dt = date.fromisoformat(budget_cfg.period_start)
+    pe_dt = date.fromisoformat(budget_cfg.period_end)
+
+    cols = fetch_typed_columns(
+        cfg.spreadsheet_id,
+        cfg.sheet_ledger,
+        cfg.ledger_header_row,
+        {"날짜": "date", "금액": "won", "상세": "text"},
+        max_rows=None,
+    )
+    spent: dict[str, int] = {}
+    for d, amount, key in zip(cols["날짜"], cols["금액"], cols["상세"]):
+        if d is None or amount is None or not key or not ps_dt <= d <= pe_dt:
+            continue
+        # 지출은 음수로 기록됨 (시트 수식의 =-SUMIFS와 동일)
+        spent[key] = spent.get(key, 0) - amount
+
+    over = []
+    for _, _, item in budget_cfg.all_items():
+        annual = item.monthly * 12 + item.annual_from_bonus
+        if annual and spent.get(item.key, 0) > annual:
+            over.append(f"{item.key} {spent[item.key]:,}/{annual:,}")
+    log(f"budget {budget_cfg.period}: {len(spent)} items spent"
+        + (f", over budget: {', '.join(over)}" if over else ""))
+    return spent
 
 
 # ── CLI ───────────────────────────────────────────────────
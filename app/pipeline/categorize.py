@@ -1,14 +1,26 @@
 from app.config import AppConfig
 from app.adapters.llm import classify_detail
-from app.adapters.sheets import ensure_header, update_auto_category_column, update_category_block, ensure_checkbox_column
+from app.adapters.sheets import (
+    SheetWriteBuffer,
+    ensure_header,
+    update_auto_category_column,
+    update_category_block,
+    ensure_checkbox_column,
+)
 from app.utils.rules import load_rules, apply_rules
 import os
 from app.utils.logging import log
 
 
-def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
+def auto_categorize(
+    cfg: AppConfig,
+    rows: list[dict],
+    buffer: SheetWriteBuffer | None = None,
+    start_row: int | None = None,
+) -> None:
     if not rows:
         return
+    first_row = start_row or cfg.ledger_insert_row
 
     ensure_header(
         spreadsheet_id=cfg.spreadsheet_id,
@@ -16,6 +28,7 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
         header_row=cfg.ledger_header_row,
         col_letter=cfg.ledger_category_col,
         header_value="category",
+        buffer=buffer,
     )
     ensure_header(
         spreadsheet_id=cfg.spreadsheet_id,
@@ -23,6 +36,7 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
         header_row=cfg.ledger_header_row,
         col_letter=cfg.ledger_category_source_col,
         header_value="category_source",
+        buffer=buffer,
     )
     ensure_header(
         spreadsheet_id=cfg.spreadsheet_id,
@@ -30,6 +44,7 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
         header_row=cfg.ledger_header_row,
         col_letter=cfg.ledger_reviewed_col,
         header_value="reviewed",
+        buffer=buffer,
     )
     ensure_header(
         spreadsheet_id=cfg.spreadsheet_id,
@@ -37,6 +52,7 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
         header_row=cfg.ledger_header_row,
         col_letter=cfg.ledger_confidence_col,
         header_value="confidence",
+        buffer=buffer,
     )
     ensure_header(
         spreadsheet_id=cfg.spreadsheet_id,
@@ -44,6 +60,7 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
         header_row=cfg.ledger_header_row,
         col_letter=cfg.ledger_reclass_col,
         header_value="재분류필요",
+        buffer=buffer,
     )
 
     ensure_header(
@@ -52,6 +69,7 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
         header_row=cfg.ledger_header_row,
         col_letter=cfg.ledger_auto_col,
         header_value="자동카테고리",
+        buffer=buffer,
     )
 
     rules = load_rules()
@@ -93,8 +111,9 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
             spreadsheet_id=cfg.spreadsheet_id,
             sheet_name=cfg.sheet_ledger,
             auto_col=cfg.ledger_auto_col,
-            insert_row=cfg.ledger_insert_row,
+            insert_row=first_row,
             updates=updates,
+            buffer=buffer,
         )
 
     if category_rows:
@@ -103,16 +122,18 @@ def auto_categorize(cfg: AppConfig, rows: list[dict]) -> None:
             sheet_name=cfg.sheet_ledger,
             start_col=cfg.ledger_category_col,
             end_col=cfg.ledger_confidence_col,
-            insert_row=cfg.ledger_insert_row,
+            insert_row=first_row,
             values=category_rows,
+            buffer=buffer,
         )
 
         # Set checkbox validation for reclassify column for the inserted range
-        end_row = cfg.ledger_insert_row + len(category_rows) - 1
+        end_row = first_row + len(category_rows) - 1
         ensure_checkbox_column(
             spreadsheet_id=cfg.spreadsheet_id,
             sheet_name=cfg.sheet_ledger,
             col_letter=cfg.ledger_reclass_col,
-            start_row=cfg.ledger_insert_row,
+            start_row=first_row,
             end_row=end_row,
+            buffer=buffer,
         )
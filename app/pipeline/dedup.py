@@ -1,35 +1,333 @@
+from datetime import timedelta
 from pathlib import Path
+from typing import AbstractSet
+import argparse
 import csv
-from app.config import AppConfig
-from app.utils.hash import row_key, KEY_FIELDS
-from app.adapters.sheets import fetch_existing_keys, fetch_max_date
+import re
+from app.config import AppConfig, load_config
+from app.utils.bloom import BloomFilter
+from app.utils.dates import parse_date, parse_time
+from app.utils.hash import key_part, row_key, KEY_FIELDS
+from app.utils.key_index import SUSPECT_STATUSES, KeyIndex, parse_won
+from app.utils.logging import log
+from app.adapters.sheets import fetch_key_rows
+from app.pipeline.staging import iter_staged_rows
 
 
-def filter_new_rows(cfg: AppConfig, normalized_path: Path) -> list[dict]:
-    seen = fetch_existing_keys(
+def open_key_index(cfg: AppConfig) -> KeyIndex:
+    return KeyIndex(cfg.key_index_path, cfg.spreadsheet_id)
+
+
+def bloom_path(cfg: AppConfig) -> Path:
+    return cfg.key_index_path.with_suffix(".bloom")
+
+
+def rebuild_bloom(cfg: AppConfig, index: KeyIndex) -> BloomFilter:
+    # room to double before the false-positive rate degrades
+    capacity = max(2 * len(index), 10000)
+    return BloomFilter.create(bloom_path(cfg), capacity, cfg.dedup_bloom_fp_rate, index.iter_keys())
+
+
+def open_bloom(cfg: AppConfig, index: KeyIndex) -> BloomFilter:
+    """Open the prefilter, rebuilding it when missing, unreadable, full or out of step with the index.
+
+    The index keeps its key count in meta, so the staleness check costs no table scan.
+    """
+    path = bloom_path(cfg)
+    if path.exists():
+        try:
+            bloom = BloomFilter(path)
+        except ValueError:
+            bloom = None
+        if bloom is not None:
+            if not bloom.full and bloom.count == len(index):
+                return bloom
+            bloom.close()
+    return rebuild_bloom(cfg, index)
+
+
+def _sync_bloom(cfg: AppConfig, rows: list[dict], added: int) -> None:
+    # an out-of-step filter is rebuilt by open_bloom on the next dedup run
+    path = bloom_path(cfg)
+    if not cfg.dedup_bloom or not added or not path.exists():
+        return
+    try:
+        bloom = BloomFilter(path)
+    except ValueError:
+        return
+    with bloom:
+        bloom.update((row_key(r, KEY_FIELDS) for r in rows), count=added)
+
+
+def reconcile_key_index(cfg: AppConfig, index: KeyIndex, max_rows: int | None = 5000) -> tuple[int, int]:
+    """Make the local index match the ledger (keys, buckets and watermark); returns (added, removed).
+
+    max_rows=None compares the whole sheet; otherwise only the newest window is
+    compared, so rows deleted further back stay indexed until a full reconcile.
+    """
+    rows = fetch_key_rows(
         spreadsheet_id=cfg.spreadsheet_id,
         sheet_name=cfg.sheet_ledger,
         header_row=cfg.ledger_header_row,
         key_fields=KEY_FIELDS,
+        max_rows=max_rows,
+        # appended ledgers keep the newest rows at the bottom
+        newest_first=cfg.ledger_insert_mode != "append",
     )
-    max_date = fetch_max_date(
-        spreadsheet_id=cfg.spreadsheet_id,
-        sheet_name=cfg.sheet_ledger,
-        header_row=cfg.ledger_header_row,
-        date_field="날짜",
-    )
-    new_rows = []
+    added, removed = index.reconcile(rows, full=max_rows is None)
+    # removed keys stay set in the Bloom filter: only extra "maybe" answers, checked in the index
+    _sync_bloom(cfg, rows, added)
+    if removed:
+        log(f"key index: {removed} keys no longer in the ledger removed")
+    return added, removed
+
+
+def record_applied_rows(cfg: AppConfig, rows: list[dict]) -> None:
+    if not rows:
+        return
+    with open_key_index(cfg) as index:
+        added = index.add_rows(rows, KEY_FIELDS)
+    _sync_bloom(cfg, rows, added)
+
+
+# ── 유사 중복 ────────────────────────────────────────────
+# Re-exports of one payment can differ in time or merchant suffix (branch name),
+# so the exact key misses them. Rows are bucketed by (날짜, 금액, 결제수단) and only
+# merchants inside a bucket are compared, which keeps the stage linear.
+
+FUZZY_HEADERS = ["중복후보_위치", "중복후보_시간", "중복후보_내용", "유사도"]
+_MERCHANT_NOISE = re.compile(r"[\s\-_.,()\[\]/·]+")
+# what a re-export appends to a merchant: a branch such as "강남점", "본점", "2호점", "역삼센터"
+_BRANCH_SUFFIX = re.compile(r"[가-힣a-z0-9]{0,10}(?:점|센터|매장)")
+# shorter names are too generic to treat as the stem of a branch name
+_MIN_STEM = 2
+
+
+def _merchant_norm(value) -> str:
+    return _MERCHANT_NOISE.sub("", key_part(value)).lower()
+
+
+def _bounded_edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, or limit + 1 as soon as it must exceed `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
 
-    with normalized_path.open("r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            if max_date and row.get("날짜") and row.get("날짜") <= max_date:
+
+def merchant_similarity(a: str, b: str, threshold: float = 0.0) -> float:
+    """1 - normalized edit distance of normalized merchants.
+
+    One name being the other plus a branch suffix ("스타벅스" / "스타벅스강남점") is 1.0;
+    any other prefix ("쿠팡" / "쿠팡이츠") is scored by edit distance like the rest.
+    """
+    a, b = _merchant_norm(a), _merchant_norm(b)
+    if not a or not b:
+        return 1.0 if a == b else 0.0
+    short, long = sorted((a, b), key=len)
+    if len(short) >= _MIN_STEM and long.startswith(short) and _BRANCH_SUFFIX.fullmatch(long[len(short):]):
+        return 1.0
+    longest = max(len(a), len(b))
+    limit = int(longest * (1 - threshold))
+    return 1 - min(_bounded_edit_distance(a, b, limit), longest) / longest
+
+
+def _minutes_apart(a, b) -> float | None:
+    ta, tb = parse_time(a), parse_time(b)
+    if ta is None or tb is None:
+        return None
+    return abs((ta.hour * 60 + ta.minute + ta.second / 60) - (tb.hour * 60 + tb.minute + tb.second / 60))
+
+
+def split_fuzzy_duplicates(
+    cfg: AppConfig,
+    rows: list[dict],
+    index: KeyIndex,
+    exported_keys: AbstractSet[bytes] = frozenset(),
+) -> tuple[list[dict], list[dict]]:
+    """Split new rows into (kept, suspects); suspects carry FUZZY_HEADERS describing the match.
+
+    Only ledger rows are candidates: rows of one export are distinct payments
+    (repeat purchases at an arcade look exactly alike). A ledger row the export
+    still contains verbatim (`exported_keys`) is accounted for, and each ledger
+    row can explain at most one re-exported variant.
+    """
+    kept: list[dict] = []
+    suspects: list[dict] = []
+    candidates: dict[tuple, list[tuple[bytes, str | None, str]]] = {}
+    for row in rows:
+        day, amount = parse_date(row.get("날짜")), parse_won(row.get("금액"))
+        if day is None or amount is None:
+            kept.append(row)
+            continue
+        bucket = (day.isoformat(), amount, key_part(row.get("결제수단")))
+        if bucket not in candidates:
+            candidates[bucket] = [c for c in index.bucket(*bucket) if c[0] not in exported_keys]
+        match = None
+        for pos, (_, other_time, other_merchant) in enumerate(candidates[bucket]):
+            minutes = _minutes_apart(row.get("시간"), other_time)
+            if minutes is not None and minutes > cfg.dedup_fuzzy_minutes:
                 continue
+            score = merchant_similarity(row.get("내용"), other_merchant, cfg.dedup_fuzzy_threshold)
+            if score >= cfg.dedup_fuzzy_threshold:
+                match = (pos, other_time, other_merchant, score)
+                break
+        if match is None:
+            kept.append(row)
+            continue
+        pos, other_time, other_merchant, score = match
+        del candidates[bucket][pos]
+        suspects.append({
+            **row,
+            "중복후보_위치": "가계부",
+            "중복후보_시간": key_part(other_time),
+            "중복후보_내용": other_merchant,
+            "유사도": f"{score:.2f}",
+        })
+    return kept, suspects
+
+
+def write_suspects(path: Path, suspects: list[dict]) -> None:
+    fieldnames = list(suspects[0].keys())
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(suspects)
+
+
+def filter_new_rows(cfg: AppConfig, normalized_path: Path) -> list[dict]:
+    """Drop rows already in the ledger using the local key index.
+
+    `normalized_path` is a normalize output: .stage (typed columnar) or .csv.
 
+    The index is reconciled against the sheet on first use and then every
+    KEY_INDEX_RECONCILE_DAYS; in between no ledger rows are downloaded. After a
+    key format change the whole ledger is read once to rebuild it.
+
+    Rows dated more than DEDUP_OVERLAP_DAYS before the watermark (latest ledger
+    transaction) are treated as already imported; everything newer, including
+    late-posted rows on or just before the watermark day, is checked by key.
+
+    With DEDUP_BLOOM=1 a memory-mapped Bloom filter answers "definitely new"
+    for most rows, and only its possible hits are looked up in the index.
+
+    Fuzzy-duplicate suspects are recorded in the index as held and stay out of
+    the ledger until `release`d (inserted on the next run) or `confirm`ed
+    (dropped for good); see the `suspects` command.
+    """
+    new_rows = []
+    new_keys = []
+    with open_key_index(cfg) as index:
+        if index.needs_full_reconcile:
+            reconcile_key_index(cfg, index, max_rows=None)
+        elif index.needs_reconcile(cfg.key_index_reconcile_days):
+            reconcile_key_index(cfg, index)
+        watermark = index.watermark
+        cutoff = watermark.date() - timedelta(days=cfg.dedup_overlap_days) if watermark else None
+        batch_seen: set[bytes] = set()
+        known: set[bytes] = set()
+        bloom = open_bloom(cfg, index) if cfg.dedup_bloom else None
+
+        # the cutoff is applied to raw date ordinals before rows are decoded; rows stay typed
+        for row in iter_staged_rows(normalized_path, min_date=cutoff, typed=True):
             key = row_key(row, KEY_FIELDS)
-            if key in seen:
+            if key in batch_seen:
+                continue
+            if (bloom is None or key in bloom) and index.contains(key):
+                known.add(key)
                 continue
-            seen.add(key)
+            batch_seen.add(key)
             new_rows.append(row)
+            new_keys.append(key)
+        if bloom is not None:
+            bloom.close()
+
+        # suspects decided earlier skip the fuzzy stage: released ones go in, confirmed ones never do
+        released: list[dict] = []
+        statuses = index.suspect_status(new_keys)
+        if statuses:
+            undecided = []
+            for row, key in zip(new_rows, new_keys):
+                status = statuses.get(key, "held")
+                if status == "held":
+                    undecided.append(row)
+                elif status == "released":
+                    released.append(row)
+            confirmed = len(new_rows) - len(undecided) - len(released)
+            if released or confirmed:
+                log(f"fuzzy duplicates decided: {len(released)} released, {confirmed} confirmed")
+            new_rows = undecided
+
+        if cfg.dedup_fuzzy and new_rows:
+            new_rows, suspects = split_fuzzy_duplicates(cfg, new_rows, index, known)
+            if suspects:
+                keyed = [(row_key(r, KEY_FIELDS), r) for r in suspects]
+                fresh = index.hold_suspects(keyed)
+                out = cfg.staging_dir / f"suspected_duplicates_{normalized_path.stem}.csv"
+                write_suspects(out, [{"키": key.hex(), **r} for key, r in keyed])
+                log(f"fuzzy duplicates held back: {len(suspects)} ({fresh} new) -> {out}")
+        new_rows += released
 
     return new_rows
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="가계부 중복 키 인덱스 관리")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("reconcile", help="시트에서 키를 다시 읽어 로컬 인덱스에 병합")
+    rec.add_argument("--all", action="store_true", help="최근 5000행이 아닌 전체 행을 읽음")
+    sub.add_parser("rebuild-bloom", help="키 인덱스로 Bloom 필터를 다시 생성")
+    sub.add_parser("stats", help="인덱스 상태 출력")
+    sus = sub.add_parser("suspects", help="유사 중복으로 보류된 행 목록")
+    sus.add_argument("--status", choices=SUSPECT_STATUSES, default="held", help="표시할 상태(기본 held)")
+    for name, text in (("release", "실제 거래로 판정: 다음 실행에서 가계부에 반영"),
+                       ("confirm", "중복으로 판정: 이후 내보내기에서도 계속 제외")):
+        decide = sub.add_parser(name, help=text)
+        decide.add_argument("keys", nargs="*", help="suspected_duplicates CSV의 키(hex)")
+        decide.add_argument("--all", action="store_true", help="보류 중인 모든 행")
+    args = parser.parse_args()
+    if args.command in ("release", "confirm") and not args.keys and not args.all:
+        parser.error("키를 지정하거나 --all을 사용하세요")
+
+    cfg = load_config()
+    with open_key_index(cfg) as index:
+        if args.command == "reconcile":
+            added, removed = reconcile_key_index(cfg, index, max_rows=None if args.all else 5000)
+            print(f"reconciled: +{added} -{removed} keys (total {len(index)})")
+        elif args.command == "suspects":
+            for key, status, row, flagged_at in index.list_suspects(args.status):
+                print(f"{key.hex()}  {status:<9} {flagged_at}  {row.get('날짜')} {row.get('시간')} "
+                      f"{row.get('금액')} {row.get('내용')} ~ {row.get('중복후보_내용')} ({row.get('유사도')})")
+        elif args.command in ("release", "confirm"):
+            keys = None if args.all else [bytes.fromhex(k) for k in args.keys]
+            status = "released" if args.command == "release" else "confirmed"
+            print(f"{status}: {index.set_suspect_status(status, keys)}")
+        elif args.command == "rebuild-bloom":
+            with rebuild_bloom(cfg, index) as bloom:
+                print(f"bloom: {bloom.count} keys, capacity {bloom.capacity}, "
+                      f"{bloom.nbits // 8:,} bytes, {bloom.nhashes} hashes")
+        else:
+            print(f"path: {index.path}")
+            print(f"spreadsheet: {index.get_meta('spreadsheet_id')}")
+            print(f"keys: {len(index)}")
+            print(f"watermark: {index.watermark}")
+            print(f"reconciled_at: {index.get_meta('reconciled_at')}")
+            print(f"full_reconcile_pending: {index.needs_full_reconcile}")
+            if bloom_path(cfg).exists():
+                try:
+                    with BloomFilter(bloom_path(cfg)) as bloom:
+                        print(f"bloom: {bloom.count}/{bloom.capacity} keys")
+                except ValueError as exc:
+                    print(f"bloom: unreadable, rebuilt on the next run ({exc})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,17 +1,141 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
 from pathlib import Path
+import os
 from app.config import AppConfig
-from app.adapters.gmail import find_latest_attachment
+from app.adapters.gmail import Attachment, GmailCursor, find_latest_attachment, find_unprocessed_attachments
 from app.adapters.drive import save_to_drive
+from app.pipeline.manifest import ExportManifest
+from app.utils.logging import log
 
 
-def ingest_latest_export(cfg: AppConfig) -> Path | None:
-    attachment = find_latest_attachment(cfg.gmail_query)
+@dataclass
+class IngestedExport:
+    path: Path | None  # inbox copy; None with UNZIP_MODE=memory unless UNZIP_ARTIFACTS=1
+    digest: str  # sha256 of the export bytes; keys every later stage
+    message_id: str | None = None
+    name: str = ""  # file name, also the Drive file name
+    data: bytes | None = None  # the export bytes with UNZIP_MODE=memory
+
+
+def _archive(cfg: AppConfig, export: IngestedExport) -> None:
+    save_to_drive(
+        export.path or Path(export.name),
+        cfg.drive_folder,
+        cfg.drive_folder_cache_path,
+        cfg.drive_upload_sessions_path,
+        data=export.data,
+    )
+
+
+class DriveArchiver:
+    """Archives ingested exports to Drive on a worker thread while the pipeline goes on.
+
+    Nothing downstream reads the Drive copy, so uploads overlap unzip, normalize
+    and the sheet writes. `join()` waits for them, records the drive stage in the
+    manifest (from the calling thread) and returns the failures.
+    """
+
+    def __init__(self, cfg: AppConfig, manifest: ExportManifest | None = None):
+        self.cfg = cfg
+        self.manifest = manifest
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="drive-archive")
+        self._jobs: list[tuple[IngestedExport, Future]] = []
+
+    def submit(self, export: IngestedExport) -> None:
+        self._jobs.append((export, self._pool.submit(_archive, self.cfg, export)))
+
+    def join(self) -> list[tuple[IngestedExport, BaseException]]:
+        failures = []
+        for export, future in self._jobs:
+            exc = future.exception()
+            if exc is not None:
+                log(f"drive archive failed: {export.name}: {exc!r}")
+                failures.append((export, exc))
+            elif self.manifest is not None:
+                self.manifest.mark(export.digest, "drive", folder=self.cfg.drive_folder)
+        self._jobs.clear()
+        self._pool.shutdown()
+        return failures
+
+
+def _store(
+    cfg: AppConfig,
+    attachment: Attachment,
+    name: str,
+    manifest: ExportManifest | None,
+    archiver: DriveArchiver | None = None,
+) -> IngestedExport:
+    """Move the downloaded attachment into the inbox and archive it to Drive, skipping stages already done.
+
+    The file goes to inbox/<digest16>/<name>, like unzipped/<digest16>, so a later
+    export with the same attachment name never overwrites one still being
+    processed or resumed. An attachment read into memory (UNZIP_MODE=memory) is
+    only written there as an audit copy with UNZIP_ARTIFACTS=1; later stages use
+    its bytes. With an `archiver` the Drive upload is only queued.
+    """
+    digest = attachment.sha256
+    local_path: Path | None = cfg.inbox_dir / digest[:16] / name
+    if attachment.data is not None and not cfg.unzip_artifacts:
+        local_path = None
+        if manifest is not None and not manifest.done(digest, "ingest"):
+            manifest.mark(digest, "ingest", export=attachment.name, size=attachment.size)
+    elif manifest is None or manifest.artifact(digest, "ingest") is None:
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        if attachment.data is not None:
+            local_path.write_bytes(attachment.data)
+        else:
+            # the download sits in the inbox already, so this is a rename
+            os.replace(attachment.path, local_path)
+        if manifest is not None:
+            manifest.mark(digest, "ingest", path=str(local_path), export=attachment.name, size=attachment.size)
+    else:
+        if attachment.path is not None:
+            attachment.path.unlink(missing_ok=True)
+        local_path = manifest.artifact(digest, "ingest")
+
+    export = IngestedExport(
+        path=local_path, digest=digest, message_id=attachment.message_id, name=name, data=attachment.data
+    )
+    if manifest is None or not manifest.done(digest, "drive"):
+        if archiver is not None:
+            archiver.submit(export)
+        else:
+            _archive(cfg, export)
+            if manifest is not None:
+                manifest.mark(digest, "drive", folder=cfg.drive_folder)
+    return export
+
+
+def ingest_latest_export(
+    cfg: AppConfig,
+    manifest: ExportManifest | None = None,
+    cursor: GmailCursor | None = None,
+    archiver: DriveArchiver | None = None,
+) -> IngestedExport | None:
+    attachment = find_latest_attachment(cfg.gmail_query, cursor, cfg.inbox_dir, cfg.unzip_mode == "memory")
     if attachment is None:
         return None
+    return _store(cfg, attachment, attachment.name, manifest, archiver)
+
 
-    local_path = cfg.inbox_dir / attachment.name
-    local_path.write_bytes(attachment.data)
-    save_to_drive(local_path, cfg.drive_folder)
-    return local_path
+def ingest_backlog(
+    cfg: AppConfig,
+    manifest: ExportManifest,
+    cursor: GmailCursor,
+    archiver: DriveArchiver | None = None,
+) -> list[IngestedExport]:
+    """All export attachments of unprocessed messages, oldest first (INGEST_BACKLOG=1)."""
+    attachments = find_unprocessed_attachments(
+        cfg.gmail_query, cursor, cfg.gmail_max_workers, cfg.inbox_dir, cfg.unzip_mode == "memory"
+    )
+    exports = []
+    for attachment in attachments:
+        # exports usually share one file name; the receive time keeps their Drive copies apart
+        received = datetime.fromtimestamp((attachment.received_at or 0) / 1000)
+        name = f"{received:%Y%m%d_%H%M%S}_{attachment.name}"
+        exports.append(_store(cfg, attachment, name, manifest, archiver))
+    return exports
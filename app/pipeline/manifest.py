@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+import json
+import os
+
+
+# newest entries kept; older exports are never resumed
+_MAX_ENTRIES = 100
+
+
+class ExportManifest:
+    """Completed pipeline stages per export, keyed by the SHA-256 of the export bytes.
+
+    data/export_manifest.json:
+      {"<sha256>": {"name": ..., "updated_at": ..., "stages": {"ingest": {...}, ...}}}
+    A stage is recorded only after it finished, so a crashed run resumes from the
+    first stage that is missing and an unchanged export stops after hashing.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: dict[str, dict] = {}
+        if path.exists():
+            try:
+                self.entries = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def stage(self, digest: str, name: str) -> dict | None:
+        return self.entries.get(digest, {}).get("stages", {}).get(name)
+
+    def done(self, digest: str, name: str) -> bool:
+        return self.stage(digest, name) is not None
+
+    def artifact(self, digest: str, name: str) -> Path | None:
+        """Path a finished stage produced, if it is still on disk."""
+        info = self.stage(digest, name) or {}
+        path = info.get("path")
+        if path and Path(path).exists():
+            return Path(path)
+        return None
+
+    def mark(self, digest: str, name: str, **info) -> None:
+        entry = self.entries.setdefault(digest, {"stages": {}})
+        if "export" in info:
+            entry["name"] = info.pop("export")
+        entry["stages"][name] = {**info, "at": datetime.now().isoformat(timespec="seconds")}
+        entry["updated_at"] = entry["stages"][name]["at"]
+        self._save()
+
+    def _save(self) -> None:
+        if len(self.entries) > _MAX_ENTRIES:
+            newest = sorted(self.entries.items(), key=lambda kv: kv[1].get("updated_at", ""), reverse=True)
+            self.entries = dict(newest[:_MAX_ENTRIES])
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(self.entries, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
 from pathlib import Path
-from datetime import datetime, date, time
-import csv
+from datetime import datetime, date, time, timedelta
+from typing import Iterable, Iterator
+import argparse
+import io
+import zipfile
 import openpyxl
-from app.config import AppConfig
+from app.config import AppConfig, load_config
+from app.utils.dates import parse_date, row_datetime
+from app.utils.logging import log
 
 
 STANDARD_HEADERS = [
@@ -33,60 +38,316 @@ def _format_cell(value) -> str:
         return value.isoformat()
     if isinstance(value, time):
         return value.strftime("%H:%M:%S")
+    if isinstance(value, float) and value.is_integer():
+        # 금액 comes back as -7200.0; the ledger reads it as -7200
+        return str(int(value))
     return str(value).strip()
 
 
+EXPORT_SHEET = "가계부 내역"
+# export columns copied as-is; 상세/원본파일/원본행ID are filled in here
+_EXPORT_FIELDS = ["날짜", "시간", "타입", "대분류", "소분류", "내용", "금액", "화폐", "결제수단", "메모"]
+
+
+def iter_export_rows(source_path: Path, source=None) -> Iterator[dict]:
+    """Stream the export's ledger sheet as STANDARD_HEADERS dicts.
+
+    read_only + values_only keeps memory bounded: the header is resolved to
+    tuple indexes once and each sheet row is a plain tuple. `source` (a file
+    object) is read instead of `source_path` when given, e.g. a zip member.
+    """
+    wb = openpyxl.load_workbook(source or source_path, read_only=True, data_only=True)
+    try:
+        if EXPORT_SHEET not in wb.sheetnames:
+            raise RuntimeError(f"Sheet '{EXPORT_SHEET}' not found in export")
+        rows = wb[EXPORT_SHEET].iter_rows(values_only=True)
+        header = next(rows, ())
+        header_map = {str(v).strip(): idx for idx, v in enumerate(header) if v}
+        columns = [(name, header_map.get(name)) for name in _EXPORT_FIELDS]
+        date_idx = header_map.get("날짜", 0)
+
+        for row_idx, values in enumerate(rows, start=2):
+            width = len(values)
+            if date_idx >= width or values[date_idx] is None:
+                continue
+            row = {
+                name: _format_cell(values[idx]) if idx is not None and idx < width else ""
+                for name, idx in columns
+            }
+            row["상세"] = ""
+            row["원본파일"] = source_path.name
+            row["원본행ID"] = str(row_idx)
+            yield row
+    finally:
+        wb.close()
+
+
+def write_normalized(cfg: AppConfig, rows: Iterable[dict], name: str) -> Path:
+    """Write staging/<name>.stage (typed columnar, see app.pipeline.staging).
+
+    STAGING_CSV=1 additionally writes the old staging/<name>.csv for inspection.
+    """
+    from app.pipeline.staging import write_csv, write_staging
+
+    out_path = cfg.staging_dir / f"{name}.stage"
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    if cfg.staging_csv:
+        rows = list(rows)
+        write_csv(out_path.with_suffix(".csv"), rows, STANDARD_HEADERS)
+    write_staging(out_path, rows, STANDARD_HEADERS)
+    return out_path
+
+
+def take_until(rows: Iterable[dict], floor: date) -> Iterator[dict]:
+    """Yield newest-first export rows, stopping at the first one dated before `floor`.
+
+    Early exit is only safe while the export really is newest-first: once a row
+    is newer than the one before it, the rest is read in full (dedup still drops
+    old rows).
+    """
+    prev: date | None = None
+    ordered = True
+    for count, row in enumerate(rows):
+        d = parse_date(row.get("날짜"))
+        if d is not None:
+            if ordered and prev is not None and d > prev:
+                ordered = False
+                log(f"normalize: export not newest-first at row {row.get('원본행ID')}, full scan")
+            prev = d
+            if ordered and d < floor:
+                log(f"normalize: stopped after {count} rows (before {floor.isoformat()})")
+                return
+        yield row
+
+
+def _read_floor(cfg: AppConfig) -> date | None:
+    """Watermark minus DEDUP_OVERLAP_DAYS from the dedup key index, if there is one."""
+    if not cfg.key_index_path.exists():
+        return None
+    from app.utils.key_index import KeyIndex
+
+    with KeyIndex(cfg.key_index_path, cfg.spreadsheet_id) as index:
+        watermark = index.watermark
+    if watermark is None:
+        return None
+    return watermark.date() - timedelta(days=cfg.dedup_overlap_days)
+
+
 def normalize_latest(cfg: AppConfig, unzip_dir: Path) -> Path:
+    """Normalize the export in `unzip_dir`, reading only rows newer than the dedup window.
+
+    Exports carry the whole history newest-first, so reading stops once rows fall
+    before the last imported watermark minus DEDUP_OVERLAP_DAYS (see `take_until`).
+    """
+    return _normalize_incremental(cfg, source_rows(unzip_dir))
+
+
+def normalize_export(cfg: AppConfig, export_path: Path, data: bytes | None = None) -> Path:
+    """UNZIP_MODE=memory: normalize straight from the export (its bytes, when given), no unzipped/ files."""
+    return _normalize_incremental(cfg, source_rows(export_path, data))
+
+
+def occurrence_keys(rows: Iterable[dict]) -> Iterator[tuple[tuple[bytes, int], dict]]:
+    """((row key, n), row) where n counts earlier identical rows in the same export.
+
+    Merging several exports on these keys drops a row repeated across exports
+    but keeps legitimately identical transactions within one export (two equal
+    purchases in the same minute).
+    """
+    from app.utils.hash import row_key
+
+    seen: dict[bytes, int] = {}
+    for row in rows:
+        key = row_key(row)
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        yield (key, n), row
+
+
+def normalize_batch(cfg: AppConfig, sources: list[tuple[Path, bytes | None]]) -> Path:
+    """Normalize several exports (oldest first) into one staging output for a single dedup pass.
+
+    `sources` are (path, bytes or None) pairs as `source_rows` takes them. Each
+    is read incrementally like normalize_latest; a row present in several
+    exports keeps the version from the newest one (see `occurrence_keys`).
+    """
+    floor = _read_floor(cfg)
+    merged: dict[tuple[bytes, int], dict] = {}
+    for source, data in reversed(sources):
+        rows = source_rows(source, data)
+        if floor is not None:
+            rows = take_until(rows, floor)
+        for key, row in occurrence_keys(rows):
+            merged.setdefault(key, row)
+    ordered = sorted(merged.values(), key=lambda row: row_datetime(row) or datetime.min, reverse=True)
     stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    out_path = cfg.staging_dir / f"normalized_{stamp}.csv"
-    out_path.parent.mkdir(parents=True, exist_ok=True)
+    return write_normalized(cfg, ordered, f"normalized_batch_{stamp}")
 
-    # pick first xlsx file in unzip_dir
-    xlsx_files = sorted(p for p in unzip_dir.iterdir() if p.suffix.lower() == ".xlsx")
-    if not xlsx_files:
-        raise RuntimeError(f"No xlsx found in {unzip_dir}")
 
-    source_path = xlsx_files[0]
-    wb = openpyxl.load_workbook(source_path, data_only=True)
-    if "가계부 내역" not in wb.sheetnames:
-        raise RuntimeError("Sheet '가계부 내역' not found in export")
+def source_rows(source: Path, data: bytes | None = None) -> Iterator[dict]:
+    """Rows of one export: an unzip directory, a zip (first xlsx member, in memory) or an xlsx.
 
-    ws = wb["가계부 내역"]
+    With `data` the export's bytes are already in memory (UNZIP_MODE=memory) and
+    `source` only names it.
+    """
+    if data is not None:
+        if source.suffix.lower() != ".zip":
+            return iter_export_rows(source, io.BytesIO(data))
+        archive: Path | io.BytesIO = io.BytesIO(data)
+    elif source.is_dir():
+        # pick first xlsx file in the directory
+        xlsx_files = sorted(p for p in source.iterdir() if p.suffix.lower() == ".xlsx")
+        if not xlsx_files:
+            raise RuntimeError(f"No xlsx found in {source}")
+        return iter_export_rows(xlsx_files[0])
+    elif source.suffix.lower() != ".zip":
+        return iter_export_rows(source)
+    else:
+        archive = source
+    with zipfile.ZipFile(archive) as zf:
+        members = sorted(n for n in zf.namelist() if n.lower().endswith(".xlsx"))
+    if not members:
+        raise RuntimeError(f"No xlsx found in {source}")
+    # openpyxl needs random access, which ZipExtFile only offers by re-decompressing
+    return iter_export_rows(Path(members[0]), _read_member(archive, members[0]))
 
-    # Map headers from first row
-    header_row = [ws.cell(row=1, column=c).value for c in range(1, ws.max_column + 1)]
-    header_map = {str(v).strip(): idx + 1 for idx, v in enumerate(header_row) if v}
 
-    def get_cell(row_idx: int, header_name: str) -> str:
-        col = header_map.get(header_name)
-        if not col:
-            return ""
-        return _format_cell(ws.cell(row=row_idx, column=col).value)
+def _read_member(archive: Path | io.BytesIO, member: str) -> io.BytesIO:
+    from app.pipeline.unzip import zip_password
 
-    with out_path.open("w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=STANDARD_HEADERS)
-        writer.writeheader()
+    with zipfile.ZipFile(archive) as zf:
+        return io.BytesIO(zf.read(member, pwd=zip_password()))
 
-        for r in range(2, ws.max_row + 1):
-            date_val = ws.cell(row=r, column=header_map.get("날짜", 1)).value
-            if date_val is None:
-                continue
 
-            row = {
-                "날짜": get_cell(r, "날짜"),
-                "시간": get_cell(r, "시간"),
-                "타입": get_cell(r, "타입"),
-                "대분류": get_cell(r, "대분류"),
-                "소분류": get_cell(r, "소분류"),
-                "내용": get_cell(r, "내용"),
-                "금액": get_cell(r, "금액"),
-                "화폐": get_cell(r, "화폐"),
-                "결제수단": get_cell(r, "결제수단"),
-                "메모": get_cell(r, "메모"),
-                "상세": "",
-                "원본파일": source_path.name,
-                "원본행ID": str(r),
-            }
-            writer.writerow(row)
+def _normalize_incremental(cfg: AppConfig, rows: Iterable[dict]) -> Path:
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    floor = _read_floor(cfg)
+    if floor is not None:
+        rows = take_until(rows, floor)
+    return write_normalized(cfg, rows, f"normalized_{stamp}")
 
-    return out_path
+
+# ── 일괄 정규화 (과거 내보내기 백필) ─────────────────────
+
+def discover_exports(cfg: AppConfig) -> list[tuple[Path, str | None]]:
+    """(file, zip member) for every export xlsx under inbox and unzipped, newest file first."""
+    found: list[tuple[Path, str | None]] = []
+    candidates = []
+    if cfg.inbox_dir.exists():
+        # inbox/<digest16>/<name>, plus files dropped into the inbox by hand
+        candidates += [p for p in cfg.inbox_dir.rglob("*") if p.is_file()]
+    if cfg.unzip_dir.exists():
+        candidates += [p for p in cfg.unzip_dir.rglob("*.xlsx") if p.is_file()]
+    candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+    for path in candidates:
+        suffix = path.suffix.lower()
+        if suffix == ".xlsx" and not path.name.startswith("~$"):
+            found.append((path, None))
+        elif suffix == ".zip":
+            try:
+                with zipfile.ZipFile(path) as zf:
+                    found += [(path, name) for name in zf.namelist() if name.lower().endswith(".xlsx")]
+            except zipfile.BadZipFile as exc:
+                log(f"normalize: skipped unreadable zip {path.name}: {exc}")
+    return found
+
+
+def _normalize_export(path: Path, member: str | None, part_path: Path) -> int:
+    # process-pool worker: one workbook per task, written to its own .stage part so
+    # only the row count travels back to the parent
+    from app.pipeline.staging import write_staging
+
+    if member is None:
+        rows = iter_export_rows(path)
+    else:
+        rows = iter_export_rows(Path(member), _read_member(path, member))
+    return write_staging(part_path, rows, STANDARD_HEADERS)
+
+
+def normalize_bulk(cfg: AppConfig, out_path: Path | None = None, workers: int | None = None) -> tuple[Path, int]:
+    """Normalize every discovered export in a process pool into one staging output.
+
+    Workers write one .stage part per export; the parent merges the parts by
+    `occurrence_keys` (the newest export wins) and writes the rows newest-first
+    like the ledger, holding only keys and sort positions in memory. Exports that
+    cannot be read are logged and skipped. Returns (path, row count).
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    import tempfile
+
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    from app.pipeline.staging import StagingTable, write_csv, write_staging
+    from app.utils.hash import KEY_FIELDS
+
+    exports = discover_exports(cfg)
+    if not exports:
+        raise RuntimeError(f"No export found under {cfg.inbox_dir} or {cfg.unzip_dir}")
+
+    cfg.staging_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cfg.staging_dir, prefix="bulk_parts_") as tmp:
+        with ProcessPoolExecutor(max_workers=workers or cfg.normalize_workers) as pool:
+            futures = [
+                pool.submit(_normalize_export, path, member, Path(tmp) / f"{n:05d}.stage")
+                for n, (path, member) in enumerate(exports)
+            ]
+            parts: list[StagingTable] = []
+            seen: set[tuple[bytes, int]] = set()
+            entries: list[tuple[datetime, int, int]] = []
+            for n, ((path, member), future) in enumerate(zip(exports, futures)):
+                label = f"{path.name}:{member}" if member else path.name
+                try:
+                    count = future.result()
+                except (zipfile.BadZipFile, InvalidFileException, RuntimeError) as exc:
+                    log(f"normalize: skipped {label}: {exc}")
+                    continue
+                table = StagingTable(Path(tmp) / f"{n:05d}.stage")
+                parts.append(table)
+                part = len(parts) - 1
+                before = len(entries)
+                key_rows = ({f: table.value(f, i) for f in KEY_FIELDS} for i in range(count))
+                for i, (key, row) in enumerate(occurrence_keys(key_rows)):
+                    if key not in seen:
+                        seen.add(key)
+                        entries.append((row_datetime(row) or datetime.min, part, i))
+                log(f"normalized {label}: {count} rows, {len(entries) - before} new")
+
+        entries.sort(key=lambda e: e[0], reverse=True)
+        ordered = (parts[part].row(i) for _, part, i in entries)
+        try:
+            if out_path is None:
+                stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                out_path = write_normalized(cfg, ordered, f"normalized_bulk_{stamp}")
+            else:
+                out_path.parent.mkdir(parents=True, exist_ok=True)
+                if out_path.suffix.lower() == ".csv":
+                    write_csv(out_path, ordered, STANDARD_HEADERS)
+                else:
+                    write_staging(out_path, ordered, STANDARD_HEADERS)
+        finally:
+            for table in parts:
+                table.close()
+    return out_path, len(entries)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="뱅크샐러드 내보내기 정규화")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bulk = sub.add_parser("bulk", help="inbox/unzipped의 모든 내보내기를 병렬 정규화해 하나의 스테이징 파일로 병합")
+    bulk.add_argument("--workers", type=int, default=None, help="프로세스 수(기본 NORMALIZE_WORKERS)")
+    bulk.add_argument("--out", type=Path, default=None, help="출력 경로(.csv면 CSV, 그 외 .stage 포맷)")
+    bulk.add_argument("--apply", action="store_true", help="병합 결과를 바로 중복 제거 후 가계부에 반영")
+    args = parser.parse_args()
+
+    cfg = load_config()
+    out_path, count = normalize_bulk(cfg, args.out, args.workers)
+    print(f"{count} rows -> {out_path}")
+    if args.apply:
+        from app.main import apply_staged
+
+        print(f"applied: {apply_staged(out_path)} rows")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
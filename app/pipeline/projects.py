@@ -1366,12 +1366,9 @@ GANTT_SHEET_TITLE = "전체 현황"
 
 def deploy(tiers: list[TierCharters], force: bool = False) -> None:
     """스프레드시트에 전체 현황 + 프로젝트별 탭 생성"""
-    from googleapiclient.discovery import build
-    from app.adapters.google_auth import get_credentials
+    from app.adapters.sheets import get_service
 
-    SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = get_credentials(SCOPES)
-    service = build("sheets", "v4", credentials=creds)
+    service = get_service()
 
     spreadsheet_id = _create_or_get_spreadsheet(service)
 
@@ -1517,18 +1514,13 @@ def export_feedback(
 ) -> None:
     """각 프로젝트 탭의 FEEDBACK 섹션 읽기 → YAML 업데이트"""
     from datetime import date
-    from googleapiclient.discovery import build
-    from app.adapters.google_auth import get_credentials
+    from app.adapters.sheets import run_concurrent
 
     sid = os.environ.get("PROJECT_SPREADSHEET_ID", "")
     if not sid:
         print("ERROR: PROJECT_SPREADSHEET_ID 환경변수 필요")
         sys.exit(1)
 
-    SCOPES = ["https://www.googleapis.com/auth/spreadsheets"]
-    creds = get_credentials(SCOPES)
-    service = build("sheets", "v4", credentials=creds)
-
     today = date.today().isoformat()
 
     # YAML 파일 → raw dict 매핑 (수정 후 저장용)
@@ -1539,103 +1531,109 @@ def export_feedback(
 
     updated_count = 0
 
-    for tier in tiers:
-        for proj in tier.projects:
-            # 프로젝트 탭 전체 읽기 (A열만)
-            try:
-                resp = service.spreadsheets().values().get(
-                    spreadsheetId=sid,
-                    range=f"'{proj.name}'!A1:N100",
-                ).execute()
-            except Exception as e:
-                print(f"  SKIP {proj.name}: {e}")
-                continue
-
-            rows = resp.get("values", [])
-
-            # FEEDBACK 배너 행 찾기
-            fb_start = None
-            for i, row in enumerate(rows):
-                if row and "📝 FEEDBACK" in str(row[0]):
-                    fb_start = i + 1  # 배너 다음 행부터 입력
-                    break
+    # 프로젝트 탭 읽기는 서로 독립적 → 스레드 풀로 동시 조회 (SHEETS_MAX_WORKERS)
+    all_projects = [proj for tier in tiers for proj in tier.projects]
+    responses = run_concurrent(
+        [
+            lambda service, name=proj.name: service.spreadsheets().values().get(
+                spreadsheetId=sid,
+                range=f"'{name}'!A1:N100",
+            ).execute()
+            for proj in all_projects
+        ],
+        return_exceptions=True,
+    )
 
-            if fb_start is None:
-                print(f"  SKIP {proj.name}: FEEDBACK 섹션 없음")
-                continue
-
-            # 6개 필드 읽기
-            def _get_val(row_idx: int) -> str:
-                if row_idx < len(rows):
-                    row = rows[row_idx]
-                    # B열(index 1) 이후 값 합치기
-                    return " ".join(str(c) for c in row[1:] if c).strip()
-                return ""
-
-            fb_date = _get_val(fb_start)       # 날짜
-            fb_good = _get_val(fb_start + 1)   # 잘 된 것
-            fb_bad = _get_val(fb_start + 2)    # 안 된 것
-            fb_learned = _get_val(fb_start + 3)  # 배운 것
-            fb_gate = _get_val(fb_start + 4)   # Gate 변경?
-            fb_actions = _get_val(fb_start + 5)  # 다음 액션
-
-            # 값이 하나도 없으면 건너뜀
-            has_content = any([fb_date, fb_good, fb_bad, fb_learned, fb_gate, fb_actions])
-            if not has_content:
-                print(f"  SKIP {proj.name}: FEEDBACK 입력 없음")
-                continue
-
-            print(f"  EXPORT {proj.name}:")
-
-            # YAML raw에서 프로젝트 찾기
-            target_proj_dict = None
-            for yaml_path, raw in yaml_raws.items():
-                for p in raw.get("projects", []):
-                    if p.get("id") == proj.id:
-                        target_proj_dict = p
-                        break
-                if target_proj_dict:
+    for proj, resp in zip(all_projects, responses):
+        if isinstance(resp, Exception):
+            print(f"  SKIP {proj.name}: {resp}")
+            continue
+
+        rows = resp.get("values", [])
+
+        # FEEDBACK 배너 행 찾기
+        fb_start = None
+        for i, row in enumerate(rows):
+            if row and "📝 FEEDBACK" in str(row[0]):
+                fb_start = i + 1  # 배너 다음 행부터 입력
+                break
+
+        if fb_start is None:
+            print(f"  SKIP {proj.name}: FEEDBACK 섹션 없음")
+            continue
+
+        # 6개 필드 읽기
+        def _get_val(row_idx: int) -> str:
+            if row_idx < len(rows):
+                row = rows[row_idx]
+                # B열(index 1) 이후 값 합치기
+                return " ".join(str(c) for c in row[1:] if c).strip()
+            return ""
+
+        fb_date = _get_val(fb_start)       # 날짜
+        fb_good = _get_val(fb_start + 1)   # 잘 된 것
+        fb_bad = _get_val(fb_start + 2)    # 안 된 것
+        fb_learned = _get_val(fb_start + 3)  # 배운 것
+        fb_gate = _get_val(fb_start + 4)   # Gate 변경?
+        fb_actions = _get_val(fb_start + 5)  # 다음 액션
+
+        # 값이 하나도 없으면 건너뜀
+        has_content = any([fb_date, fb_good, fb_bad, fb_learned, fb_gate, fb_actions])
+        if not has_content:
+            print(f"  SKIP {proj.name}: FEEDBACK 입력 없음")
+            continue
+
+        print(f"  EXPORT {proj.name}:")
+
+        # YAML raw에서 프로젝트 찾기
+        target_proj_dict = None
+        for yaml_path, raw in yaml_raws.items():
+            for p in raw.get("projects", []):
+                if p.get("id") == proj.id:
+                    target_proj_dict = p
                     break
-
-            if not target_proj_dict:
-                print(f"    YAML에서 {proj.id} 찾을 수 없음")
-                continue
-
-            # Gate 변경 처리
-            if fb_gate and fb_gate.strip() not in ("", "없음"):
-                gate_change = fb_gate.strip()
-                if "A→B" in gate_change or "A->B" in gate_change:
-                    gates = target_proj_dict.setdefault("gates", {})
-                    gates.setdefault("B_grow", {})["status"] = "분별 중"
-                    print(f"    Gate A→B 업데이트")
-                elif "B→C" in gate_change or "B->C" in gate_change:
-                    gates = target_proj_dict.setdefault("gates", {})
-                    gates.setdefault("C_handoff", {})["status"] = "진행중"
-                    print(f"    Gate B→C 업데이트")
-
-            # 다음 액션 갱신
-            if fb_actions:
-                new_actions = [a.strip() for a in fb_actions.split("\n") if a.strip()]
-                if new_actions:
-                    target_proj_dict["next_actions"] = new_actions
-                    print(f"    next_actions 갱신: {len(new_actions)}개")
-
-            # 회고 이력 추가
-            review_entry: dict[str, str] = {
-                "date": fb_date or today,
-            }
-            if fb_good:
-                review_entry["good"] = fb_good
-            if fb_bad:
-                review_entry["bad"] = fb_bad
-            if fb_learned:
-                review_entry["learned"] = fb_learned
-
-            history = target_proj_dict.setdefault("review_history", [])
-            history.append(review_entry)
-            print(f"    review_history 추가: {review_entry['date']}")
-
-            updated_count += 1
+            if target_proj_dict:
+                break
+
+        if not target_proj_dict:
+            print(f"    YAML에서 {proj.id} 찾을 수 없음")
+            continue
+
+        # Gate 변경 처리
+        if fb_gate and fb_gate.strip() not in ("", "없음"):
+            gate_change = fb_gate.strip()
+            if "A→B" in gate_change or "A->B" in gate_change:
+                gates = target_proj_dict.setdefault("gates", {})
+                gates.setdefault("B_grow", {})["status"] = "분별 중"
+                print(f"    Gate A→B 업데이트")
+            elif "B→C" in gate_change or "B->C" in gate_change:
+                gates = target_proj_dict.setdefault("gates", {})
+                gates.setdefault("C_handoff", {})["status"] = "진행중"
+                print(f"    Gate B→C 업데이트")
+
+        # 다음 액션 갱신
+        if fb_actions:
+            new_actions = [a.strip() for a in fb_actions.split("\n") if a.strip()]
+            if new_actions:
+                target_proj_dict["next_actions"] = new_actions
+                print(f"    next_actions 갱신: {len(new_actions)}개")
+
+        # 회고 이력 추가
+        review_entry: dict[str, str] = {
+            "date": fb_date or today,
+        }
+        if fb_good:
+            review_entry["good"] = fb_good
+        if fb_bad:
+            review_entry["bad"] = fb_bad
+        if fb_learned:
+            review_entry["learned"] = fb_learned
+
+        history = target_proj_dict.setdefault("review_history", [])
+        history.append(review_entry)
+        print(f"    review_history 추가: {review_entry['date']}")
+
+        updated_count += 1
 
     # YAML 저장
     if updated_count > 0:
@@ -220,8 +220,8 @@ def status_year(items: list[ScheduleItem], year: int) -> None:
 
 def _get_cal_service():
     from googleapiclient.discovery import build
-    from app.adapters.google_auth import get_credentials
-    creds = get_credentials(["https://www.googleapis.com/auth/calendar"])
+    from app.adapters.google_auth import get_credentials, scopes_for
+    creds = get_credentials(scopes_for("calendar"))
     return build("calendar", "v3", credentials=creds)
 
 
@@ -310,29 +310,28 @@ def deploy_calendar(items: list[ScheduleItem], year: int,
 
 def _get_month_transactions(sheet_service, spreadsheet_id: str,
                              year: int, month: int) -> list[dict]:
-    """가계부 내역 시트에서 해당 월 거래 반환"""
-    resp = sheet_service.spreadsheets().values().get(
-        spreadsheetId=spreadsheet_id,
-        range="'가계부 내역'!A:K",
-    ).execute()
-    rows = resp.get("values", [])
+    """가계부 내역 시트에서 해당 월 거래 반환 (필요한 4개 열만 타입 값으로 조회)"""
+    from app.adapters.sheets import fetch_typed_columns
+
+    cols = fetch_typed_columns(
+        spreadsheet_id,
+        "가계부 내역",
+        1,
+        {"날짜": "date", "내용": "text", "금액": "won", "상세": "text"},
+        max_rows=None,
+        service=sheet_service,
+    )
 
     result = []
-    for row in rows[1:]:  # 헤더 제외
-        if len(row) < 7:
-            continue
-        try:
-            d = datetime.strptime(row[0], "%Y-%m-%d").date()
-            if d.year != year or d.month != month:
-                continue
-            result.append({
-                "date": d,
-                "content": row[5] if len(row) > 5 else "",
-                "amount": row[6] if len(row) > 6 else "",
-                "budget_key": row[10] if len(row) > 10 else "",
-            })
-        except (ValueError, IndexError):
+    for d, content, amount, budget_key in zip(cols["날짜"], cols["내용"], cols["금액"], cols["상세"]):
+        if d is None or d.year != year or d.month != month:
             continue
+        result.append({
+            "date": d,
+            "content": content,
+            "amount": amount,
+            "budget_key": budget_key,
+        })
     return result
 
 
@@ -340,13 +339,9 @@ def check_month(items: list[ScheduleItem], year: int, month: int,
                 spreadsheet_id: str, calendar_id: str = "primary") -> None:
     """월간 이행 확인: Calendar + 가계부 내역"""
     from googleapiclient.discovery import build
-    from app.adapters.google_auth import get_credentials
+    from app.adapters.google_auth import get_credentials, scopes_for
 
-    SCOPES = [
-        "https://www.googleapis.com/auth/calendar.readonly",
-        "https://www.googleapis.com/auth/spreadsheets.readonly",
-    ]
-    creds = get_credentials(SCOPES)
+    creds = get_credentials(scopes_for("calendar", "sheets"))
     cal_svc = build("calendar", "v3", credentials=creds)
     sheet_svc = build("sheets", "v4", credentials=creds)
 
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date, time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+import csv
+import json
+import mmap
+import shutil
+import struct
+import tempfile
+
+from app.utils.dates import parse_date
+
+
+# ── 정규화 스테이징 포맷 ─────────────────────────────────
+# normalized_*.stage: magic, header length, JSON header, then 8-byte aligned columns.
+#   date → int64 ordinal, time → int64 seconds, won → int64, everything else →
+#   uint32 codes into a per-column string dictionary kept in the header.
+# A typed column falls back to dictionary text when any value would not round-trip
+# (e.g. a fractional foreign-currency amount), so the format is lossless.
+# Dedup filters on the raw date ordinals and hands typed rows on (date, time and
+# int won values), so the sheet writers, rules and key index parse no strings.
+
+_MAGIC = b"OCSTAGE1"
+_PREFIX = struct.Struct("<8sI")
+MISSING = -(2 ** 63)
+
+TYPED_COLUMNS = {"날짜": "date", "시간": "time", "금액": "won"}
+# rows buffered per column before they are encoded and spilled to disk
+_CHUNK_ROWS = 8192
+
+
+def _enc_date(text: str) -> int | None:
+    try:
+        d = date.fromisoformat(text)
+    except ValueError:
+        return None
+    return d.toordinal() if d.isoformat() == text else None
+
+
+def _enc_time(text: str) -> int | None:
+    try:
+        t = time.fromisoformat(text)
+    except ValueError:
+        return None
+    if t.strftime("%H:%M:%S") != text:
+        return None
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+def _enc_won(text: str) -> int | None:
+    try:
+        value = int(text)
+    except ValueError:
+        return None
+    return value if str(value) == text else None
+
+
+def _dec_date(v: int) -> str:
+    return date.fromordinal(v).isoformat()
+
+
+def _dec_time(v: int) -> str:
+    return f"{v // 3600:02d}:{v % 3600 // 60:02d}:{v % 60:02d}"
+
+
+_ENCODERS = {"date": _enc_date, "time": _enc_time, "won": _enc_won}
+_DECODERS = {"date": _dec_date, "time": _dec_time, "won": str}
+_TYPED = {
+    "date": date.fromordinal,
+    "time": lambda v: time(v // 3600, v % 3600 // 60, v % 60),
+    "won": int,
+}
+
+
+def _encode_typed(kind: str, values: list[str]) -> array | None:
+    encode = _ENCODERS[kind]
+    out = array("q")
+    for text in values:
+        if text == "":
+            out.append(MISSING)
+            continue
+        v = encode(text)
+        if v is None:
+            return None
+        out.append(v)
+    return out
+
+
+class _ColumnSpill:
+    """One column being written: encoded chunk by chunk into its own temp file.
+
+    Typed columns switch to dictionary text at the first value that does not
+    round-trip; what was already spilled is decoded and re-encoded once.
+    """
+
+    def __init__(self, path: Path, kind: str):
+        self.path = path
+        self.kind = kind
+        self.file = path.open("w+b")
+        self.lookup: dict[str, int] = {}
+
+    def write(self, values: list[str]) -> None:
+        if self.kind != "text":
+            data = _encode_typed(self.kind, values)
+            if data is not None:
+                data.tofile(self.file)
+                return
+            self._to_text()
+        codes = array("I")
+        for text in values:
+            code = self.lookup.get(text)
+            if code is None:
+                code = self.lookup[text] = len(self.lookup)
+            codes.append(code)
+        codes.tofile(self.file)
+
+    def _to_text(self) -> None:
+        decode = _DECODERS[self.kind]
+        done = array("q")
+        self.file.seek(0)
+        done.frombytes(self.file.read())
+        self.file.seek(0)
+        self.file.truncate()
+        self.kind = "text"
+        self.write(["" if v == MISSING else decode(v) for v in done])
+
+    def finish(self, offset: int) -> tuple[dict, int]:
+        """Pad to 8 bytes; returns (header entry, padded size)."""
+        size = self.file.tell()
+        pad = -size % 8
+        self.file.write(b"\0" * pad)
+        meta: dict = {"kind": self.kind, "offset": offset}
+        if self.kind == "text":
+            meta["dict"] = list(self.lookup)
+        return meta, size + pad
+
+
+def write_staging(path: Path, rows: Iterable[dict], headers: list[str]) -> int:
+    """Write rows (string dicts keyed by `headers`) as a typed columnar file; returns row count.
+
+    Rows are consumed as a stream: every _CHUNK_ROWS rows each column is encoded
+    and appended to a spill file next to `path`, so memory holds one chunk plus
+    the text dictionaries. The spills are concatenated behind the header at the end.
+    """
+    with tempfile.TemporaryDirectory(dir=path.parent, prefix=f".{path.name}.") as tmp:
+        spills = [_ColumnSpill(Path(tmp) / f"{n}.col", TYPED_COLUMNS.get(h, "text")) for n, h in enumerate(headers)]
+        try:
+            chunk: list[list[str]] = [[] for _ in headers]
+            count = 0
+            for row in rows:
+                for values, h in zip(chunk, headers):
+                    values.append(row.get(h, "") or "")
+                count += 1
+                if count % _CHUNK_ROWS == 0:
+                    for spill, values in zip(spills, chunk):
+                        spill.write(values)
+                        values.clear()
+            if count % _CHUNK_ROWS:
+                for spill, values in zip(spills, chunk):
+                    spill.write(values)
+
+            meta: dict[str, dict] = {}
+            offset = 0
+            for h, spill in zip(headers, spills):
+                meta[h], size = spill.finish(offset)
+                offset += size
+
+            header = json.dumps({"rows": count, "headers": headers, "columns": meta}, ensure_ascii=False).encode("utf-8")
+            header += b" " * (-(len(header) + _PREFIX.size) % 8)
+            out = path.with_suffix(path.suffix + ".tmp")
+            with out.open("wb") as f:
+                f.write(_PREFIX.pack(_MAGIC, len(header)))
+                f.write(header)
+                for spill in spills:
+                    spill.file.seek(0)
+                    shutil.copyfileobj(spill.file, f)
+        finally:
+            for spill in spills:
+                spill.file.close()
+        out.replace(path)
+    return count
+
+
+class StagingTable:
+    """Read-only view of a .stage file; typed columns are zero-copy memoryviews over an mmap."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._file = path.open("rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, header_len = _PREFIX.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self.close()
+            raise ValueError(f"not a staging file: {path}")
+        header = json.loads(bytes(self._mm[_PREFIX.size:_PREFIX.size + header_len]))
+        self.rows: int = header["rows"]
+        self.headers: list[str] = header["headers"]
+        self._meta: dict[str, dict] = header["columns"]
+        self._base = _PREFIX.size + header_len
+        self._views: dict[str, memoryview] = {}
+
+    def __enter__(self) -> "StagingTable":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def kind(self, name: str) -> str:
+        return self._meta[name]["kind"]
+
+    def column(self, name: str) -> memoryview:
+        """int64 values (typed columns, missing = MISSING) or uint32 dictionary codes (text)."""
+        view = self._views.get(name)
+        if view is None:
+            meta = self._meta[name]
+            fmt, width = ("I", 4) if meta["kind"] == "text" else ("q", 8)
+            start = self._base + meta["offset"]
+            view = memoryview(self._mm)[start:start + self.rows * width].cast(fmt)
+            self._views[name] = view
+        return view
+
+    def dictionary(self, name: str) -> list[str]:
+        return self._meta[name]["dict"]
+
+    def value(self, name: str, i: int, typed: bool = False) -> Any:
+        """Cell text as in the CSV; with typed=True a date, time or int for typed columns."""
+        meta = self._meta[name]
+        v = self.column(name)[i]
+        if meta["kind"] == "text":
+            return meta["dict"][v]
+        if v == MISSING:
+            return ""
+        return (_TYPED if typed else _DECODERS)[meta["kind"]](v)
+
+    def row(self, i: int, typed: bool = False) -> dict:
+        return {name: self.value(name, i, typed) for name in self.headers}
+
+    def iter_rows(self, min_date: date | None = None, typed: bool = False) -> Iterator[dict]:
+        """Rows as in the CSV, or typed; rows dated before `min_date` are skipped on the raw ordinals."""
+        if min_date is not None and "날짜" in self._meta and self.kind("날짜") == "date":
+            dates, floor = self.column("날짜"), min_date.toordinal()
+            for i in range(self.rows):
+                d = dates[i]
+                if d != MISSING and d < floor:
+                    continue
+                yield self.row(i, typed)
+            return
+        for i in range(self.rows):
+            row = self.row(i, typed)
+            if min_date is not None:
+                d = parse_date(row.get("날짜"))
+                if d is not None and d < min_date:
+                    continue
+            yield row
+
+
+def iter_staged_rows(path: Path, min_date: date | None = None, typed: bool = False) -> Iterator[dict]:
+    """Rows of a normalized staging output, .stage or .csv.
+
+    typed=True yields .stage typed columns as date/time/int values; CSV rows stay strings.
+    """
+    if path.suffix.lower() == ".csv":
+        with path.open("r", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                if min_date is not None:
+                    d = parse_date(row.get("날짜"))
+                    if d is not None and d < min_date:
+                        continue
+                yield row
+        return
+    with StagingTable(path) as table:
+        yield from table.iter_rows(min_date, typed)
+
+
+def write_csv(path: Path, rows: Iterable[dict], headers: list[str]) -> None:
+    with path.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(rows)
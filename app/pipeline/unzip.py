@@ -5,14 +5,19 @@ import os
 from app.config import AppConfig
 
 
-def unzip_latest(cfg: AppConfig, export_path: Path) -> Path:
-    stamp = datetime.now().strftime("%Y%m%d")
-    target_dir = cfg.unzip_dir / stamp
+def zip_password() -> bytes | None:
+    return os.environ.get("ZIP_PASSWORD", "").encode("utf-8") or None
+
+
+def unzip_latest(cfg: AppConfig, export_path: Path, digest: str | None = None) -> Path:
+    # keyed by content when the digest is known, so same-day exports don't share a directory
+    name = digest[:16] if digest else datetime.now().strftime("%Y%m%d")
+    target_dir = cfg.unzip_dir / name
     target_dir.mkdir(parents=True, exist_ok=True)
 
     if export_path.suffix.lower() == ".zip":
         with zipfile.ZipFile(export_path, "r") as zf:
-            password = os.environ.get("ZIP_PASSWORD", "").encode("utf-8") or None
+            password = zip_password()
             if password:
                 zf.setpassword(password)
             zf.extractall(target_dir)
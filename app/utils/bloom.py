@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterable
+import math
+import mmap
+import os
+import struct
+
+
+# magic, bit count, hash count, capacity, inserted keys
+_HEADER = struct.Struct("<8sQQQQ")
+_MAGIC = b"OCBLOOM1"
+
+
+def _sizing(capacity: int, fp_rate: float) -> tuple[int, int]:
+    capacity = max(capacity, 1)
+    nbits = max(64, math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2)))
+    nhashes = max(1, round(nbits / capacity * math.log(2)))
+    return nbits, nhashes
+
+
+class BloomFilter:
+    """Memory-mapped Bloom filter over 16-byte row keys (see app.utils.hash.row_key).
+
+    The keys are already uniform digests, so the bit positions come from double
+    hashing their two 64-bit halves instead of hashing again. Only the touched
+    pages of the file are read.
+    """
+
+    def __init__(self, path: Path):
+        """Map an existing filter file; ValueError if it is truncated or not a filter."""
+        self.path = path
+        self._mm: mmap.mmap | None = None
+        self._file = path.open("r+b")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            # mmap cannot map an empty file and the header must be complete
+            if size < _HEADER.size:
+                raise ValueError(f"bloom filter file too short ({size} bytes): {path}")
+            self._mm = mmap.mmap(self._file.fileno(), 0)
+            magic, self.nbits, self.nhashes, self.capacity, self.count = _HEADER.unpack_from(self._mm, 0)
+            if magic != _MAGIC:
+                raise ValueError(f"not a bloom filter file: {path}")
+            if not self.nbits or not self.nhashes or size < _HEADER.size + (self.nbits + 7) // 8:
+                raise ValueError(f"truncated bloom filter file: {path}")
+        except BaseException:
+            self.close()
+            raise
+
+    @classmethod
+    def create(cls, path: Path, capacity: int, fp_rate: float, keys: Iterable[bytes] = ()) -> "BloomFilter":
+        """Write a new filter atomically (tmp + rename) and open it."""
+        nbits, nhashes = _sizing(capacity, fp_rate)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        with tmp.open("wb") as f:
+            f.write(_HEADER.pack(_MAGIC, nbits, nhashes, capacity, 0))
+            f.truncate(_HEADER.size + (nbits + 7) // 8)
+        bloom = cls(tmp)
+        bloom.update(keys)
+        bloom.close()
+        os.replace(tmp, path)
+        return cls(path)
+
+    def __enter__(self) -> "BloomFilter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._mm is not None and not self._mm.closed:
+            self._mm.flush()
+            self._mm.close()
+        self._file.close()
+
+    def _positions(self, key: bytes):
+        h1 = int.from_bytes(key[:8], "little")
+        h2 = int.from_bytes(key[8:16], "little") | 1
+        for i in range(self.nhashes):
+            yield (h1 + i * h2) % self.nbits
+
+    def __contains__(self, key: bytes) -> bool:
+        mm, base = self._mm, _HEADER.size
+        for pos in self._positions(key):
+            if not mm[base + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def update(self, keys: Iterable[bytes], count: int | None = None) -> None:
+        """Set the bits for `keys`; `count` overrides how many of them were new."""
+        mm, base = self._mm, _HEADER.size
+        added = 0
+        for key in keys:
+            added += 1
+            for pos in self._positions(key):
+                offset = base + (pos >> 3)
+                mm[offset] |= 1 << (pos & 7)
+        self.count += added if count is None else count
+        _HEADER.pack_into(mm, 0, _MAGIC, self.nbits, self.nhashes, self.capacity, self.count)
+
+    @property
+    def full(self) -> bool:
+        return self.count > self.capacity
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+import re
+
+
+# 2026-01-05, 2026.01.05, 2026/1/5 (optionally followed by a time part)
+_DATE_RE = re.compile(r"^(\d{4})[-./](\d{1,2})[-./](\d{1,2})")
+
+
+def parse_date(value) -> date | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    m = _DATE_RE.match(str(value).strip())
+    if not m:
+        return None
+    try:
+        return date(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+    except ValueError:
+        return None
+
+
+def parse_time(value) -> time | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    text = str(value).strip()
+    if text.count(":") == 1:
+        text += ":00"
+    try:
+        return time.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def row_datetime(row: dict, date_field: str = "날짜", time_field: str = "시간") -> datetime | None:
+    """Transaction timestamp of a ledger/export row; a missing time counts as midnight."""
+    d = parse_date(row.get(date_field))
+    if d is None:
+        return None
+    return datetime.combine(d, parse_time(row.get(time_field)) or time())
@@ -1,13 +1,78 @@
 from __future__ import annotations
 
+from datetime import date, datetime, time
+from typing import Iterable, Iterator
 import hashlib
 
 
 KEY_FIELDS = ["날짜", "시간", "금액", "내용", "결제수단"]
+KEY_SIZE = 16
+# fixed key: digests must stay stable across runs and machines (not a secret)
+_DIGEST_KEY = b"openclaw-ledger-row-key-v2"
 
 
-def row_key(row: dict, fields: list[str] | None = None) -> str:
+def key_part(value) -> str:
+    """Canonical text of a key field, so typed sheet reads and export strings hash alike."""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, time):
+        return value.strftime("%H:%M:%S")
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def row_key(row: dict, fields: list[str] | None = None) -> bytes:
+    """16-byte keyed BLAKE2b digest of the row's key fields."""
     use_fields = fields or KEY_FIELDS
-    parts = [str(row.get(k, "")) for k in use_fields]
-    raw = "|".join(parts)
-    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    raw = "\x1f".join([key_part(row.get(k, "")) for k in use_fields])
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=KEY_SIZE, key=_DIGEST_KEY).digest()
+
+
+class KeySet:
+    """Immutable set of row keys packed into one sorted bytes buffer (KEY_SIZE bytes per key).
+
+    Membership is a binary search over the buffer, so a multi-year key set costs
+    16 bytes per key instead of a Python object per key.
+    """
+
+    __slots__ = ("_data", "_count")
+
+    def __init__(self, keys: Iterable[bytes] = ()):
+        unique = sorted(set(keys))
+        if any(len(k) != KEY_SIZE for k in unique):
+            raise ValueError(f"row keys must be {KEY_SIZE} bytes")
+        self._data = b"".join(unique)
+        self._count = len(unique)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _at(self, i: int) -> bytes:
+        return self._data[i * KEY_SIZE:(i + 1) * KEY_SIZE]
+
+    def __iter__(self) -> Iterator[bytes]:
+        for i in range(self._count):
+            yield self._at(i)
+
+    def __contains__(self, key: object) -> bool:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            probe = self._at(mid)
+            if probe == key:
+                return True
+            if probe < key:  # type: ignore[operator]
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def union(self, keys: Iterable[bytes]) -> "KeySet":
+        return KeySet([*self, *keys])
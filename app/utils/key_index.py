@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator
+import json
+import sqlite3
+
+from app.utils.dates import parse_date, parse_time, row_datetime
+from app.utils.hash import KEY_FIELDS, key_part, row_key
+
+
+# 3: key fields stored next to each key for fuzzy matching
+# 2: 16-byte BLAKE2b keys as BLOBs (1 stored SHA-256 hex text)
+SCHEMA_VERSION = "3"
+
+# held: kept out of the ledger until decided; released: a real transaction, inserted on the
+# next run; confirmed: a duplicate, dropped from every later export without being flagged again
+SUSPECT_STATUSES = ("held", "released", "confirmed")
+
+
+def parse_won(value) -> int | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return int(round(value))
+    try:
+        return int(round(float(str(value).replace(",", "").replace("₩", "").strip())))
+    except ValueError:
+        return None
+
+
+class KeyIndex:
+    """Local SQLite index of ledger row keys, so dedup does not re-download the ledger.
+
+    Keys are added whenever rows are applied to the ledger and reconciled
+    against the sheet only occasionally (see `needs_reconcile`). The index
+    belongs to one spreadsheet: opened for another `spreadsheet_id` it is
+    emptied and rebuilt from that ledger.
+    """
+
+    def __init__(self, path: Path, spreadsheet_id: str | None = None):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(str(path))
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        stale = self.get_meta("schema_version") not in (None, SCHEMA_VERSION)
+        owner = self.get_meta("spreadsheet_id")
+        if spreadsheet_id and owner is not None and owner != spreadsheet_id:
+            stale = True
+        if stale:
+            # old keys cannot be re-derived locally; rebuild them from the whole sheet
+            self.conn.execute("DROP TABLE IF EXISTS keys")
+            self.conn.execute("DROP TABLE IF EXISTS suspects")
+            self.conn.execute("DELETE FROM meta")
+            self.set_meta("full_reconcile", "pending")
+        if spreadsheet_id:
+            self.set_meta("spreadsheet_id", spreadsheet_id)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS keys ("
+            "key BLOB PRIMARY KEY, date TEXT, time TEXT, amount INTEGER, account TEXT, merchant TEXT"
+            ") WITHOUT ROWID"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS keys_bucket ON keys (date, amount, account)")
+        # fuzzy-duplicate suspects and what was decided about them (see SUSPECT_STATUSES)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS suspects ("
+            "key BLOB PRIMARY KEY, status TEXT, row TEXT, flagged_at TEXT"
+            ") WITHOUT ROWID"
+        )
+        self.set_meta("schema_version", SCHEMA_VERSION)
+        self.conn.commit()
+
+    def __enter__(self) -> "KeyIndex":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.conn.commit()
+        self.conn.close()
+
+    def __len__(self) -> int:
+        # kept in meta by add_rows/reconcile, so a run never scans the table to count it
+        stored = self.get_meta("key_count")
+        if stored is None:
+            count = self.conn.execute("SELECT COUNT(*) FROM keys").fetchone()[0]
+            self.set_meta("key_count", str(count))
+            self.conn.commit()
+            return count
+        return int(stored)
+
+    def get_meta(self, name: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name: str, value: str) -> None:
+        self.conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def iter_keys(self) -> Iterator[bytes]:
+        for (key,) in self.conn.execute("SELECT key FROM keys"):
+            yield key
+
+    def contains(self, key: bytes) -> bool:
+        return self.conn.execute("SELECT 1 FROM keys WHERE key = ?", (key,)).fetchone() is not None
+
+    @property
+    def watermark(self) -> datetime | None:
+        """Latest transaction timestamp known to be in the ledger."""
+        stamp = self.get_meta("watermark")
+        return datetime.fromisoformat(stamp) if stamp else None
+
+    def _bump_watermark(self, stamps: Iterable[datetime | None]) -> None:
+        current = self.watermark
+        for stamp in stamps:
+            if stamp is not None and (current is None or stamp > current):
+                current = stamp
+        if current is not None:
+            self.set_meta("watermark", current.isoformat(timespec="seconds"))
+
+    def add_rows(self, rows: Iterable[dict], fields: list[str] | None = None) -> int:
+        """Insert ledger-shaped rows (strings or typed sheet values); returns how many were new."""
+        use_fields = fields or KEY_FIELDS
+        rows = list(rows)
+        entries = []
+        for r in rows:
+            d, t = parse_date(r.get("날짜")), parse_time(r.get("시간"))
+            entries.append((
+                row_key(r, use_fields),
+                d.isoformat() if d else None,
+                t.strftime("%H:%M:%S") if t else None,
+                parse_won(r.get("금액")),
+                key_part(r.get("결제수단")),
+                key_part(r.get("내용")),
+            ))
+        count = len(self)
+        before = self.conn.total_changes
+        self.conn.executemany("INSERT OR IGNORE INTO keys VALUES (?, ?, ?, ?, ?, ?)", entries)
+        added = self.conn.total_changes - before
+        self.set_meta("key_count", str(count + added))
+        self._bump_watermark(row_datetime(r) for r in rows)
+        self.conn.commit()
+        return added
+
+    def bucket(self, day: str, amount: int, account: str) -> list[tuple[bytes, str | None, str]]:
+        """(key, time, merchant) of known rows sharing date, amount and 결제수단."""
+        return self.conn.execute(
+            "SELECT key, time, merchant FROM keys WHERE date = ? AND amount = ? AND account = ?",
+            (day, amount, account),
+        ).fetchall()
+
+    def reconcile(self, rows: Iterable[dict], full: bool = False) -> tuple[int, int]:
+        """Make the index match key-field rows read from the sheet; returns (added, removed).
+
+        With `full` the rows are the whole ledger and every other key is removed.
+        Otherwise they are the newest window: keys dated after the window's oldest
+        day that the sheet no longer has are removed (that day itself may be cut
+        off by the window, so it is kept). The watermark is recomputed either way,
+        so deleting the newest ledger rows moves it back.
+        """
+        rows = list(rows)
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS sheet_keys (key BLOB PRIMARY KEY)")
+        self.conn.execute("DELETE FROM sheet_keys")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO sheet_keys VALUES (?)", ((row_key(r, KEY_FIELDS),) for r in rows)
+        )
+        count = len(self)
+        before = self.conn.total_changes
+        if full:
+            self.conn.execute("DELETE FROM keys WHERE key NOT IN (SELECT key FROM sheet_keys)")
+        else:
+            days = [d for d in (parse_date(r.get("날짜")) for r in rows) if d is not None]
+            if days:
+                self.conn.execute(
+                    "DELETE FROM keys WHERE date > ? AND key NOT IN (SELECT key FROM sheet_keys)",
+                    (min(days).isoformat(),),
+                )
+        removed = self.conn.total_changes - before
+        self.set_meta("key_count", str(count - removed))
+        self.conn.execute("DELETE FROM sheet_keys")
+        if full or rows:
+            self.conn.execute("DELETE FROM meta WHERE name = 'watermark'")
+        added = self.add_rows(rows)
+        self.set_meta("reconciled_at", datetime.now().isoformat(timespec="seconds"))
+        if full:
+            self.conn.execute("DELETE FROM meta WHERE name = 'full_reconcile'")
+        self.conn.commit()
+        return added, removed
+
+    def suspect_status(self, keys: Iterable[bytes]) -> dict[bytes, str]:
+        """Recorded status of those `keys` that were flagged as fuzzy duplicates."""
+        found: dict[bytes, str] = {}
+        for key in keys:
+            row = self.conn.execute("SELECT status FROM suspects WHERE key = ?", (key,)).fetchone()
+            if row:
+                found[key] = row[0]
+        return found
+
+    def hold_suspects(self, entries: Iterable[tuple[bytes, dict]]) -> int:
+        """Record (key, row) suspects as held; a decision already made is kept. Returns how many were new."""
+        now = datetime.now().isoformat(timespec="seconds")
+        before = self.conn.total_changes
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO suspects VALUES (?, 'held', ?, ?)",
+            [(key, json.dumps(row, ensure_ascii=False, default=key_part), now) for key, row in entries],
+        )
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def set_suspect_status(self, status: str, keys: Iterable[bytes] | None = None) -> int:
+        """Mark suspects (all held ones when `keys` is None) released or confirmed; returns the count."""
+        if status not in SUSPECT_STATUSES:
+            raise ValueError(f"unknown suspect status: {status}")
+        before = self.conn.total_changes
+        if keys is None:
+            self.conn.execute("UPDATE suspects SET status = ? WHERE status = 'held'", (status,))
+        else:
+            self.conn.executemany("UPDATE suspects SET status = ? WHERE key = ?", [(status, k) for k in keys])
+        self.conn.commit()
+        return self.conn.total_changes - before
+
+    def list_suspects(self, status: str | None = None) -> list[tuple[bytes, str, dict, str]]:
+        """(key, status, row, flagged_at), oldest first."""
+        sql = "SELECT key, status, row, flagged_at FROM suspects"
+        args: tuple = ()
+        if status:
+            sql, args = sql + " WHERE status = ?", (status,)
+        return [
+            (key, st, json.loads(row), at)
+            for key, st, row, at in self.conn.execute(sql + " ORDER BY flagged_at, key", args)
+        ]
+
+    @property
+    def needs_full_reconcile(self) -> bool:
+        return self.get_meta("full_reconcile") == "pending"
+
+    def needs_reconcile(self, max_age_days: int) -> bool:
+        stamp = self.get_meta("reconciled_at")
+        if not stamp:
+            return True
+        try:
+            last = datetime.fromisoformat(stamp)
+        except ValueError:
+            return True
+        return datetime.now() - last > timedelta(days=max_age_days)
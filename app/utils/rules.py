@@ -22,6 +22,8 @@ class Rule:
 
 
 DEFAULT_FIELDS = ["merchant", "memo", "account", "raw_text", "sub_category", "main_category"]
+# ledger columns apply_rules reads, as sheets.fetch_typed_columns types (금액 arrives as int won)
+RULE_COLUMNS = {"금액": "won", "내용": "text", "메모": "text", "결제수단": "text", "소분류": "text", "대분류": "text"}
 
 
 def load_rules() -> list[Rule]:
@@ -133,6 +135,9 @@ def _match_amount(rule: Rule, data: dict) -> bool:
 def _to_float(val) -> float | None:
     if val is None:
         return None
+    if isinstance(val, (int, float)):
+        # typed sheet reads: no string cleanup
+        return float(val)
     try:
         if isinstance(val, str):
             val = val.replace(",", "").replace("₩", "").strip()
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from datetime import datetime
+from datetime import date
 from pathlib import Path
 import json
 import sys
@@ -11,48 +11,25 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.adapters.google_auth import get_credentials
-from app.adapters.sheets import _get_headers
+from app.adapters.sheets import fetch_typed_rows
 from app.utils.categories import load_categories
 
 
-def fetch_rows(spreadsheet_id: str, sheet_name: str, header_row: int, max_rows: int = 8000) -> list[dict]:
-    from googleapiclient.discovery import build
+def fetch_rows(spreadsheet_id: str, sheet_name: str, header_row: int, max_rows: int = 8000,
+               newest_first: bool = True) -> list[dict]:
+    # only the columns the report uses, as typed values (dates, int won), no per-cell string parsing
+    return fetch_typed_rows(
+        spreadsheet_id,
+        sheet_name,
+        header_row,
+        {"날짜": "date", "내용": "text", "상세": "text"},
+        max_rows=max_rows,
+        newest_first=newest_first,
+    )
 
-    service = build("sheets", "v4", credentials=get_credentials(["https://www.googleapis.com/auth/spreadsheets"]))
-    headers = _get_headers(service, spreadsheet_id, sheet_name, header_row)
-    if not headers:
-        return []
-
-    col_count = len(headers)
-
-    def col_letter(n: int) -> str:
-        result = ""
-        while n > 0:
-            n, rem = divmod(n - 1, 26)
-            result = chr(65 + rem) + result
-        return result
-
-    last_col = col_letter(col_count)
-    start_row = header_row + 1
-    end_row = start_row + max_rows - 1
-    rng = f"{sheet_name}!A{start_row}:{last_col}{end_row}"
-    resp = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=rng).execute()
-    values = resp.get("values", [])
 
-    rows = []
-    for row in values:
-        item = {headers[i]: row[i] if i < len(row) else "" for i in range(col_count)}
-        rows.append(item)
-    return rows
-
-
-def is_target_month(date_str: str, year: int, month: int) -> bool:
-    try:
-        dt = datetime.fromisoformat(date_str)
-    except Exception:
-        return False
-    return dt.year == year and dt.month == month
+def is_target_month(d: date | None, year: int, month: int) -> bool:
+    return d is not None and d.year == year and d.month == month
 
 
 def load_rules(path: Path) -> list[dict]:
@@ -77,7 +54,10 @@ def main() -> int:
     rules = load_rules(rules_path)
     allowed = load_categories()
 
-    rows = fetch_rows(cfg.spreadsheet_id, cfg.sheet_ledger, cfg.ledger_header_row)
+    rows = fetch_rows(
+        cfg.spreadsheet_id, cfg.sheet_ledger, cfg.ledger_header_row,
+        newest_first=cfg.ledger_insert_mode != "append",
+    )
 
     # Build merchant frequency per manual category for target month
     year = int(sys.argv[1]) if len(sys.argv) > 1 else 2025
@@ -86,8 +66,7 @@ def main() -> int:
 
     counts = defaultdict(Counter)
     for row in rows:
-        date_val = str(row.get("날짜", "")).strip()
-        if not is_target_month(date_val, year, month):
+        if not is_target_month(row.get("날짜"), year, month):
             continue
         manual = str(row.get("상세", "")).strip()
         if not manual:
@@ -0,0 +1,173 @@
+"""Offline cron-tick simulation of the whole pipeline on replayed Gmail/Drive.
+
+Each tick one new export email "arrives" (a message fixture is written) and
+run_pipeline() runs against GmailReplay, DriveReplay and SheetsEmulator, so the
+ingest stage can be profiled without any Google account. Like a real export,
+each tick's workbook is the sample history plus every transaction made since
+the seeded ledger, with --new-rows more per tick, so each tick goes through
+dedup, apply, categorize and the sheet commit.
+
+사용법:
+  python3 scripts/bench_ingest.py                        # 3 ticks, sample xlsx as the history
+  python3 scripts/bench_ingest.py --ticks 5 --idle 2 --latency-ms 150
+  python3 scripts/bench_ingest.py --backlog --ticks 4    # 메일이 쌓인 뒤 한 번에 처리
+"""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import openpyxl
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.adapters import drive, gmail, sheets
+from app.adapters.google_replay import DriveReplay, GmailReplay, write_message_fixture
+from app.adapters.sheets_emulator import SheetsEmulator
+from app.config import load_config
+from app.pipeline.normalize import EXPORT_SHEET
+
+from bench_sheets import seed_ledger, synthetic_rows
+
+SAMPLE_XLSX = ROOT / "sample" / "준서의 인생 계획.xlsx"
+
+
+def _read_history(xlsx_path: Path) -> tuple[list, list[tuple]]:
+    """Header and rows of the export sheet, as the cell values openpyxl returns."""
+    wb = openpyxl.load_workbook(xlsx_path, read_only=True, data_only=True)
+    try:
+        rows = wb[EXPORT_SHEET].iter_rows(values_only=True)
+        return list(next(rows, ())), list(rows)
+    finally:
+        wb.close()
+
+
+def _export_xlsx(header: list, history: list[tuple], new_rows: list[dict]) -> bytes:
+    """Newest-first export workbook: `new_rows` (bench_sheets rows) above the history."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(EXPORT_SHEET)
+    ws.append(header)
+    names = [str(h).strip() if h else "" for h in header]
+    for row in new_rows:
+        # typed cells, as Bank Salad writes them
+        values = {
+            **row,
+            "날짜": datetime.fromisoformat(row["날짜"]),
+            "시간": datetime.strptime(row["시간"], "%H:%M:%S").time(),
+            "금액": int(row["금액"]),
+        }
+        ws.append([values.get(name) for name in names])
+    for values in history:
+        ws.append(values)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def _export_zip(xlsx: bytes, tag: str) -> bytes:
+    # the tag member makes every tick's export a new digest, like real daily exports
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("banksalad.xlsx", xlsx)
+        zf.writestr("export_id.txt", tag)
+    return buf.getvalue()
+
+
+def run_ticks(args) -> dict:
+    from app.main import run_pipeline
+
+    header, history = _read_history(args.xlsx)
+    start = datetime(2026, 3, 1, 9, 0, 0)
+    made: list[dict] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["APP_DATA_DIR"] = tmp
+        os.environ["GOOGLE_BACKEND"] = "live"  # the replay backends are installed here, not by run_pipeline
+        cfg = load_config()
+        emu = SheetsEmulator(latency_ms=args.latency_ms)
+        os.environ["SPREADSHEET_ID"] = seed_ledger(emu, cfg, synthetic_rows(args.rows, start))
+        gmail_backend = GmailReplay(cfg.replay_dir / "gmail", args.latency_ms)
+        drive_backend = DriveReplay(cfg.replay_dir / "drive", args.latency_ms)
+        sheets.set_service_factory(lambda: emu)
+        gmail.set_service_factory(lambda: gmail_backend)
+        drive.set_service_factory(lambda: drive_backend)
+        try:
+            results = {}
+            for tick in range(args.ticks + args.idle):
+                if tick < args.ticks:
+                    received = start + timedelta(days=tick + 1)
+                    # the day since the previous export, all newer than the seeded ledger
+                    made = [
+                        {**r, "날짜": ts.date().isoformat(), "시간": ts.strftime("%H:%M:%S")}
+                        for r, ts in zip(
+                            synthetic_rows(args.new_rows, received, seed=100 + tick),
+                            (received - timedelta(days=(i + 1) / (args.new_rows + 1)) for i in range(args.new_rows)),
+                        )
+                    ] + made
+                    xlsx = _export_xlsx(header, history, made)
+                    write_message_fixture(
+                        cfg.replay_dir / "gmail",
+                        f"msg{tick:04d}",
+                        int(received.timestamp() * 1000),
+                        1000 + tick,
+                        {"banksalad_export.zip": _export_zip(xlsx, f"tick {tick}")},
+                    )
+                if args.backlog and tick < args.ticks - 1:
+                    continue
+                for backend in (emu, gmail_backend, drive_backend):
+                    backend.reset_stats()
+                began = time.perf_counter()
+                run_pipeline(backlog=args.backlog)
+                results[f"tick{tick}"] = {
+                    "seconds": round(time.perf_counter() - began, 3),
+                    "gmail": gmail_backend.stats.summary(),
+                    "drive": drive_backend.stats.summary(),
+                    "sheets_calls": emu.stats.total_calls,
+                }
+        finally:
+            sheets.set_service_factory(None)
+            gmail.set_service_factory(None)
+            drive.set_service_factory(None)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Gmail/Drive 재생 기반 파이프라인 틱 시뮬레이션 (오프라인)")
+    parser.add_argument("--ticks", type=int, default=3, help="새 내보내기 메일이 도착하는 틱 수")
+    parser.add_argument("--idle", type=int, default=1, help="새 메일 없이 도는 틱 수")
+    parser.add_argument("--rows", type=int, default=2000, help="기존 가계부 행 수")
+    parser.add_argument("--new-rows", type=int, default=5, help="틱마다 내보내기에 새로 생기는 거래 수")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="호출당 가상 지연")
+    parser.add_argument("--backlog", action="store_true", help="메일이 모두 도착한 뒤 --backlog로 한 번에 처리")
+    parser.add_argument("--xlsx", type=Path, default=SAMPLE_XLSX, help="내보내기의 과거 내역으로 쓸 xlsx")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+
+    os.environ.setdefault("APP_LOG_PATH", str(Path(tempfile.gettempdir()) / "openclaw_bench.log"))
+    os.chdir(ROOT)
+    results = run_ticks(args)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for name, res in results.items():
+            print(f"\n[{name}] {res['seconds']}s  sheets_calls={res['sheets_calls']}")
+            for label in ("gmail", "drive"):
+                stats = res[label]
+                methods = " ".join(f"{m}={n}" for m, n in stats["by_method"].items())
+                print(f"  {label:<6} calls={stats['calls']} recv={stats['bytes_received']:,}B "
+                      f"sent={stats['bytes_sent']:,}B  {methods}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,223 @@
+"""Offline Sheets round-trip benchmark on top of SheetsEmulator.
+
+사용법:
+  python3 scripts/bench_sheets.py                       # pipeline + budget + projects
+  python3 scripts/bench_sheets.py pipeline --rows 20000 --new-rows 50 --latency-ms 150
+  python3 scripts/bench_sheets.py insert_modes --rows 20000   # insert vs append
+"""
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from app.adapters import sheets
+from app.adapters.sheets_emulator import SheetsEmulator
+from app.config import load_config
+from app.pipeline.normalize import STANDARD_HEADERS
+
+LEDGER_HEADERS = STANDARD_HEADERS[:11] + [
+    "자동카테고리", "category", "category_source", "reviewed", "confidence", "재분류필요",
+]
+MERCHANTS = ["GS25판교알파점", "스타벅스 판교점", "쿠팡", "현대해상화재보험", "교회 헌금", "카카오T", "이마트"]
+ACCOUNTS = ["Hyundai Mobility카드(Family)", "입출금통장", "신한카드"]
+
+
+def synthetic_rows(count: int, newest: datetime, seed: int = 7) -> list[dict]:
+    """Newest-first ledger-shaped rows, roughly 8 per day going back from `newest`."""
+    rng = random.Random(seed)
+    rows = []
+    ts = newest
+    for _ in range(count):
+        ts -= timedelta(minutes=rng.randint(30, 300))
+        rows.append({
+            "날짜": ts.date().isoformat(),
+            "시간": ts.strftime("%H:%M:%S"),
+            "타입": "지출",
+            "대분류": "생활",
+            "소분류": "편의점",
+            "내용": rng.choice(MERCHANTS),
+            "금액": str(-rng.randint(1, 2000) * 100),
+            "화폐": "KRW",
+            "결제수단": rng.choice(ACCOUNTS),
+            "메모": "",
+            "상세": "",
+        })
+    return rows
+
+
+def seed_ledger(emu: SheetsEmulator, cfg, rows: list[dict]) -> str:
+    grid = [LEDGER_HEADERS] + [[r.get(h, "") for h in LEDGER_HEADERS] for r in rows]
+    return emu.add_spreadsheet({cfg.sheet_ledger: grid})
+
+
+def bench_pipeline(emu: SheetsEmulator, args) -> dict:
+    """cold: empty key index (reconciles from the sheet), warm: index already reconciled."""
+    from app.pipeline.dedup import filter_new_rows, open_key_index, reconcile_key_index
+    from app.pipeline.apply_sheet import apply_to_ledger
+    from app.pipeline.categorize import auto_categorize
+    from app.pipeline.budget import refresh_budget_views
+
+    base = load_config()
+    now = datetime(2026, 3, 1, 12, 0, 0)
+    existing = synthetic_rows(args.rows, now - timedelta(days=1))
+    incoming = synthetic_rows(args.new_rows, now, seed=11) + existing[: args.new_rows]
+
+    results = {}
+    for label in ("cold", "warm"):
+        run_emu = SheetsEmulator(latency_ms=emu.latency_ms)
+        sheets.set_service_factory(lambda: run_emu)
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = replace(
+                base,
+                spreadsheet_id=seed_ledger(run_emu, base, existing),
+                staging_dir=Path(tmp),
+                key_index_path=Path(tmp) / "ledger_keys.sqlite3",
+            )
+            staging = Path(tmp) / "normalized_bench.csv"
+            with staging.open("w", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=STANDARD_HEADERS)
+                writer.writeheader()
+                for r in incoming:
+                    writer.writerow({**r, "원본파일": "bench.xlsx", "원본행ID": ""})
+            if label == "warm":
+                with open_key_index(cfg) as index:
+                    reconcile_key_index(cfg, index)
+
+            run_emu.reset_stats()
+            start = time.perf_counter()
+            new_rows = filter_new_rows(cfg, staging)
+            buffer = sheets.SheetWriteBuffer(cfg.spreadsheet_id)
+            start_row = apply_to_ledger(cfg, new_rows, buffer)
+            auto_categorize(cfg, new_rows, buffer, start_row=start_row)
+            buffer.commit()
+            refresh_budget_views(cfg)
+            elapsed = time.perf_counter() - start
+        results[label] = {"new_rows": len(new_rows), "seconds": round(elapsed, 3), **run_emu.stats.summary()}
+    sheets.set_service_factory(lambda: emu)
+    return results
+
+
+def bench_insert_modes(emu: SheetsEmulator, args) -> dict:
+    """LEDGER_INSERT_MODE insert vs append on the same seeded ledger (use --rows 20000)."""
+    from app.pipeline.apply_sheet import apply_to_ledger
+    from app.pipeline.categorize import auto_categorize
+
+    base = load_config()
+    now = datetime(2026, 3, 1, 12, 0, 0)
+    existing = synthetic_rows(args.rows, now - timedelta(days=1))
+    incoming = synthetic_rows(args.new_rows, now, seed=11)
+
+    results = {}
+    for mode in ("insert", "append"):
+        mode_emu = SheetsEmulator(latency_ms=emu.latency_ms)
+        sheets.set_service_factory(lambda: mode_emu)
+        with tempfile.TemporaryDirectory() as tmp:
+            cfg = replace(
+                base,
+                spreadsheet_id=seed_ledger(mode_emu, base, existing),
+                ledger_insert_mode=mode,
+                key_index_path=Path(tmp) / "ledger_keys.sqlite3",
+            )
+            if mode == "append":
+                # steady state: the sorted view already exists after the first append run
+                mode_emu.add_sheet(cfg.spreadsheet_id, cfg.sheet_ledger_view)
+            mode_emu.reset_stats()
+            start = time.perf_counter()
+            buffer = sheets.SheetWriteBuffer(cfg.spreadsheet_id)
+            start_row = apply_to_ledger(cfg, incoming, buffer)
+            auto_categorize(cfg, incoming, buffer, start_row=start_row)
+            buffer.commit()
+            elapsed = time.perf_counter() - start
+        results[mode] = {"new_rows": len(incoming), "seconds": round(elapsed, 3), **mode_emu.stats.summary()}
+    sheets.set_service_factory(lambda: emu)
+    return results
+
+
+def bench_budget(emu: SheetsEmulator, args) -> dict:
+    from app.pipeline.budget import deploy, load_budget_config
+
+    budget_cfg = load_budget_config(ROOT / "data" / "budget_config.yaml")
+    sid = emu.add_spreadsheet({"가계부 내역": [LEDGER_HEADERS]})
+    emu.reset_stats()
+    start = time.perf_counter()
+    deploy(budget_cfg, sid)
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), **emu.stats.summary()}
+
+
+def bench_projects(emu: SheetsEmulator, args) -> dict:
+    from app.pipeline.projects import deploy, load_all_projects
+
+    tiers = load_all_projects(ROOT / "data" / "projects", ROOT / "data" / "budget_config.yaml")
+    os.environ["PROJECT_SPREADSHEET_ID"] = ""
+    emu.reset_stats()
+    start = time.perf_counter()
+    deploy(tiers, force=True)  # 신규 스프레드시트에도 "전체 현황" 탭이 있으므로
+    elapsed = time.perf_counter() - start
+    return {"seconds": round(elapsed, 3), **emu.stats.summary()}
+
+
+SCENARIOS = {
+    "pipeline": bench_pipeline,
+    "insert_modes": bench_insert_modes,
+    "budget": bench_budget,
+    "projects": bench_projects,
+}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Sheets API 호출 패턴 벤치마크 (오프라인)")
+    parser.add_argument("scenario", nargs="*", help=f"{', '.join(SCENARIOS)} (기본: 전체)")
+    parser.add_argument("--rows", type=int, default=5000, help="기존 가계부 행 수")
+    parser.add_argument("--new-rows", type=int, default=40, help="신규 거래 수")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="호출당 가상 지연")
+    parser.add_argument("--json", action="store_true", help="JSON으로 출력")
+    args = parser.parse_args()
+    unknown = [s for s in args.scenario if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    os.environ.setdefault("APP_LOG_PATH", str(Path(tempfile.gettempdir()) / "openclaw_bench.log"))
+    os.chdir(ROOT)
+
+    results = {}
+    for name in args.scenario or list(SCENARIOS):
+        emu = SheetsEmulator(latency_ms=args.latency_ms)
+        sheets.set_service_factory(lambda: emu)
+        try:
+            res = SCENARIOS[name](emu, args)
+        finally:
+            sheets.set_service_factory(None)
+        if "calls" in res:
+            results[name] = res
+        else:
+            results.update({f"{name}/{label}": sub for label, sub in res.items()})
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for name, res in results.items():
+            extra = f"  new_rows={res['new_rows']}" if "new_rows" in res else ""
+            print(f"\n[{name}] {res['seconds']}s  calls={res['calls']}{extra}  "
+                  f"read={res['cells_read']} written={res['cells_written']} shifted={res['cells_shifted']}  "
+                  f"sent={res['bytes_sent']:,}B recv={res['bytes_received']:,}B")
+            for method, count in res["by_method"].items():
+                print(f"  {method:<20} {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
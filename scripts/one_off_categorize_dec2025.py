@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date
 from pathlib import Path
 import csv
 import sys
@@ -9,49 +9,26 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from app.adapters.google_auth import get_credentials
-from app.adapters.sheets import _get_headers  # reuse header reader
-from app.utils.rules import load_rules, apply_rules
+from app.adapters.sheets import fetch_typed_rows
+from app.utils.rules import RULE_COLUMNS, load_rules, apply_rules
 from app.config import load_config
 
 
-def fetch_rows(spreadsheet_id: str, sheet_name: str, header_row: int, max_rows: int = 5000) -> list[dict]:
-    from googleapiclient.discovery import build
+def fetch_rows(spreadsheet_id: str, sheet_name: str, header_row: int, max_rows: int = 5000,
+               newest_first: bool = True) -> list[dict]:
+    # only the columns the report uses, as typed values (dates, int won), no per-cell string parsing
+    return fetch_typed_rows(
+        spreadsheet_id,
+        sheet_name,
+        header_row,
+        {"날짜": "date", "시간": "time", "상세": "text", **RULE_COLUMNS},
+        max_rows=max_rows,
+        newest_first=newest_first,
+    )
 
-    service = build("sheets", "v4", credentials=get_credentials(["https://www.googleapis.com/auth/spreadsheets"]))
-    headers = _get_headers(service, spreadsheet_id, sheet_name, header_row)
-    if not headers:
-        return []
 
-    col_count = len(headers)
-    # Build range A{header_row+1}:<last_col>
-    def col_letter(n: int) -> str:
-        result = ""
-        while n > 0:
-            n, rem = divmod(n - 1, 26)
-            result = chr(65 + rem) + result
-        return result
-
-    last_col = col_letter(col_count)
-    start_row = header_row + 1
-    end_row = start_row + max_rows - 1
-    rng = f"{sheet_name}!A{start_row}:{last_col}{end_row}"
-    resp = service.spreadsheets().values().get(spreadsheetId=spreadsheet_id, range=rng).execute()
-    values = resp.get("values", [])
-
-    rows = []
-    for row in values:
-        item = {headers[i]: row[i] if i < len(row) else "" for i in range(col_count)}
-        rows.append(item)
-    return rows
-
-
-def is_dec_2025(date_str: str) -> bool:
-    try:
-        dt = datetime.fromisoformat(date_str)
-    except Exception:
-        return False
-    return dt.year == 2025 and dt.month == 12
+def is_dec_2025(d: date | None) -> bool:
+    return d is not None and d.year == 2025 and d.month == 12
 
 
 def main() -> int:
@@ -61,7 +38,10 @@ def main() -> int:
 
     rules = load_rules()
 
-    rows = fetch_rows(cfg.spreadsheet_id, cfg.sheet_ledger, cfg.ledger_header_row)
+    rows = fetch_rows(
+        cfg.spreadsheet_id, cfg.sheet_ledger, cfg.ledger_header_row,
+        newest_first=cfg.ledger_insert_mode != "append",
+    )
 
     out_dir = Path("./data/reports")
     out_dir.mkdir(parents=True, exist_ok=True)
@@ -86,8 +66,7 @@ def main() -> int:
         ])
 
         for row in rows:
-            date_val = str(row.get("날짜", "")).strip()
-            if not is_dec_2025(date_val):
+            if not is_dec_2025(row.get("날짜")):
                 continue
 
             total += 1
@@ -106,9 +85,9 @@ def main() -> int:
                 mismatched += 1
 
             writer.writerow([
-                date_val,
-                str(row.get("시간", "")).strip(),
-                str(row.get("금액", "")).strip(),
+                row["날짜"].isoformat(),
+                row["시간"].strftime("%H:%M:%S") if row.get("시간") else "",
+                "" if row.get("금액") is None else row["금액"],
                 str(row.get("내용", "")).strip(),
                 manual,
                 auto,